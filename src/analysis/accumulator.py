@@ -0,0 +1,236 @@
+import json
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from .types import Annotation, AnnotationCategory
+from .agreement import AgreementCounts, get_applicable_categories
+from .cache import _atomic_write
+from .frame import CATEGORY_INDEX
+from .vocab import LabelVocabulary, popcount
+
+# Bump whenever the serialized layout changes
+ACCUMULATOR_VERSION = 1
+
+# Per-turn label bitmasks of one annotation: turn_idx -> category -> mask
+TurnMasks = Dict[int, Dict[AnnotationCategory, int]]
+
+# (category, turn_idx, annotator1, annotator2)
+CellKey = Tuple[AnnotationCategory, int, str, str]
+
+class CellTotals:
+    """Running totals of one (category, turn, annotator pair) cell."""
+    __slots__ = ('f1_sum', 'count', 'tp', 'fp', 'fn')
+
+    def __init__(self, f1_sum: float = 0.0, count: int = 0, tp: int = 0, fp: int = 0, fn: int = 0):
+        self.f1_sum = f1_sum
+        self.count = count
+        self.tp = tp  # Labels both annotators chose
+        self.fp = fp  # Labels only the second annotator chose
+        self.fn = fn  # Labels only the first annotator chose
+
+    @property
+    def mean_f1(self) -> float:
+        return self.f1_sum / self.count if self.count else 0.0
+
+    def as_list(self) -> list:
+        return [self.f1_sum, self.count, self.tp, self.fp, self.fn]
+
+def _mask_f1(mask1: int, mask2: int) -> float:
+    """Same arithmetic as calculate_f1_score on label bitmasks."""
+    if not mask1 and not mask2:
+        return 1.0
+    intersection = popcount(mask1 & mask2)
+    if not intersection:
+        return 0.0
+    precision = intersection / popcount(mask1)
+    recall = intersection / popcount(mask2)
+    return 2 * (precision * recall) / (precision + recall)
+
+class AgreementAccumulator:
+    """
+    Incrementally maintained agreement: running F1 sums and TP/FP/FN label counts per
+    (category, turn, annotator pair), updated as annotations are added or retracted.
+
+    Like calculate_agreement_scores, every applicable category of every turn both
+    annotators of a task have is compared, and each pair is ordered by when the
+    annotations were added. Only the cells of the changed annotation are touched, and
+    the state round-trips through JSON so a long-running round can refresh its report
+    without re-reading every export.
+    """
+
+    def __init__(self, vocab: Optional[LabelVocabulary] = None):
+        # Own vocabulary by default, so serialized bitmasks don't depend on the process
+        self.vocab = vocab or LabelVocabulary()
+        self._annotations: Dict[str, Dict[str, TurnMasks]] = {}  # task -> annotator -> masks, in insertion order
+        self._cells: Dict[CellKey, CellTotals] = {}
+
+    def _encode(self, annotation: Annotation) -> TurnMasks:
+        masks = {}
+        for turn_idx, turn in annotation.turns.items():
+            masks[turn_idx] = {
+                category: self.vocab.encode(category, getattr(turn, category.value) or ())
+                for category in get_applicable_categories(turn_idx % 2 == 1)
+            }
+        return masks
+
+    def _apply(self, masks1: TurnMasks, masks2: TurnMasks, annotator1: str, annotator2: str, sign: int):
+        """Add (sign=1) or remove (sign=-1) the cells of one annotator pair on one task."""
+        for turn_idx in masks1.keys() & masks2.keys():
+            for category, mask1 in masks1[turn_idx].items():
+                mask2 = masks2[turn_idx][category]
+                key = (category, turn_idx, annotator1, annotator2)
+                totals = self._cells.get(key)
+                if totals is None:
+                    totals = self._cells[key] = CellTotals()
+                totals.f1_sum += sign * _mask_f1(mask1, mask2)
+                totals.count += sign
+                totals.tp += sign * popcount(mask1 & mask2)
+                totals.fp += sign * popcount(mask2 & ~mask1)
+                totals.fn += sign * popcount(mask1 & ~mask2)
+                if not totals.count:
+                    del self._cells[key]
+
+    def _apply_task(self, task_id: str, annotator_id: str, masks: TurnMasks, sign: int):
+        """Add or remove the pairs of one annotation with every other annotation of its task."""
+        annotators = list(self._annotations[task_id])
+        position = annotators.index(annotator_id)
+        for idx, other in enumerate(annotators):
+            if other == annotator_id:
+                continue
+            other_masks = self._annotations[task_id][other]
+            if idx < position:
+                self._apply(other_masks, masks, other, annotator_id, sign)
+            else:
+                self._apply(masks, other_masks, annotator_id, other, sign)
+
+    def add_annotation(self, annotation: Annotation, task_id: Optional[str] = None) -> bool:
+        """
+        Add one annotator's annotation of a task (keyed by task_id, defaulting to
+        annotation.task_id), replacing their previous one. Returns False if it is
+        unchanged, in which case nothing is updated.
+        """
+        task_id = task_id if task_id is not None else annotation.task_id
+        masks = self._encode(annotation)
+        previous = self._annotations.get(task_id, {}).get(annotation.annotator_id)
+        if previous == masks:
+            return False
+        if previous is not None:
+            self._apply_task(task_id, annotation.annotator_id, previous, -1)
+            self._annotations[task_id][annotation.annotator_id] = masks
+        else:
+            self._annotations.setdefault(task_id, {})[annotation.annotator_id] = masks
+        self._apply_task(task_id, annotation.annotator_id, masks, 1)
+        return True
+
+    def retract_annotation(self, task_id: str, annotator_id: str) -> bool:
+        """Remove one annotator's annotation of a task. Returns False if there was none."""
+        masks = self._annotations.get(task_id, {}).get(annotator_id)
+        if masks is None:
+            return False
+        self._apply_task(task_id, annotator_id, masks, -1)
+        del self._annotations[task_id][annotator_id]
+        if not self._annotations[task_id]:
+            del self._annotations[task_id]
+        return True
+
+    def replace_annotator(self, annotator_id: str, annotations: Mapping[str, Annotation]) -> int:
+        """
+        Re-import one annotator's export, given as task key -> annotation (e.g. one
+        annotator's entry of get_latest_annotations, without timestamps). Tasks missing
+        from it are retracted; unchanged annotations are skipped. Returns the number of
+        annotations added, replaced or retracted.
+        """
+        changed = 0
+        for task_id, annotators in list(self._annotations.items()):
+            if annotator_id in annotators and task_id not in annotations:
+                changed += self.retract_annotation(task_id, annotator_id)
+        for task_id, annotation in annotations.items():
+            changed += self.add_annotation(annotation, task_id)
+        return changed
+
+    def cells(self) -> Dict[CellKey, CellTotals]:
+        """Totals of every (category, turn, annotator1, annotator2) cell with at least one comparison."""
+        return self._cells
+
+    def turn_scores(self) -> Dict[AnnotationCategory, Dict[int, float]]:
+        """Mean F1 per category and turn over every annotator pair."""
+        sums: Dict[Tuple[AnnotationCategory, int], List[float]] = {}
+        for (category, turn_idx, _, _), totals in self._cells.items():
+            entry = sums.setdefault((category, turn_idx), [0.0, 0])
+            entry[0] += totals.f1_sum
+            entry[1] += totals.count
+        scores: Dict[AnnotationCategory, Dict[int, float]] = {}
+        for (category, turn_idx), (f1_sum, count) in sorted(sums.items(), key=lambda item: (CATEGORY_INDEX[item[0][0]], item[0][1])):
+            scores.setdefault(category, {})[turn_idx] = f1_sum / count
+        return scores
+
+    def counts(self) -> AgreementCounts:
+        """Pair-level counts with turns folded together, e.g. to merge with other shards."""
+        counts = AgreementCounts()
+        for (category, _, annotator1, annotator2), totals in self._cells.items():
+            counts.add((annotator1, annotator2, category), totals.tp, totals.fp, totals.fn, totals.count, totals.f1_sum)
+        return counts
+
+    def micro_f1(self) -> Dict[AnnotationCategory, float]:
+        """Label-level F1 per category from the pooled TP/FP/FN counts."""
+        counts: Dict[AnnotationCategory, List[int]] = {}
+        for (category, _, _, _), totals in self._cells.items():
+            entry = counts.setdefault(category, [0, 0, 0])
+            entry[0] += totals.tp
+            entry[1] += totals.fp
+            entry[2] += totals.fn
+        return {
+            category: 2 * tp / (2 * tp + fp + fn) if tp + fp + fn else 1.0
+            for category, (tp, fp, fn) in counts.items()
+        }
+
+    def to_dict(self) -> dict:
+        """JSON-serializable state; label bitmasks are stored with the vocabulary that decodes them."""
+        return {
+            'version': ACCUMULATOR_VERSION,
+            'labels': {category.value: labels for category, labels in self.vocab.labels.items()},
+            'annotations': {
+                task_id: {
+                    annotator_id: {
+                        str(turn_idx): {category.value: mask for category, mask in turn.items()}
+                        for turn_idx, turn in masks.items()
+                    }
+                    for annotator_id, masks in annotators.items()
+                }
+                for task_id, annotators in self._annotations.items()
+            },
+            'cells': [
+                [category.value, turn_idx, annotator1, annotator2, *totals.as_list()]
+                for (category, turn_idx, annotator1, annotator2), totals in self._cells.items()
+            ]
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'AgreementAccumulator':
+        if data.get('version') != ACCUMULATOR_VERSION:
+            raise ValueError(f"Unsupported accumulator state version: {data.get('version')}")
+        vocab = LabelVocabulary()
+        for category, labels in data['labels'].items():
+            for label in labels:
+                vocab.bit(AnnotationCategory(category), label)
+        accumulator = cls(vocab)
+        for task_id, annotators in data['annotations'].items():
+            accumulator._annotations[task_id] = {
+                annotator_id: {
+                    int(turn_idx): {AnnotationCategory(category): mask for category, mask in turn.items()}
+                    for turn_idx, turn in masks.items()
+                }
+                for annotator_id, masks in annotators.items()
+            }
+        for category, turn_idx, annotator1, annotator2, *totals in data['cells']:
+            accumulator._cells[(AnnotationCategory(category), turn_idx, annotator1, annotator2)] = CellTotals(*totals)
+        return accumulator
+
+    def save(self, path: str):
+        """Write the state to path atomically."""
+        _atomic_write(Path(path), json.dumps(self.to_dict()).encode('utf-8'))
+
+    @classmethod
+    def load(cls, path: str) -> 'AgreementAccumulator':
+        with open(path, 'r') as f:
+            return cls.from_dict(json.load(f))
@@ -1,27 +1,153 @@
-from typing import Dict, List, Set, Tuple, Optional
+from typing import Dict, List, Literal, NamedTuple, Set, Tuple, Optional, Union, overload
 from collections import defaultdict
+from itertools import combinations
+
+import numpy as np
 
 from .types import (
     Task, AnnotationCategory, AgreementScore, TurnAnnotation,
-    DisagreementExample
+    DisagreementExample, turn_text
 )
+from .vocab import popcount
+from .frame import AnnotationFrame
+from .bitset import CellBitsets, annotation_pairs, cell_pairs, decode_bitset, f1_scores, pack_cells, popcount_rows, smallest_per_group
+
+# Cells scoring below this are reported as significant disagreements
+DISAGREEMENT_THRESHOLD = 0.5
+
+# Ways calculate_agreement_scores can aggregate turns into overall scores
+OVERALL_MODES = ('union', 'micro', 'macro')
+
+# What calculate_agreement_scores returns, without and with return_counts
+AgreementScores = Tuple[
+    Dict[AnnotationCategory, Dict[int, List[AgreementScore]]],  # Per-turn scores
+    Dict[AnnotationCategory, List[AgreementScore]],  # Overall scores
+    List[DisagreementExample]  # Major disagreement examples
+]
+CountedAgreementScores = Tuple[
+    Dict[AnnotationCategory, Dict[int, List[AgreementScore]]],
+    Dict[AnnotationCategory, List[AgreementScore]],
+    List[DisagreementExample],
+    Dict[AnnotationCategory, int]  # Cells below the disagreement threshold per category
+]
 
-def calculate_f1_score(set1: Set[str], set2: Set[str]) -> float:
-    """Calculate F1 score between two sets of annotations."""
+def calculate_f1_score(set1: Union[Set[str], int], set2: Union[Set[str], int]) -> float:
+    """Calculate F1 score between two sets of annotations, given as sets or vocabulary bitmasks."""
     if not set1 and not set2:  # Both empty
         return 1.0
     if not set1 or not set2:  # One empty
         return 0.0
-        
-    intersection = len(set1.intersection(set2))
-    precision = intersection / len(set1)
-    recall = intersection / len(set2)
+
+    if isinstance(set1, int):
+        intersection = popcount(set1 & set2)
+        precision = intersection / popcount(set1)
+        recall = intersection / popcount(set2)
+    else:
+        intersection = len(set1.intersection(set2))
+        precision = intersection / len(set1)
+        recall = intersection / len(set2)
     
     if precision + recall == 0:
         return 0.0
     
     return 2 * (precision * recall) / (precision + recall)
 
+# Key of pair-level counts: (annotator1, annotator2, category)
+PairKey = Tuple[str, str, AnnotationCategory]
+
+class AgreementCounts:
+    """
+    Label-level TP/FP/FN counts, number of compared cells and sum of per-cell F1 for
+    each (annotator1, annotator2, category), treating annotator1 as the reference.
+    Each key holds five numbers however many labels the pair used, and counts from
+    different shards of a round combine exactly with merge() or +.
+    """
+
+    def __init__(self, counts: Optional[Dict[PairKey, List[float]]] = None):
+        self.counts: Dict[PairKey, List[float]] = counts if counts is not None else {}
+
+    def add(self, key: PairKey, tp: int, fp: int, fn: int, cells: int = 1, f1_sum: float = 0.0):
+        entry = self.counts.get(key)
+        if entry is None:
+            self.counts[key] = [tp, fp, fn, cells, f1_sum]
+        else:
+            entry[0] += tp
+            entry[1] += fp
+            entry[2] += fn
+            entry[3] += cells
+            entry[4] += f1_sum
+
+    def merge(self, other: 'AgreementCounts') -> 'AgreementCounts':
+        """Add another shard's counts into this one."""
+        for key, values in other.counts.items():
+            self.add(key, *values)
+        return self
+
+    def __add__(self, other: 'AgreementCounts') -> 'AgreementCounts':
+        return AgreementCounts().merge(self).merge(other)
+
+    def micro_f1(self) -> Dict[PairKey, float]:
+        """F1 of the pooled label counts, 2TP / (2TP + FP + FN); 1.0 when neither chose anything."""
+        return {
+            key: 2 * tp / (2 * tp + fp + fn) if tp + fp + fn else 1.0
+            for key, (tp, fp, fn, _, _) in self.counts.items()
+        }
+
+    def macro_f1(self) -> Dict[PairKey, float]:
+        """Mean of the per-cell F1 scores."""
+        return {key: f1_sum / cells for key, (_, _, _, cells, f1_sum) in self.counts.items() if cells}
+
+    def to_dict(self) -> dict:
+        return {'counts': [[a1, a2, category.value, *values] for (a1, a2, category), values in self.counts.items()]}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'AgreementCounts':
+        return cls({
+            (a1, a2, AnnotationCategory(category)): list(values)
+            for a1, a2, category, *values in data['counts']
+        })
+
+    @classmethod
+    def from_frame(cls, frame: 'AnnotationFrame', pairs: Optional['ScoredPairs'] = None) -> 'AgreementCounts':
+        """Counts of every compared cell pair of a frame (scored as pairs, if given)."""
+        return cls.from_pairs(frame, *(pairs if pairs is not None else score_cell_pairs(frame)))
+
+    @classmethod
+    def from_pairs(
+        cls,
+        frame: 'AnnotationFrame',
+        cells: CellBitsets,
+        first: np.ndarray,
+        second: np.ndarray,
+        f1: np.ndarray
+    ) -> 'AgreementCounts':
+        """Counts of scored cell pairs (as returned by score_cell_pairs), summed per key with np.bincount."""
+        counts = cls()
+        if not len(first):
+            return counts
+        words1, words2 = cells.words[first], cells.words[second]
+        n_annotators, n_categories = len(frame.annotator_ids), len(frame.categories)
+        key = (
+            frame.annotation_annotator[cells.annotation[first]].astype(np.int64) * n_annotators
+            + frame.annotation_annotator[cells.annotation[second]]
+        ) * n_categories + cells.category[first]
+        keys, group = np.unique(key, return_inverse=True)
+        group = group.reshape(-1)
+        totals = [
+            np.bincount(group, weights=values, minlength=len(keys))
+            for values in (
+                popcount_rows(words1 & words2), popcount_rows(words2 & ~words1), popcount_rows(words1 & ~words2),
+                np.ones(len(first)), f1
+            )
+        ]
+        for k, tp, fp, fn, n, f1_sum in zip(keys.tolist(), *[t.tolist() for t in totals]):
+            pair, category_idx = divmod(k, n_categories)
+            a1, a2 = divmod(pair, n_annotators)
+            counts.counts[(frame.annotator_ids[a1], frame.annotator_ids[a2], frame.categories[category_idx])] = [
+                int(tp), int(fp), int(fn), int(n), f1_sum
+            ]
+        return counts
+
 def find_disagreement_examples(set1: Set[str], set2: Set[str]) -> List[str]:
     """Find examples of disagreements between two sets."""
     # Items in set1 but not in set2
@@ -75,128 +201,238 @@ def get_applicable_categories(is_response: bool) -> List[AnnotationCategory]:
 
 def get_turn_text(task: Task, turn_idx: int) -> str:
     """Extract the conversation text for a specific turn."""
-    conversation = task.original_data.get("data", {}).get("conversation", task.original_data.get("conversation", []))
-    if not conversation or turn_idx >= len(conversation):
-        return "Text not available"
-    return conversation[turn_idx].get('text', "Text not available")
+    return turn_text(task.original_data, turn_idx)
+
+def role_category_indices(categories: List[AnnotationCategory]) -> List[List[int]]:
+    """Indices into categories of the categories that apply to prompts (row 0) and responses (row 1)."""
+    return [
+        [categories.index(category) for category in get_applicable_categories(is_response)]
+        for is_response in (False, True)
+    ]
+
+def rater_pairs(tasks: List[Task]) -> List[Tuple[str, str]]:
+    """Distinct (annotator, annotator) pairs that rated a task together, in first-seen order."""
+    pairs = {}
+    for task in tasks:
+        for ann1, ann2 in combinations(task.annotations, 2):
+            pairs.setdefault((ann1.annotator_id, ann2.annotator_id), None)
+    return list(pairs)
+
+def _objects(values: list) -> np.ndarray:
+    """1-D object array of values, without NumPy unpacking tuples or lists into extra dimensions."""
+    array = np.empty(len(values), dtype=object)
+    for idx, value in enumerate(values):
+        array[idx] = value
+    return array
+
+class ScoredPairs(NamedTuple):
+    """Packed cells, the (first, second) cell index arrays in cell_pairs order, and the F1 of each pair."""
+    cells: CellBitsets
+    first: np.ndarray
+    second: np.ndarray
+    f1: np.ndarray
+
+def score_cell_pairs(frame: AnnotationFrame) -> ScoredPairs:
+    """
+    F1 of every pair of cells two raters of the same task have for the same turn and
+    category. Scoring is the costly step shared by every agreement measure, so callers
+    that need several of them score once and pass the result on as `pairs`.
+    """
+    cells = pack_cells(frame, role_category_indices(frame.categories))
+    # Every pair of raters of a task is compared, however many rated it
+    first, second = cell_pairs(cells)
+    return ScoredPairs(cells, first, second, f1_scores(cells.words[first], cells.words[second]))
+
+class CellScores(NamedTuple):
+    """
+    F1 of every compared (task, turn, category, annotator pair) cell as parallel
+    columns; integer columns index into the frame's string tables.
+    """
+    task: np.ndarray  # index into task_ids
+    turn: np.ndarray  # 0-based message index
+    category: np.ndarray  # index into categories
+    annotator1: np.ndarray  # index into annotator_ids
+    annotator2: np.ndarray
+    f1_score: np.ndarray
 
+def cell_scores(frame: AnnotationFrame, pairs: Optional[ScoredPairs] = None) -> CellScores:
+    """Per-cell scores in cell_pairs order, the rows behind every per-turn score."""
+    cells, first, second, f1 = pairs if pairs is not None else score_cell_pairs(frame)
+    return CellScores(
+        task=frame.annotation_task[cells.annotation[first]],
+        turn=cells.turn[first],
+        category=cells.category[first],
+        annotator1=frame.annotation_annotator[cells.annotation[first]],
+        annotator2=frame.annotation_annotator[cells.annotation[second]],
+        f1_score=f1
+    )
+
+@overload
 def calculate_agreement_scores(
     tasks: List[Task],
-    disagreement_threshold: float = 0.5  # Only collect examples for scores below this
-) -> Tuple[
-    Dict[AnnotationCategory, Dict[int, List[AgreementScore]]],  # Per-turn scores
-    Dict[AnnotationCategory, List[AgreementScore]],  # Overall scores
-    List[DisagreementExample]  # Major disagreement examples
-]:
-    """Calculate agreement scores for all categories, both per-turn and overall."""
-    # Initialize score containers
+    disagreement_threshold: float = ...,
+    frame: Optional[AnnotationFrame] = ...,
+    max_examples_per_category: Optional[int] = ...,
+    overall: str = ...,
+    pairs: Optional[ScoredPairs] = ...,
+    return_counts: Literal[False] = ...
+) -> AgreementScores: ...
+
+@overload
+def calculate_agreement_scores(
+    tasks: List[Task],
+    disagreement_threshold: float = ...,
+    frame: Optional[AnnotationFrame] = ...,
+    max_examples_per_category: Optional[int] = ...,
+    overall: str = ...,
+    pairs: Optional[ScoredPairs] = ...,
+    *,
+    return_counts: Literal[True]
+) -> CountedAgreementScores: ...
+
+def calculate_agreement_scores(
+    tasks: List[Task],
+    disagreement_threshold: float = DISAGREEMENT_THRESHOLD,  # Only collect examples for scores below this
+    frame: Optional[AnnotationFrame] = None,
+    max_examples_per_category: Optional[int] = 100,  # Worst examples kept per category; None keeps all
+    overall: str = 'union',  # How overall scores aggregate turns: 'union', 'micro' or 'macro'
+    pairs: Optional[ScoredPairs] = None,  # score_cell_pairs(frame), if already computed
+    return_counts: bool = False  # Also return the number of cells below the threshold per category
+) -> Union[AgreementScores, CountedAgreementScores]:
+    """
+    Calculate agreement scores for all categories, both per-turn and overall.
+    Returns (scores_by_category, overall_scores, disagreement_examples), plus
+    disagreement_counts as a fourth item when return_counts is set.
+
+    Every (task, turn, category, annotator) label set is packed into a bitset and all
+    F1 scores are computed at once with vectorized popcounts; Python only builds the
+    result records. A task rated by n annotators contributes a score for each of its
+    n * (n - 1) / 2 rater pairs. frame may be passed if one was already built from tasks,
+    and pairs if its cell pairs were already scored.
+
+    Disagreement examples are the max_examples_per_category lowest-scoring cells of
+    each category below disagreement_threshold, ordered worst first. With
+    return_counts, a fourth value maps each scored category to its number of cells
+    below the threshold, including those without a kept example.
+
+    Overall scores per (annotator pair, category) are, by `overall`:
+    - 'union': F1 of the union of the labels each annotator used on any turn
+    - 'micro': F1 of the label TP/FP/FN counts pooled over turns (see AgreementCounts)
+    - 'macro': the mean of the per-turn F1 scores
+    """
+    if overall not in OVERALL_MODES:
+        raise ValueError(f"Unknown overall aggregation {overall!r}, expected one of {OVERALL_MODES}")
     scores_by_category: Dict[AnnotationCategory, Dict[int, List[AgreementScore]]] = defaultdict(lambda: defaultdict(list))
     overall_scores: Dict[AnnotationCategory, List[AgreementScore]] = defaultdict(list)
     disagreement_examples: List[DisagreementExample] = []
-    
-    # Track cumulative values for overall scores, separate for each annotator
-    cumulative_values: Dict[str, Dict[str, Dict[AnnotationCategory, Set[str]]]] = {}
-    
-    for task in tasks:
-        if len(task.annotations) != 2:
-            continue
-            
-        ann1, ann2 = task.annotations[0], task.annotations[1]
-        annotator_pair = (ann1.annotator_id, ann2.annotator_id)
-        pair_key = f"{ann1.annotator_id}_{ann2.annotator_id}"
-        
-        if pair_key not in cumulative_values:
-            cumulative_values[pair_key] = {
-                ann1.annotator_id: defaultdict(set),
-                ann2.annotator_id: defaultdict(set)
-            }
-        
-        # Get all unique turn indices
-        all_turns = set(ann1.turns.keys()).union(set(ann2.turns.keys()))
-        
-        for turn_idx in all_turns:
-            # Skip if either annotator doesn't have this turn
-            if turn_idx not in ann1.turns or turn_idx not in ann2.turns:
-                continue
-                
-            turn1 = ann1.turns[turn_idx]
-            turn2 = ann2.turns[turn_idx]
-            
-            # Get applicable categories for this turn
-            is_response = turn_idx % 2 == 1
-            categories = get_applicable_categories(is_response)
-            
-            # Calculate agreement for each applicable category
-            for category in categories:
-                values1 = get_category_values(turn1, category)
-                values2 = get_category_values(turn2, category)
-                
-                if values1 is None or values2 is None:
-                    continue
-                
-                # Calculate per-turn agreement
-                f1 = calculate_f1_score(values1, values2)
-                disagreements = find_disagreement_examples(values1, values2) if f1 < 1.0 else None
-                
-                score = AgreementScore(
-                    category=category,
-                    turn_idx=turn_idx,
-                    f1_score=f1,
-                    annotator_pair=annotator_pair,
-                    disagreement_examples=disagreements
-                )
-                
-                scores_by_category[category][turn_idx].append(score)
-                
-                # Collect disagreement examples if score is below threshold
-                if f1 < disagreement_threshold:
-                    example = DisagreementExample(
-                        task_id=task.task_id,
-                        turn_idx=turn_idx,
-                        category=category,
-                        annotator1_id=ann1.annotator_id,
-                        annotator2_id=ann2.annotator_id,
-                        annotator1_values=values1,
-                        annotator2_values=values2,
-                        conversation_text=get_turn_text(task, turn_idx),
-                        f1_score=f1
+
+    if frame is None:
+        frame = AnnotationFrame.from_tasks(tasks)
+    categories = frame.categories
+    cells, first, second, f1 = pairs if pairs is not None else score_cell_pairs(frame)
+
+    annotator1 = frame.annotation_annotator[cells.annotation[first]]
+    annotator2 = frame.annotation_annotator[cells.annotation[second]]
+    task_idx = frame.annotation_task[cells.annotation[first]]
+
+    # Label sets are only decoded for disagreeing pairs, and each distinct disagreement once
+    n_pairs, n_annotators = len(first), len(frame.annotator_ids)
+    disagreeing = np.flatnonzero(f1 < 1.0)
+    decoded, distinct_of = cells.decode_pairs(first[disagreeing], second[disagreeing])
+    distinct = np.full(n_pairs, -1, dtype=np.int64)
+    distinct[disagreeing] = distinct_of
+    described = np.full(n_pairs, None, dtype=object)
+    described[disagreeing] = _objects([find_disagreement_examples(*values) for values in decoded])[distinct_of]
+
+    # Build every per-turn score in one pass, then slice them into (category, turn) lists
+    pair_code = annotator1.astype(np.int64) * n_annotators + annotator2
+    pair_codes, pair_of = np.unique(pair_code, return_inverse=True)
+    annotator_pairs = _objects([
+        (frame.annotator_ids[code // n_annotators], frame.annotator_ids[code % n_annotators])
+        for code in pair_codes.tolist()
+    ])[pair_of.reshape(-1)]
+    category_of = _objects(categories)[cells.category[first]]
+    turn_of = cells.turn[first].astype(np.int64)
+    f1_of = f1.tolist()
+    scores = list(map(AgreementScore, category_of.tolist(), turn_of.tolist(), f1_of, annotator_pairs.tolist(), described.tolist()))
+
+    cell_key = cells.category[first].astype(np.int64) * (int(turn_of.max()) + 1 if n_pairs else 1) + turn_of
+    order = np.argsort(cell_key, kind='stable')
+    _, key_start, key_count = np.unique(cell_key[order], return_index=True, return_counts=True)
+    first_seen = order[key_start]
+    ordered = [scores[idx] for idx in order.tolist()]
+    for g in np.argsort(first_seen, kind='stable').tolist():
+        i = int(first_seen[g])
+        start, count = int(key_start[g]), int(key_count[g])
+        scores_by_category[category_of[i]][int(turn_of[i])] = ordered[start:start + count]
+
+    # Keep the worst disagreement examples of each category below the threshold, worst first.
+    # Conversation text is not copied; examples look it up when rendered
+    below = np.flatnonzero(f1 < disagreement_threshold)
+    below_category = cells.category[first[below]]
+    below_counts = np.bincount(below_category, minlength=len(categories)).tolist()
+    below = below[smallest_per_group(f1[below], below_category, max_examples_per_category)]
+    for idx, task_pos, turn_idx, distinct_idx in zip(below.tolist(), task_idx[below].tolist(), turn_of[below].tolist(), distinct[below].tolist()):
+        task = tasks[task_pos]
+        values1, values2 = decoded[distinct_idx]
+        disagreement_examples.append(DisagreementExample(
+            task_id=task.task_id,
+            turn_idx=turn_idx,
+            category=category_of[idx],
+            annotator1_id=annotator_pairs[idx][0],
+            annotator2_id=annotator_pairs[idx][1],
+            annotator1_values=set(values1),
+            annotator2_values=set(values2),
+            task_data=task.original_data,
+            f1_score=f1_of[idx]
+        ))
+
+    # Overall scores: union each annotator's labels per (annotator pair, category)
+    if len(first):
+        n_annotators, n_categories = len(frame.annotator_ids), len(categories)
+        pair_key = annotator1.astype(np.int64) * n_annotators + annotator2
+        groups, group_of = np.unique(pair_key * n_categories + cells.category[first], return_inverse=True)
+        order = np.argsort(group_of.reshape(-1), kind='stable')
+        bounds = np.searchsorted(group_of.reshape(-1)[order], np.arange(len(groups)))
+        if overall == 'union':
+            union1 = np.bitwise_or.reduceat(cells.words[first[order]], bounds, axis=0)
+            union2 = np.bitwise_or.reduceat(cells.words[second[order]], bounds, axis=0)
+            overall_f1 = f1_scores(union1, union2).tolist()
+        else:
+            counts = AgreementCounts.from_pairs(frame, cells, first, second, f1)
+            by_key = counts.micro_f1() if overall == 'micro' else counts.macro_f1()
+
+        # Annotator pairs in the order they first annotate a task together
+        ann1, ann2 = annotation_pairs(frame)
+        task_pairs = frame.annotation_annotator[ann1].astype(np.int64) * n_annotators + frame.annotation_annotator[ann2]
+        known_pairs, pair_first = np.unique(task_pairs, return_index=True)
+        group_pair_first = pair_first[np.searchsorted(known_pairs, groups // n_categories)]
+
+        for g in np.argsort(group_pair_first, kind='stable').tolist():
+            category = categories[groups[g] % n_categories]
+            a1, a2 = divmod(int(groups[g] // n_categories), n_annotators)
+            annotator_pair = (frame.annotator_ids[a1], frame.annotator_ids[a2])
+            disagreements = None
+            if overall != 'union':
+                score = by_key[(*annotator_pair, category)]
+            else:
+                score = overall_f1[g]
+                if score < 1.0:
+                    disagreements = find_disagreement_examples(
+                        decode_bitset(cells.vocab, category, union1[g]),
+                        decode_bitset(cells.vocab, category, union2[g])
                     )
-                    disagreement_examples.append(example)
-                
-                # Accumulate values for overall agreement, separate for each annotator
-                cumulative_values[pair_key][ann1.annotator_id][category].update(values1)
-                cumulative_values[pair_key][ann2.annotator_id][category].update(values2)
-                
-    # Calculate overall agreement scores
-    for pair_key, annotator_values in cumulative_values.items():
-        annotator1, annotator2 = pair_key.split('_')
-        annotator_pair = (annotator1, annotator2)
-        
-        # Get the cumulative sets for each annotator
-        values1_by_category = annotator_values[annotator1]
-        values2_by_category = annotator_values[annotator2]
-        
-        # Calculate agreement for each category
-        for category in set(values1_by_category.keys()).union(values2_by_category.keys()):
-            values1 = values1_by_category[category]
-            values2 = values2_by_category[category]
-            
-            f1 = calculate_f1_score(values1, values2)
-            disagreements = find_disagreement_examples(values1, values2) if f1 < 1.0 else None
-            
-            score = AgreementScore(
+            overall_scores[category].append(AgreementScore(
                 category=category,
                 turn_idx=-1,  # Use -1 to indicate this is an overall score
-                f1_score=f1,
+                f1_score=score,
                 annotator_pair=annotator_pair,
                 disagreement_examples=disagreements
-            )
-            
-            overall_scores[category].append(score)
-    
-    # Sort disagreement examples by f1_score ascending (worst disagreements first)
-    disagreement_examples.sort(key=lambda x: x.f1_score)
-    
+            ))
+
+    if return_counts:
+        disagreement_counts = {category: below_counts[categories.index(category)] for category in scores_by_category}
+        return scores_by_category, overall_scores, disagreement_examples, disagreement_counts
     return scores_by_category, overall_scores, disagreement_examples
 
 def find_lowest_agreement_categories(
@@ -0,0 +1,131 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .types import AlphaScore, AnnotationCategory, Task
+from .agreement import ScoredPairs, role_category_indices
+from .frame import AnnotationFrame
+from .bitset import CellBitsets, cell_pairs, pack_cells, popcount_rows
+
+DISTANCES = ('masi', 'jaccard')
+
+# Cap on the (rows, values, words) block compared at once when building distance matrices
+_BLOCK_ELEMENTS = 1 << 22
+
+def set_distance_matrix(words1: np.ndarray, words2: np.ndarray, distance: str = 'masi') -> np.ndarray:
+    """
+    Distance between every row of words1 and every row of words2, both label bitsets
+    of shape (n, n_words). 'jaccard' is 1 - |A & B| / |A | B|; 'masi' scales the
+    Jaccard index by 1 for equal sets, 2/3 for subsets, 1/3 for other overlapping sets
+    and 0 for disjoint ones (Passonneau, 2006). Two empty sets are at distance 0.
+    """
+    if distance not in DISTANCES:
+        raise ValueError(f"Unknown set distance {distance!r}, expected one of {DISTANCES}")
+    a, b = words1[:, None, :], words2[None, :, :]
+    intersection = popcount_rows(a & b)
+    union = popcount_rows(a | b)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        jaccard = np.where(union > 0, intersection / union, 1.0)
+    if distance == 'jaccard':
+        return 1.0 - jaccard
+
+    size1 = popcount_rows(words1)[:, None]
+    size2 = popcount_rows(words2)[None, :]
+    monotonicity = np.select(
+        [intersection == union, (intersection == size1) | (intersection == size2), intersection > 0],
+        [1.0, 2 / 3, 1 / 3],
+        0.0
+    )
+    return 1.0 - jaccard * monotonicity
+
+def coincidence_matrix(value: np.ndarray, first: np.ndarray, second: np.ndarray, unit_size: np.ndarray, n_values: int) -> np.ndarray:
+    """
+    Krippendorff's coincidence matrix from pairable values: value[i] is the distinct
+    value index of cell i, (first, second) every pair of cells in the same unit and
+    unit_size the number of values in the pair's unit. Each ordered pair adds
+    1 / (unit_size - 1), so row sums give the number of times each value was used.
+    """
+    weight = 1.0 / (unit_size - 1)
+    pairs = np.concatenate([value[first] * n_values + value[second], value[second] * n_values + value[first]])
+    counts = np.bincount(pairs, weights=np.concatenate([weight, weight]), minlength=n_values * n_values)
+    return counts.reshape(n_values, n_values)
+
+def _weighted_distance(left: np.ndarray, words: np.ndarray, right: np.ndarray, distance: str) -> float:
+    """Sum over k, l of left[k, l] * right[k, l] * distance(k, l), one block of rows at a time."""
+    n_values, n_words = words.shape
+    block = max(1, _BLOCK_ELEMENTS // max(n_values * n_words, 1))
+    total = 0.0
+    for start in range(0, n_values, block):
+        rows = slice(start, start + block)
+        total += float((left[rows] * right[rows] * set_distance_matrix(words[rows], words, distance)).sum())
+    return total
+
+def _category_alpha(
+    cells: CellBitsets,
+    first: np.ndarray,
+    second: np.ndarray,
+    unit: np.ndarray,
+    unit_counts: np.ndarray,
+    category: AnnotationCategory,
+    distance: str
+) -> AlphaScore:
+    """Alpha of one category from the pairs of its cells; unit[i] is the unit of pair i."""
+    if not len(first):
+        return AlphaScore(category, float('nan'), 0.0, 0.0, 0, 0)
+    pairable = np.unique(np.concatenate([first, second]))
+    distinct, value_of = np.unique(cells.words[pairable], axis=0, return_inverse=True)
+    value = np.zeros(len(cells), dtype=np.int64)
+    value[pairable] = value_of.reshape(-1)
+
+    coincidences = coincidence_matrix(value, first, second, unit_counts[unit], len(distinct))
+    value_counts = coincidences.sum(axis=1)
+    n = value_counts.sum()
+
+    observed = _weighted_distance(coincidences, distinct, np.ones_like(coincidences), distance) / n
+    expected = _weighted_distance(value_counts[:, None], distinct, value_counts[None, :], distance) / (n * (n - 1))
+    alpha = 1.0 - observed / expected if expected > 0 else float('nan')
+    return AlphaScore(category, float(alpha), float(observed), float(expected), len(np.unique(unit)), len(pairable))
+
+def krippendorff_alpha(
+    tasks: List[Task],
+    distance: str = 'masi',
+    frame: Optional[AnnotationFrame] = None,
+    pairs: Optional[ScoredPairs] = None
+) -> Dict[AnnotationCategory, AlphaScore]:
+    """
+    Krippendorff's alpha of each category, treating every (task, turn) as a unit and
+    each annotator's label set as its value, compared with a set distance ('masi' or
+    'jaccard'). Annotators who didn't label a turn are missing from that unit, and
+    units with fewer than two values are left out, so any number of raters works.
+    pairs may be passed if the frame's cell pairs were already scored; only the cells
+    and pair indices are used.
+    """
+    if distance not in DISTANCES:
+        raise ValueError(f"Unknown set distance {distance!r}, expected one of {DISTANCES}")
+    if frame is None:
+        frame = AnnotationFrame.from_tasks(tasks)
+    categories = frame.categories
+    per_role = role_category_indices(categories)
+    if pairs is not None:
+        cells, first, second, _ = pairs
+    else:
+        cells = pack_cells(frame, per_role)
+        first, second = cell_pairs(cells)
+
+    # Values per unit, for the pair weights
+    task = frame.annotation_task[cells.annotation].astype(np.int64)
+    n_turns = int(cells.turn.max()) + 1 if len(cells) else 1
+    unit_key = (task * n_turns + cells.turn) * len(categories) + cells.category
+    _, unit_of, unit_counts = np.unique(unit_key, return_inverse=True, return_counts=True)
+    unit_of = unit_of.reshape(-1)
+
+    scores = {}
+    pair_category = cells.category[first]
+    for category_idx, category in enumerate(categories):
+        if not any(category_idx in role for role in per_role):
+            continue
+        selected = pair_category == category_idx
+        scores[category] = _category_alpha(
+            cells, first[selected], second[selected], unit_of[first[selected]], unit_counts, category, distance
+        )
+    return scores
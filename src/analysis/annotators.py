@@ -0,0 +1,55 @@
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+from .types import AnnotationCategory, Task
+from .agreement import ScoredPairs, score_cell_pairs
+from .frame import AnnotationFrame
+
+class AnnotatorMatrix(NamedTuple):
+    """Annotator-by-annotator agreement for one category; rows and columns follow annotators."""
+    category: AnnotationCategory
+    annotators: List[str]
+    agreement: np.ndarray  # (n, n) mean F1 over the cells both rated; nan where they never overlap
+    overlap: np.ndarray  # (n, n) int64 number of cells both rated; the diagonal is 0
+
+def annotator_matrices(
+    tasks: List[Task],
+    frame: Optional[AnnotationFrame] = None,
+    pairs: Optional[ScoredPairs] = None
+) -> Dict[AnnotationCategory, AnnotatorMatrix]:
+    """
+    Mean F1 and overlap count of every annotator pair in each category, from the
+    per-cell score array: scores are summed per (category, annotator, annotator) key
+    with np.bincount, then folded so the matrices are symmetric. pairs may be passed if
+    the frame's cell pairs were already scored.
+    """
+    if frame is None:
+        frame = AnnotationFrame.from_tasks(tasks)
+    cells, first, second, f1 = pairs if pairs is not None else score_cell_pairs(frame)
+    annotators = frame.annotator_ids
+    n_annotators, n_categories = len(annotators), len(frame.categories)
+    if not len(first):
+        return {}
+
+    annotator1 = frame.annotation_annotator[cells.annotation[first]].astype(np.int64)
+    annotator2 = frame.annotation_annotator[cells.annotation[second]].astype(np.int64)
+    key = (cells.category[first].astype(np.int64) * n_annotators + annotator1) * n_annotators + annotator2
+    size = n_categories * n_annotators * n_annotators
+    shape = (n_categories, n_annotators, n_annotators)
+    sums = np.bincount(key, weights=f1, minlength=size).reshape(shape)
+    counts = np.bincount(key, minlength=size).reshape(shape)
+    # Pair order only reflects which annotation came first
+    sums = sums + sums.transpose(0, 2, 1)
+    counts = counts + counts.transpose(0, 2, 1)
+    diagonal = np.arange(n_annotators)
+    counts[:, diagonal, diagonal] = 0  # An annotator is not compared with themselves
+    with np.errstate(divide='ignore', invalid='ignore'):
+        means = np.where(counts > 0, sums / counts, np.nan)
+
+    return {
+        frame.categories[category_idx]: AnnotatorMatrix(
+            frame.categories[category_idx], list(annotators), means[category_idx], counts[category_idx]
+        )
+        for category_idx in np.unique(cells.category[first]).tolist()
+    }
@@ -0,0 +1,233 @@
+import hashlib
+import json
+import os
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Set
+
+from .cache import DEFAULT_CACHE_DIR, _atomic_write
+from .fingerprint import FINGERPRINT_VERSION, task_fingerprint
+from .stream import ExportReader
+
+BATCH_DIR = "data/batches"
+
+# Batch number -> the rater it was assigned to
+BATCH_ASSIGNEES: Dict[int, str] = {
+    1: 'Ahmet',
+    2: 'Anka',
+    3: 'Cedric',
+    4: 'Zoey',
+    5: 'Megan',
+    6: 'Niloofar',
+    7: 'Shayne',
+    8: 'Victor',
+    9: 'Wenting',
+    10: 'Yuntian',
+    11: 'Zhiping',
+    12: 'ZSuperhero',
+}
+
+# Label Studio usernames / export names that differ from the rater's name
+ANNOTATOR_ALIASES: Dict[str, str] = {
+    'cedricwhitney': 'Cedric',
+    'dayeon': 'Zoey',
+    'advisor': 'ZSuperhero',
+}
+
+# Bump whenever the layout of an index entry changes
+CATALOG_VERSION = 1
+
+_BATCH_FILE = re.compile(r'^batch_(\d+)\.json$', re.IGNORECASE)
+_DISAGREEMENT_FILE = re.compile(r'^(?P<rater>[a-z]+)_rater_disagreement\.json$', re.IGNORECASE)
+
+def canonical_annotator(name: str) -> Optional[str]:
+    """Map an export or username to its rater name (e.g. 'cedricwhitney' -> 'Cedric')."""
+    key = name.strip().lower()
+    if key in ANNOTATOR_ALIASES:
+        return ANNOTATOR_ALIASES[key]
+    for assignee in BATCH_ASSIGNEES.values():
+        if assignee.lower() == key:
+            return assignee
+    return None
+
+class BatchFile(NamedTuple):
+    """Index entry for one task file in the batch directory."""
+    name: str
+    batch_num: Optional[int]  # None for files that aren't numbered batches
+    assignee: Optional[str]
+    size: int
+    mtime_ns: int
+    task_ids: List[str]  # Conversation ids ("conv_XXXX"), in file order
+    fingerprints: List[str]  # Conversation fingerprints, parallel to task_ids
+
+    @property
+    def display_name(self) -> str:
+        """File name with its assignee, as shown when picking a file to annotate."""
+        return f"{self.name} ({self.assignee})" if self.assignee else self.name
+
+def _describe(name: str):
+    """(batch number, assignee) implied by a batch directory file name."""
+    match = _BATCH_FILE.match(name)
+    if match:
+        batch_num = int(match.group(1))
+        return batch_num, BATCH_ASSIGNEES.get(batch_num)
+    match = _DISAGREEMENT_FILE.match(name)
+    if match:
+        return None, f"{match.group('rater').capitalize()} (Disagreement)"
+    return None, None
+
+def _task_id(task: dict) -> Optional[str]:
+    return task.get('id') or task.get('data', {}).get('conversation_id')
+
+class BatchCatalog:
+    """
+    Index of the task files in the batch directory: per-file metadata, conversation
+    ids and fingerprints, and who each batch is assigned to.
+
+    The index is built lazily and persisted in the cache directory, so files whose
+    size and mtime are unchanged are never re-read or re-hashed. Full task lists are
+    only loaded when asked for, and kept for the life of the catalog.
+    """
+
+    def __init__(self, batch_dir: str = BATCH_DIR, cache_dir: Optional[str] = DEFAULT_CACHE_DIR):
+        self.batch_dir = Path(batch_dir)
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self._files: Optional[Dict[str, BatchFile]] = None
+        self._batches: Optional[Dict[int, BatchFile]] = None
+        self._tasks: Dict[str, List[dict]] = {}
+        self._assignments: Optional[Dict[str, Set[str]]] = None
+
+    @property
+    def index_path(self) -> Optional[Path]:
+        if self.cache_dir is None:
+            return None
+        dir_hash = hashlib.blake2b(str(self.batch_dir.resolve()).encode('utf-8'), digest_size=8).hexdigest()
+        return self.cache_dir / f"batches-{dir_hash}.json"
+
+    def _load_index(self) -> Dict[str, dict]:
+        if self.index_path is None:
+            return {}
+        try:
+            with open(self.index_path, 'r') as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+        if data.get('version') != [CATALOG_VERSION, FINGERPRINT_VERSION]:
+            return {}
+        return data.get('files', {})
+
+    def _save_index(self):
+        if self.index_path is None:
+            return
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        payload = json.dumps({
+            'version': [CATALOG_VERSION, FINGERPRINT_VERSION],
+            'files': {name: entry._asdict() for name, entry in self._files.items()}
+        })
+        _atomic_write(self.index_path, payload.encode('utf-8'))
+
+    def _index_file(self, path: Path, stat: os.stat_result) -> BatchFile:
+        task_ids, fingerprints = [], []
+        try:
+            with ExportReader(str(path), prune=False) as reader:
+                for task in reader:
+                    task_ids.append(_task_id(task))
+                    fingerprints.append(task_fingerprint(task))
+        except json.JSONDecodeError as e:
+            # Keep the file listed (e.g. so it can still be picked and fixed), just without tasks
+            print(f"Warning: Failed to parse {path}: {e}")
+            task_ids, fingerprints = [], []
+        batch_num, assignee = _describe(path.name)
+        return BatchFile(path.name, batch_num, assignee, stat.st_size, stat.st_mtime_ns, task_ids, fingerprints)
+
+    def files(self) -> Dict[str, BatchFile]:
+        """Index entries of every task file, by file name."""
+        if self._files is not None:
+            return self._files
+        stored = self._load_index()
+        files: Dict[str, BatchFile] = {}
+        changed = False
+        paths = sorted(self.batch_dir.glob("*.json")) if self.batch_dir.is_dir() else []
+        for path in paths:
+            stat = path.stat()
+            entry = stored.get(path.name)
+            if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+                files[path.name] = BatchFile(**entry)
+                continue
+            files[path.name] = self._index_file(path, stat)
+            changed = True
+        self._files = files
+        if changed or set(stored) != set(files):
+            self._save_index()
+        return files
+
+    def batches(self) -> Dict[int, BatchFile]:
+        """Numbered batch files, by batch number."""
+        if self._batches is None:
+            numbered = [entry for entry in self.files().values() if entry.batch_num is not None]
+            self._batches = {entry.batch_num: entry for entry in sorted(numbered, key=lambda e: e.batch_num)}
+        return self._batches
+
+    def batch_for(self, annotator: str) -> Optional[int]:
+        """Batch number assigned to an annotator, given any of their names."""
+        assignee = canonical_annotator(annotator)
+        for batch_num, entry in self.batches().items():
+            if assignee is not None and entry.assignee == assignee:
+                return batch_num
+        return None
+
+    def assignments(self) -> Dict[str, Set[str]]:
+        """Conversation id -> raters whose batch contains it."""
+        if self._assignments is None:
+            assignments: Dict[str, Set[str]] = {}
+            for entry in self.batches().values():
+                if entry.assignee is None:
+                    continue
+                for task_id in entry.task_ids:
+                    if task_id:
+                        assignments.setdefault(task_id, set()).add(entry.assignee)
+            self._assignments = assignments
+        return self._assignments
+
+    def fingerprint_batches(self) -> Dict[str, List[int]]:
+        """Conversation fingerprint -> numbers of the batches containing it."""
+        batches: Dict[str, List[int]] = {}
+        for batch_num, entry in self.batches().items():
+            for fingerprint in entry.fingerprints:
+                batches.setdefault(fingerprint, []).append(batch_num)
+        return batches
+
+    def load_tasks(self, name: str) -> List[dict]:
+        """
+        Tasks of one file, tagged with '_batch_num' and '_conv_hash' from the index.
+        Loaded on first use; callers share the returned list.
+        """
+        if name not in self._tasks:
+            entry = self.files()[name]
+            path = self.batch_dir / name
+            stat = path.stat()
+            if (stat.st_size, stat.st_mtime_ns) != (entry.size, entry.mtime_ns):
+                # Changed since it was indexed
+                entry = self._files[name] = self._index_file(path, stat)
+                self._batches = self._assignments = None
+                self._save_index()
+            with open(path, 'r') as f:
+                tasks = json.load(f)
+            for task, fingerprint in zip(tasks, entry.fingerprints):
+                task['_batch_num'] = entry.batch_num
+                task['_conv_hash'] = fingerprint
+            self._tasks[name] = tasks
+        return self._tasks[name]
+
+    def load_batch(self, batch_num: int) -> List[dict]:
+        """Tasks of a numbered batch."""
+        return self.load_tasks(self.batches()[batch_num].name)
+
+@lru_cache(maxsize=None)
+def _catalog(batch_dir: str, cache_dir: Optional[str]) -> BatchCatalog:
+    return BatchCatalog(batch_dir, cache_dir)
+
+def get_catalog(batch_dir: str = BATCH_DIR, cache_dir: Optional[str] = DEFAULT_CACHE_DIR) -> BatchCatalog:
+    """The process-wide catalog of a batch directory."""
+    return _catalog(str(Path(batch_dir).resolve()), str(Path(cache_dir).resolve()) if cache_dir else None)
@@ -0,0 +1,217 @@
+from dataclasses import dataclass
+from typing import FrozenSet, List, Optional, Set, Tuple
+
+import numpy as np
+
+from .types import AnnotationCategory
+from .frame import AnnotationFrame, expand_roles
+from .vocab import LabelVocabulary, default_vocabulary
+
+WORD_BITS = 64
+
+# Set bits of every byte value, for NumPy versions without np.bitwise_count (< 2.0)
+_BYTE_POPCOUNT = np.array([bin(value).count('1') for value in range(256)], dtype=np.uint8)
+
+def popcount_rows(words: np.ndarray) -> np.ndarray:
+    """Number of set bits in each row of a (..., n_words) uint64 bitset array."""
+    words = np.ascontiguousarray(words, dtype=np.uint64)
+    if hasattr(np, 'bitwise_count'):
+        counts = np.bitwise_count(words)
+    else:
+        counts = _BYTE_POPCOUNT[words.view(np.uint8)]
+    return counts.sum(axis=-1, dtype=np.int64)
+
+def f1_scores(words1: np.ndarray, words2: np.ndarray) -> np.ndarray:
+    """
+    F1 between row-aligned label bitsets. Uses the same arithmetic as
+    calculate_f1_score, so scores are bit-for-bit identical.
+    """
+    size1, size2 = popcount_rows(words1), popcount_rows(words2)
+    intersection = popcount_rows(words1 & words2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        precision = intersection / size1
+        recall = intersection / size2
+        f1 = 2 * (precision * recall) / (precision + recall)
+    f1[intersection == 0] = 0.0
+    f1[(size1 == 0) & (size2 == 0)] = 1.0
+    return f1
+
+def decode_bitset(vocab: LabelVocabulary, category: AnnotationCategory, words: np.ndarray) -> Set[str]:
+    """Label set of one row of bitset words."""
+    labels = vocab.labels[category]
+    values = set()
+    for word_idx, word in enumerate(words.tolist()):
+        while word:
+            low = word & -word
+            values.add(labels[word_idx * WORD_BITS + low.bit_length() - 1])
+            word ^= low
+    return values
+
+@dataclass
+class CellBitsets:
+    """
+    Label set of every (annotation, turn, category) cell as a row of uint64 words.
+    Bit positions come from the label vocabulary, per category.
+    """
+    annotation: np.ndarray  # int32, index into the frame's annotation arrays
+    turn: np.ndarray  # int16, 0-based message index
+    category: np.ndarray  # int8, index into the frame's categories
+    rank: np.ndarray  # int8, position of the category in its role's category order
+    words: np.ndarray  # (n_cells, n_words) uint64
+    vocab: LabelVocabulary
+    frame: AnnotationFrame
+
+    def __len__(self) -> int:
+        return len(self.annotation)
+
+    def decode(self, idx: int) -> Set[str]:
+        """Label set of one cell."""
+        return decode_bitset(self.vocab, self.frame.categories[self.category[idx]], self.words[idx])
+
+    def decode_pairs(self, first: np.ndarray, second: np.ndarray) -> Tuple[List[Tuple[FrozenSet[str], FrozenSet[str]]], np.ndarray]:
+        """
+        Label sets of many cell pairs. Each distinct (category, bitset, bitset) is decoded
+        once, since the same disagreements recur across tasks. Returns the distinct
+        pairs of label sets and, for every input pair, the index of its distinct pair.
+        """
+        if not len(first):
+            return [], np.zeros(0, dtype=np.int64)
+        n_words = self.words.shape[1]
+        keyed = np.column_stack([self.category[first].astype(np.uint64), self.words[first], self.words[second]])
+        distinct, inverse = np.unique(keyed, axis=0, return_inverse=True)
+
+        # Set bit positions of every distinct bitset at once
+        halves = np.concatenate([distinct[:, 1:1 + n_words], distinct[:, 1 + n_words:]])
+        bits = np.unpackbits(np.ascontiguousarray(halves).view(np.uint8), axis=1, bitorder='little')
+        rows, positions = np.nonzero(bits)
+        bounds = np.searchsorted(rows, np.arange(len(halves) + 1)).tolist()
+        positions = positions.tolist()
+
+        n_distinct = len(distinct)
+        decoded = []
+        for idx, category_idx in enumerate(distinct[:, 0].tolist()):
+            labels = self.vocab.labels[self.frame.categories[category_idx]]
+            start1, end1 = bounds[idx], bounds[idx + 1]
+            start2, end2 = bounds[n_distinct + idx], bounds[n_distinct + idx + 1]
+            decoded.append((
+                frozenset([labels[bit] for bit in positions[start1:end1]]),
+                frozenset([labels[bit] for bit in positions[start2:end2]])
+            ))
+        return decoded, inverse.reshape(-1)
+
+def pack_cells(
+    frame: AnnotationFrame,
+    per_role: List[List[int]],
+    vocab: Optional[LabelVocabulary] = None
+) -> CellBitsets:
+    """
+    Bitsets for every category of every turn present in an annotation, labelled or
+    not; per_role[role] lists the category indices that apply, in order. Cells are
+    ordered by annotation, turn and that category order.
+    """
+    vocab = vocab or default_vocabulary()
+    categories = frame.categories
+    n_categories = len(categories)
+
+    # Cells: each present (annotation, turn) times the categories of its role
+    repeats, category = expand_roles(frame.present_turn, [np.asarray(c, dtype=np.int64) for c in per_role])
+    annotation = np.repeat(frame.present_annotation, repeats)
+    turn = np.repeat(frame.present_turn, repeats)
+    rank = (np.arange(len(category)) - np.repeat(np.cumsum(repeats) - repeats, repeats)).astype(np.int8)
+
+    # Vocabulary bit of each distinct (category, label) in the frame
+    n_labels = max(len(frame.labels), 1)
+    pairs, pair_of_row = np.unique(frame.category.astype(np.int64) * n_labels + frame.label, return_inverse=True)
+    pair_bits = np.array([
+        vocab.bit(categories[pair // n_labels], frame.labels[pair % n_labels]) for pair in pairs.tolist()
+    ], dtype=np.int64)
+    n_words = max([vocab.size(c) for c in categories] + [1])
+    n_words = (n_words + WORD_BITS - 1) // WORD_BITS
+    row_bit = pair_bits[pair_of_row.reshape(-1)] if len(pairs) else np.zeros(0, dtype=np.int64)
+
+    # Place each label row in its cell; rows outside any cell (e.g. a category that
+    # doesn't apply to the message's role) are dropped
+    n_turns = int(max(frame.present_turn.max() if len(turn) else 0, frame.turn.max() if len(frame) else 0)) + 1
+    cell_key = (annotation.astype(np.int64) * n_turns + turn) * n_categories + category
+    row_key = (frame.annotation.astype(np.int64) * n_turns + frame.turn) * n_categories + frame.category
+    order = np.argsort(cell_key, kind='stable')
+    position = np.searchsorted(cell_key[order], row_key)
+    position = np.minimum(position, max(len(order) - 1, 0))
+    found = (cell_key[order][position] == row_key) if len(order) else np.zeros(len(row_key), dtype=bool)
+    cell = order[position[found]]
+    bit = row_bit[found]
+
+    words = np.zeros((len(cell_key), n_words), dtype=np.uint64)
+    np.bitwise_or.at(words, (cell, bit // WORD_BITS), np.left_shift(np.uint64(1), (bit % WORD_BITS).astype(np.uint64)))
+
+    return CellBitsets(annotation, turn, category, rank, words, vocab, frame)
+
+def _group_pairs(group: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """All (i, j), i < j, of positions sharing a group id; group must be sorted."""
+    first, second = [], []
+    offset = 1
+    while offset < len(group):
+        same = np.flatnonzero(group[offset:] == group[:-offset])
+        if not len(same):
+            break
+        first.append(same)
+        second.append(same + offset)
+        offset += 1
+    if not first:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty
+    first, second = np.concatenate(first), np.concatenate(second)
+    order = np.lexsort((second, first, group[first]))
+    return first[order], second[order]
+
+def smallest_per_group(values: np.ndarray, group: np.ndarray, k: Optional[int]) -> np.ndarray:
+    """
+    Positions of the k smallest values of each group (all of them if k is None), ties
+    going to earlier positions, ordered by (value, position). Uses a partition per
+    group, so cost stays linear in the number of values however large the groups.
+    """
+    if k is None:
+        return np.argsort(values, kind='stable')
+    selected = [np.zeros(0, dtype=np.int64)]
+    for g in np.unique(group).tolist():
+        positions = np.flatnonzero(group == g)
+        if len(positions) > k:
+            kth = np.partition(values[positions], k - 1)[k - 1]
+            positions = positions[values[positions] <= kth]
+        selected.append(positions[np.argsort(values[positions], kind='stable')][:k])
+    selected = np.concatenate(selected)
+    return selected[np.lexsort((selected, values[selected]))]
+
+def annotation_pairs(frame: AnnotationFrame, annotation_mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Every pair of annotations of the same task, in task order, as (earlier, later) index arrays."""
+    keep = np.arange(len(frame.annotation_task))
+    if annotation_mask is not None:
+        keep = keep[annotation_mask]
+    keep = keep[np.argsort(frame.annotation_task[keep], kind='stable')]
+    first, second = _group_pairs(frame.annotation_task[keep])
+    return keep[first], keep[second]
+
+def cell_pairs(cells: CellBitsets, annotation_mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Every pair of cells that two annotations of the same task have for the same turn
+    and category, as (first, second) index arrays with first from the earlier
+    annotation. Pairs are ordered by task, turn, category order and annotation order.
+    annotation_mask, if given, restricts which annotations take part.
+    """
+    frame = cells.frame
+    keep = np.arange(len(cells))
+    if annotation_mask is not None:
+        keep = keep[annotation_mask[cells.annotation]]
+    task = frame.annotation_task[cells.annotation[keep]]
+    order = np.lexsort((cells.annotation[keep], cells.rank[keep], cells.turn[keep], task))
+    keep = keep[order]
+    task = task[order]
+
+    # Groups of cells sharing (task, turn, category)
+    turn, category = cells.turn[keep], cells.category[keep]
+    starts = np.ones(len(keep), dtype=bool)
+    starts[1:] = (task[1:] != task[:-1]) | (turn[1:] != turn[:-1]) | (category[1:] != category[:-1])
+    group = np.cumsum(starts) - 1
+
+    first, second = _group_pairs(group)
+    return keep[first], keep[second]
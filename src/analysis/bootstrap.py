@@ -0,0 +1,120 @@
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from .types import AnnotationCategory, ConfidenceInterval, Task
+from .agreement import ScoredPairs, score_cell_pairs
+from .frame import AnnotationFrame
+from .load import resolve_workers
+
+# Resamples drawn per job; jobs get their own child seed, so results don't depend on the worker count
+CHUNK_SIZE = 100
+
+class TaskScoreSums(NamedTuple):
+    """Per-task sums and counts of cell F1 scores for each group of cells."""
+    sums: np.ndarray  # (n_tasks, n_groups) float64
+    counts: np.ndarray  # (n_tasks, n_groups) float64
+
+def _group_sums(task: np.ndarray, group: np.ndarray, f1: np.ndarray, n_tasks: int, n_groups: int) -> TaskScoreSums:
+    key = task.astype(np.int64) * n_groups + group
+    size = n_tasks * n_groups
+    sums = np.bincount(key, weights=f1, minlength=size).reshape(n_tasks, n_groups)
+    counts = np.bincount(key, minlength=size).astype(np.float64).reshape(n_tasks, n_groups)
+    return TaskScoreSums(sums, counts)
+
+def _resample(groupings: List[TaskScoreSums], seed: np.random.SeedSequence, n_resamples: int) -> List[np.ndarray]:
+    """
+    Mean F1 of every group in n_resamples resamples of the tasks, drawn with
+    replacement; every grouping uses the same draws.
+    """
+    rng = np.random.default_rng(seed)
+    n_tasks = groupings[0].sums.shape[0]
+    # How often each task is drawn in each resample
+    weights = rng.multinomial(n_tasks, np.full(n_tasks, 1.0 / n_tasks), size=n_resamples).astype(np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return [(weights @ sums.sums) / (weights @ sums.counts) for sums in groupings]
+
+# Per-task sums of the current run, sent to each worker process once rather than with every job
+_worker_groupings: List[TaskScoreSums] = []
+
+def _init_worker(groupings: List[TaskScoreSums]):
+    global _worker_groupings
+    _worker_groupings = groupings
+
+def _resample_job(seed: np.random.SeedSequence, n_resamples: int) -> List[np.ndarray]:
+    return _resample(_worker_groupings, seed, n_resamples)
+
+def bootstrap_agreement(
+    tasks: List[Task],
+    n_resamples: int = 1000,
+    confidence: float = 0.95,
+    seed: int = 0,
+    workers: int = 1,
+    frame: Optional[AnnotationFrame] = None,
+    pairs: Optional[ScoredPairs] = None
+) -> Tuple[Dict[AnnotationCategory, ConfidenceInterval], Dict[AnnotationCategory, Dict[int, ConfidenceInterval]]]:
+    """
+    Percentile bootstrap intervals of mean per-cell F1, by category and by (category,
+    turn). Tasks are resampled with replacement; cells are scored once and each
+    resample only reweights per-task sums, so no scoring is repeated. Resamples run
+    in chunks across `workers` processes (0 = one per CPU core), each chunk with its
+    own child of a SeedSequence, so results are reproducible for a given seed.
+    pairs may be passed if the frame's cell pairs were already scored.
+    """
+    if n_resamples < 1:
+        raise ValueError(f"n_resamples must be at least 1, got {n_resamples}")
+    if frame is None:
+        frame = AnnotationFrame.from_tasks(tasks)
+    categories = frame.categories
+    cells, first, second, f1 = pairs if pairs is not None else score_cell_pairs(frame)
+    if not len(first):
+        return {}, {}
+
+    task = frame.annotation_task[cells.annotation[first]]
+    category = cells.category[first].astype(np.int64)
+    turn = cells.turn[first].astype(np.int64)
+    n_tasks = len(frame.task_ids)
+
+    # Groups: each category, and each (category, turn) present
+    n_turns = int(turn.max()) + 1
+    turn_keys, turn_group = np.unique(category * n_turns + turn, return_inverse=True)
+    groupings = [
+        _group_sums(task, category, f1, n_tasks, len(categories)),
+        _group_sums(task, turn_group.reshape(-1), f1, n_tasks, len(turn_keys))
+    ]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        estimates = [grouping.sums.sum(axis=0) / grouping.counts.sum(axis=0) for grouping in groupings]
+
+    sizes = [min(CHUNK_SIZE, n_resamples - start) for start in range(0, n_resamples, CHUNK_SIZE)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    workers = min(resolve_workers(workers), len(sizes))
+    if workers <= 1:
+        results = [_resample(groupings, child, size) for child, size in zip(seeds, sizes)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(groupings,)) as executor:
+            results = list(executor.map(_resample_job, seeds, sizes))
+
+    tail = (1.0 - confidence) / 2 * 100
+    bounds = []
+    for grouping_idx in range(len(groupings)):
+        means = np.concatenate([result[grouping_idx] for result in results])
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)  # Groups absent from every resample stay nan
+            low, high = np.nanpercentile(means, [tail, 100 - tail], axis=0)
+        bounds.append((low.tolist(), high.tolist()))
+
+    by_category: Dict[AnnotationCategory, ConfidenceInterval] = {}
+    (low, high), estimate = bounds[0], estimates[0].tolist()
+    for category_idx in np.unique(category).tolist():
+        by_category[categories[category_idx]] = ConfidenceInterval(estimate[category_idx], low[category_idx], high[category_idx])
+
+    by_turn: Dict[AnnotationCategory, Dict[int, ConfidenceInterval]] = {}
+    (low, high), estimate = bounds[1], estimates[1].tolist()
+    for group_idx, key in enumerate(turn_keys.tolist()):
+        category_idx, turn_idx = divmod(key, n_turns)
+        by_turn.setdefault(categories[category_idx], {})[turn_idx] = ConfidenceInterval(
+            estimate[group_idx], low[group_idx], high[group_idx]
+        )
+    return by_category, by_turn
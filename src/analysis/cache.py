@@ -0,0 +1,179 @@
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .fingerprint import file_digest
+
+DEFAULT_CACHE_DIR = ".cache/analysis"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024  # 256 MB
+
+# Bump whenever parse_annotation or the cached payload layout changes, so stale
+# entries written by an older parser are treated as misses
+CACHE_VERSION = 2
+
+INDEX_FILE = "index.json"
+
+def _umask() -> int:
+    # The umask can only be read by setting it
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+def _atomic_write(path: Path, data: bytes, public: bool = False):
+    """
+    Write bytes to path without leaving a truncated file behind on failure. The file
+    keeps mkstemp's owner-only mode unless public is set, in which case it gets the
+    mode a plain open() would give it (0o666 less the umask).
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        if public:
+            os.chmod(tmp_path, 0o666 & ~_umask())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+class ExportCache:
+    """
+    On-disk cache of parsed annotator exports.
+
+    Entries are keyed by the export's path, size, mtime and content digest. A matching
+    size and mtime is trusted without reading the file; if only the mtime changed (e.g.
+    after a fresh checkout) the content digest decides. Payloads are pickled, the total
+    size is capped at max_bytes and the least recently used entries are evicted first.
+    Hits only update the index in memory; it is saved by the next put or by flush().
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._index: Optional[Dict[str, dict]] = None
+        self._dirty = False
+
+    @property
+    def index_path(self) -> Path:
+        return self.cache_dir / INDEX_FILE
+
+    def _load_index(self) -> Dict[str, dict]:
+        if self._index is None:
+            self._index = {}
+            try:
+                with open(self.index_path, 'r') as f:
+                    data = json.load(f)
+                if data.get('version') == CACHE_VERSION:
+                    self._index = data.get('entries', {})
+            except (FileNotFoundError, json.JSONDecodeError, AttributeError):
+                pass
+        return self._index
+
+    def _save_index(self):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        payload = json.dumps({'version': CACHE_VERSION, 'entries': self._load_index()})
+        _atomic_write(self.index_path, payload.encode('utf-8'))
+        self._dirty = False
+
+    def flush(self):
+        """Save the index if hits changed it since it was last saved."""
+        if self._dirty:
+            self._save_index()
+
+    @staticmethod
+    def _key(path: str) -> str:
+        return str(Path(path).resolve())
+
+    def get(self, path: str) -> Optional[Any]:
+        """Return the cached payload for an export file, or None if missing or stale."""
+        index = self._load_index()
+        key = self._key(path)
+        entry = index.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        stat = os.stat(path)
+        if entry['size'] != stat.st_size:
+            self.misses += 1
+            return None
+        if entry['mtime_ns'] != stat.st_mtime_ns:
+            # Same size but touched: only a content digest can tell us if it changed
+            if file_digest(path) != entry['digest']:
+                self.misses += 1
+                return None
+            entry['mtime_ns'] = stat.st_mtime_ns
+
+        try:
+            with open(self.cache_dir / entry['blob'], 'rb') as f:
+                payload = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            # Blob was evicted or written by incompatible code; drop the entry
+            del index[key]
+            self._dirty = True
+            self.misses += 1
+            return None
+
+        entry['last_used'] = time.time()
+        self._dirty = True
+        self.hits += 1
+        return payload
+
+    def put(self, path: str, payload: Any, digest: Optional[str] = None):
+        """Store the parsed payload for an export file and evict old entries if over the cap."""
+        index = self._load_index()
+        key = self._key(path)
+        stat = os.stat(path)
+        digest = digest or file_digest(path)
+        path_id = hashlib.blake2b(key.encode('utf-8'), digest_size=8).hexdigest()
+        blob = f"{path_id}-{digest}.v{CACHE_VERSION}.pkl"
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        data = pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)
+        _atomic_write(self.cache_dir / blob, data)
+
+        old = index.get(key)
+        if old is not None and old['blob'] != blob:
+            self._remove_blob(old['blob'])
+        index[key] = {
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'digest': digest,
+            'blob': blob,
+            'bytes': len(data),
+            'last_used': time.time()
+        }
+        self._evict()
+        self._save_index()
+
+    def _remove_blob(self, blob: str):
+        try:
+            os.unlink(self.cache_dir / blob)
+        except FileNotFoundError:
+            pass
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes."""
+        index = self._load_index()
+        total = sum(e['bytes'] for e in index.values())
+        for key, entry in sorted(index.items(), key=lambda item: item[1]['last_used']):
+            if total <= self.max_bytes:
+                break
+            del index[key]
+            self._remove_blob(entry['blob'])
+            total -= entry['bytes']
+
+    def clear(self):
+        """Remove every cached entry."""
+        for entry in self._load_index().values():
+            self._remove_blob(entry['blob'])
+        self._index = {}
+        self._save_index()
@@ -0,0 +1,140 @@
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .types import AgreementScore, AnnotationCategory, MissingAnnotation
+from .agreement import AgreementCounts, CellScores, ScoredPairs, cell_scores, score_cell_pairs
+from .frame import AnnotationFrame, MissingAnnotations, _categorical
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Directory, within the output directory, of the columnar tables
+TABLES_DIR = "tables"
+
+PARQUET_SUFFIX = ".parquet"
+CSV_SUFFIX = ".csv.gz"
+
+def cell_score_table(frame: AnnotationFrame, scores: Optional[CellScores] = None) -> 'pd.DataFrame':
+    """One row per compared (task, turn, category, annotator pair) cell with its F1."""
+    import pandas as pd
+
+    scores = scores if scores is not None else cell_scores(frame)
+    categories = [category.value for category in frame.categories]
+    return pd.DataFrame({
+        'task_id': _categorical(scores.task, frame.task_ids),
+        'turn': scores.turn,
+        'category': _categorical(scores.category, categories),
+        'annotator1': _categorical(scores.annotator1, frame.annotator_ids),
+        'annotator2': _categorical(scores.annotator2, frame.annotator_ids),
+        'f1_score': scores.f1_score
+    })
+
+def pair_score_table(
+    counts: AgreementCounts,
+    overall_scores: Optional[Dict[AnnotationCategory, List[AgreementScore]]] = None
+) -> 'pd.DataFrame':
+    """
+    One row per (category, annotator1, annotator2) with the pair's compared cells,
+    pooled label TP/FP/FN counts and micro/macro F1, plus the overall score the report
+    used when overall_scores is given.
+    """
+    import pandas as pd
+
+    reported = {
+        (*score.annotator_pair, category): score.f1_score
+        for category, scores in (overall_scores or {}).items()
+        for score in scores
+    }
+    micro, macro = counts.micro_f1(), counts.macro_f1()
+    keys = list(counts.counts)
+    values = np.array([counts.counts[key] for key in keys], dtype=np.float64).reshape(-1, 5)
+    table = pd.DataFrame({
+        'category': pd.Categorical([key[2].value for key in keys], [category.value for category in AnnotationCategory]),
+        'annotator1': pd.Categorical([key[0] for key in keys]),
+        'annotator2': pd.Categorical([key[1] for key in keys]),
+        'cells': values[:, 3].astype(np.int64),
+        'tp': values[:, 0].astype(np.int64),
+        'fp': values[:, 1].astype(np.int64),
+        'fn': values[:, 2].astype(np.int64),
+        'micro_f1': [micro[key] for key in keys],
+        'macro_f1': [macro.get(key, np.nan) for key in keys]
+    })
+    if overall_scores is not None:
+        table['overall_score'] = [reported.get(key, np.nan) for key in keys]
+    return table
+
+def missing_annotation_table(missing: Sequence[MissingAnnotation]) -> 'pd.DataFrame':
+    """One row per missing (task, turn, category, annotator) cell."""
+    import pandas as pd
+
+    if not isinstance(missing, MissingAnnotations):
+        table = pd.DataFrame(list(missing), columns=list(MissingAnnotation._fields)).rename(columns={'turn_idx': 'turn'})
+        table['category'] = pd.Categorical(
+            [category.value for category in table['category']], [category.value for category in AnnotationCategory]
+        )
+        return table.astype({'task_id': 'category', 'annotator_id': 'category'})
+    return pd.DataFrame({
+        'task_id': _categorical(missing.task, missing.task_ids),
+        'turn': missing.turn,
+        'category': _categorical(missing.category, [category.value for category in missing.categories]),
+        'annotator_id': _categorical(missing.annotator, missing.annotator_ids),
+        'is_response': missing.turn % 2 == 1
+    })
+
+def write_table(table: 'pd.DataFrame', path: str) -> str:
+    """
+    Write a table to {path}.parquet with pyarrow, keeping categorical dtypes, or to
+    {path}.csv.gz when pyarrow is not installed. Returns the file written.
+    """
+    try:
+        table.to_parquet(f"{path}{PARQUET_SUFFIX}", engine='pyarrow', index=False)
+        written, stale = f"{path}{PARQUET_SUFFIX}", f"{path}{CSV_SUFFIX}"
+    except ImportError:
+        table.to_csv(f"{path}{CSV_SUFFIX}", index=False)
+        written, stale = f"{path}{CSV_SUFFIX}", f"{path}{PARQUET_SUFFIX}"
+    # A copy left by a run with the other format would shadow this one in read_table
+    Path(stale).unlink(missing_ok=True)
+    return written
+
+def read_table(path: str) -> 'pd.DataFrame':
+    """
+    Read a table written by write_table, given its path without suffix. Text columns
+    of the CSV fallback are restored as categoricals.
+    """
+    import pandas as pd
+
+    if Path(f"{path}{PARQUET_SUFFIX}").exists():
+        return pd.read_parquet(f"{path}{PARQUET_SUFFIX}")
+    table = pd.read_csv(f"{path}{CSV_SUFFIX}", dtype={'task_id': str})
+    for column in table.columns:
+        if pd.api.types.is_object_dtype(table[column]) or pd.api.types.is_string_dtype(table[column]):
+            table[column] = table[column].astype('category')
+    return table
+
+def write_columnar_tables(
+    output_dir: str,
+    frame: AnnotationFrame,
+    missing: Sequence[MissingAnnotation],
+    overall_scores: Optional[Dict[AnnotationCategory, List[AgreementScore]]] = None,
+    pairs: Optional[ScoredPairs] = None,
+    scores: Optional[CellScores] = None
+) -> Dict[str, str]:
+    """
+    Write the per-cell scores, per-pair scores, label assignments and missing
+    annotations of a round under {output_dir}/tables/. Returns table name -> file.
+    pairs and scores may be passed if the frame's cell pairs were already scored.
+    """
+    directory = Path(output_dir) / TABLES_DIR
+    directory.mkdir(parents=True, exist_ok=True)
+    pairs = pairs if pairs is not None else score_cell_pairs(frame)
+    scores = scores if scores is not None else cell_scores(frame, pairs)
+    tables = {
+        'cell_scores': lambda: cell_score_table(frame, scores),
+        'pair_scores': lambda: pair_score_table(AgreementCounts.from_pairs(frame, *pairs), overall_scores),
+        'label_assignments': frame.to_pandas,
+        'missing_annotations': lambda: missing_annotation_table(missing)
+    }
+    # Build one table at a time so only one is held in memory
+    return {name: write_table(build(), str(directory / name)) for name, build in tables.items()}
@@ -0,0 +1,75 @@
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+from .types import AnnotationCategory, Task
+from .agreement import ScoredPairs, score_cell_pairs
+from .bitset import WORD_BITS, CellBitsets
+from .frame import AnnotationFrame
+
+# Rows converted to one-hot label arrays at a time, to bound memory on large rounds
+CHUNK_ROWS = 1 << 16
+
+class LabelMatrix(NamedTuple):
+    """Label-by-label counts for one category; rows and columns follow labels."""
+    category: AnnotationCategory
+    labels: List[str]
+    counts: np.ndarray  # (n_labels, n_labels) int64
+
+def one_hot(cells: CellBitsets, idx: np.ndarray, n_labels: int) -> np.ndarray:
+    """(len(idx), n_labels) 0/1 array of the labels chosen in the given cells."""
+    words = np.ascontiguousarray(cells.words[idx])
+    bits = np.unpackbits(words.view(np.uint8), axis=1, bitorder='little')
+    return bits[:, :n_labels]
+
+def _gram(cells: CellBitsets, left: np.ndarray, right: np.ndarray, n_labels: int) -> np.ndarray:
+    """X_left^T X_right over the one-hot label arrays of two aligned lists of cells."""
+    counts = np.zeros((n_labels, n_labels), dtype=np.float64)
+    for start in range(0, len(left), CHUNK_ROWS):
+        x_left = one_hot(cells, left[start:start + CHUNK_ROWS], n_labels).astype(np.float64)
+        x_right = one_hot(cells, right[start:start + CHUNK_ROWS], n_labels).astype(np.float64)
+        counts += x_left.T @ x_right
+    return counts.astype(np.int64)
+
+def _trim(category: AnnotationCategory, labels: List[str], counts: np.ndarray) -> LabelMatrix:
+    """Drop labels nobody chose, keeping vocabulary order."""
+    used = np.flatnonzero(counts.any(axis=0) | counts.any(axis=1))
+    return LabelMatrix(category, [labels[i] for i in used.tolist()], counts[np.ix_(used, used)])
+
+def label_matrices(
+    tasks: List[Task],
+    frame: Optional[AnnotationFrame] = None,
+    pairs: Optional[ScoredPairs] = None
+) -> Dict[str, Dict[AnnotationCategory, LabelMatrix]]:
+    """
+    Per-category label matrices over every compared cell pair:
+
+    - 'confusion': how often one annotator chose label i while the other chose label j
+      for the same turn. Pair order carries no meaning, so both orders are counted
+      (X_aᵀX_b + X_bᵀX_a) and an agreement on a label adds 2 to its diagonal.
+    - 'cooccurrence': how often one annotator chose labels i and j together in a
+      cell (XᵀX over every cell); the diagonal is how often each label was chosen.
+
+    Both are computed as matrix products of one-hot label arrays. pairs may be passed
+    if the frame's cell pairs were already scored.
+    """
+    if frame is None:
+        frame = AnnotationFrame.from_tasks(tasks)
+    cells, first, second, _ = pairs if pairs is not None else score_cell_pairs(frame)
+    matrices: Dict[str, Dict[AnnotationCategory, LabelMatrix]] = {'confusion': {}, 'cooccurrence': {}}
+    if not len(first):
+        return matrices
+
+    pair_category = cells.category[first]
+    for category_idx in np.unique(pair_category).tolist():
+        category = frame.categories[category_idx]
+        labels = cells.vocab.labels[category]
+        n_labels = min(len(labels), cells.words.shape[1] * WORD_BITS)
+        selected = pair_category == category_idx
+
+        cross = _gram(cells, first[selected], second[selected], n_labels)
+        matrices['confusion'][category] = _trim(category, labels, cross + cross.T)
+
+        in_category = np.flatnonzero(cells.category == category_idx)
+        matrices['cooccurrence'][category] = _trim(category, labels, _gram(cells, in_category, in_category, n_labels))
+    return matrices
@@ -0,0 +1,213 @@
+import html
+import json
+import math
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence
+
+from .types import AgreementReport, AnnotationCategory
+from .shards import read_section
+
+DASHBOARD_FILE = "report.html"
+PAGES_DIR = "report_pages"  # Within the output directory
+PAGE_ROWS = 50  # Disagreement examples per page
+
+# Figures linked from the dashboard when generate_report drew them
+FIGURES = (
+    ('agreement_heatmap.png', 'Agreement by category and turn'),
+    ('overall_agreement.png', 'Overall agreement by category')
+)
+
+STYLE = """
+body { font-family: sans-serif; margin: 2em; color: #222; }
+table { border-collapse: collapse; margin-bottom: 1.5em; }
+th, td { border: 1px solid #ccc; padding: 0.3em 0.6em; text-align: left; }
+td.score { text-align: right; font-variant-numeric: tabular-nums; }
+figure { display: inline-block; margin: 0 1em 1em 0; }
+figure img { max-width: 45em; }
+.example { border: 1px solid #ccc; padding: 0.5em 1em; margin-bottom: 1em; }
+.example pre { white-space: pre-wrap; background: #f6f6f6; padding: 0.5em; max-height: 20em; overflow: auto; }
+"""
+
+# Pages are script files calling disagreementPage(index, rows), since browsers block
+# fetch() of local files when the report is opened from disk
+SCRIPT = """
+var pageCount = %(pages)d, loaded = {}, current = 0;
+function disagreementPage(index, rows) { loaded[index] = rows; if (index === current) render(); }
+function text(tag, value) { var node = document.createElement(tag); node.textContent = value; return node; }
+function render() {
+  var container = document.getElementById('examples');
+  container.replaceChildren();
+  document.getElementById('page').textContent = pageCount ? (current + 1) + ' / ' + pageCount : '0 / 0';
+  (loaded[current] || []).forEach(function (row) {
+    var item = document.createElement('div');
+    item.className = 'example';
+    item.appendChild(text('h3', row.category + ': task ' + row.task_id + ', turn ' + row.turn + ' (F1 ' + row.f1_score.toFixed(2) + ')'));
+    item.appendChild(text('pre', row.conversation_text));
+    [row.annotator1, row.annotator2].forEach(function (annotator) {
+      item.appendChild(text('p', annotator.id + ': ' + annotator.values.slice().sort().join(', ')));
+    });
+    container.appendChild(item);
+  });
+}
+function show(index) {
+  if (index < 0 || index >= pageCount) return;
+  current = index;
+  if (loaded[index]) { render(); return; }
+  var script = document.createElement('script');
+  script.src = '%(pages_dir)s/disagreements-' + String(index).padStart(5, '0') + '.js';
+  document.body.appendChild(script);
+}
+document.getElementById('previous').onclick = function () { show(current - 1); };
+document.getElementById('next').onclick = function () { show(current + 1); };
+show(0);
+render();
+"""
+
+def _cell(value) -> str:
+    if isinstance(value, float):
+        return f'<td class="score">{"n/a" if math.isnan(value) else f"{value:.2f}"}</td>'
+    return f"<td>{html.escape(str(value))}</td>"
+
+def _table(headers: Sequence[str], rows: Iterable[Sequence]) -> str:
+    head = "".join(f"<th>{html.escape(header)}</th>" for header in headers)
+    body = "".join("<tr>" + "".join(_cell(value) for value in row) + "</tr>" for row in rows)
+    return f"<table><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table>"
+
+def _score_color(score: float) -> str:
+    """Red (0) through yellow (0.5) to green (1), like the RdYlGn figures."""
+    score = min(max(score, 0.0), 1.0)
+    if score < 0.5:
+        red, green = 255, int(510 * score)
+    else:
+        red, green = int(510 * (1 - score)), 255
+    return f"rgb({red}, {green}, 96)"
+
+def _heatmap(report: AgreementReport) -> str:
+    """Mean F1 per category and turn as a table with colored cells."""
+    turns = sorted({turn for turns in report.scores_by_category.values() for turn in turns})
+    if not turns:
+        return "<p>No agreement data available</p>"
+    head = "<th>Category</th>" + "".join(f"<th>Turn {turn + 1}</th>" for turn in turns)
+    rows = []
+    for category in AnnotationCategory:
+        by_turn = report.scores_by_category.get(category)
+        if not by_turn:
+            continue
+        cells = []
+        for turn in turns:
+            scores = by_turn.get(turn)
+            if scores:
+                mean = sum(score.f1_score for score in scores) / len(scores)
+                cells.append(f'<td class="score" style="background: {_score_color(mean)}">{mean:.2f}</td>')
+            else:
+                cells.append("<td></td>")
+        rows.append(f"<tr><td>{html.escape(category.value)}</td>{''.join(cells)}</tr>")
+    return f"<table><thead><tr>{head}</tr></thead><tbody>{''.join(rows)}</tbody></table>"
+
+def _write_pages(rows: Iterable[dict], directory: Path, page_rows: int) -> int:
+    """Write rows as disagreements-NNNNN.js pages of page_rows rows; returns the number of pages."""
+    directory.mkdir(parents=True, exist_ok=True)
+    for stale in directory.glob("disagreements-*.js"):
+        stale.unlink()
+    pages = 0
+    page: List[dict] = []
+
+    def flush():
+        nonlocal pages
+        with open(directory / f"disagreements-{pages:05d}.js", 'w', encoding='utf-8') as f:
+            f.write(f"disagreementPage({pages}, {json.dumps(page)});\n")
+        pages += 1
+
+    for row in rows:
+        page.append(row)
+        if len(page) == page_rows:
+            flush()
+            page = []
+    if page:
+        flush()
+    return pages
+
+def write_dashboard(
+    report: AgreementReport,
+    output_dir: str,
+    shards_dir: Optional[str] = None,
+    page_rows: int = PAGE_ROWS,
+    figures: bool = True
+) -> str:
+    """
+    Write a static HTML dashboard to {output_dir}/report.html and return its path.
+
+    Summary tables, the per-turn agreement heatmap and links to the figures are in
+    the page itself; disagreement examples are re-paged from the detailed report's
+    JSON Lines shards (shards_dir, default {output_dir}/detailed_report) into small
+    script files under report_pages/, loaded one page at a time as the reader pages
+    through them. The main file's size does not depend on the number of examples.
+    With figures set, the report's .png figures found in output_dir are linked.
+    """
+    output = Path(output_dir)
+    shards_dir = shards_dir or str(output / "detailed_report")
+    pages = _write_pages(read_section(shards_dir, 'disagreement_examples'), output / PAGES_DIR, page_rows)
+
+    overview = _table(('Measure', 'Value'), [
+        ('Tasks analyzed', report.tasks_analyzed),
+        ('Annotator pairs', len(report.annotator_pairs)),
+        ('Tasks with missing annotations', len(report.missing_annotations)),
+        ('Significant disagreements', sum(report.disagreement_counts.values()))
+    ])
+    overall = _table(('Category', 'Agreement', 'Mean cell F1', '95% CI low', '95% CI high'), [
+        (category.value, score, *report.category_intervals[category])
+        if category in report.category_intervals else (category.value, score, '', '', '')
+        for category, score in report.lowest_agreement_overall
+    ])
+    lowest = _table(('Category', 'Turn', 'Agreement', '95% CI low', '95% CI high'), [
+        (
+            category.value, turn + 1, score,
+            *((report.turn_intervals[category][turn].low, report.turn_intervals[category][turn].high)
+              if turn in report.turn_intervals.get(category, {}) else ('', ''))
+        )
+        for category, turn, score in report.lowest_agreement_categories
+    ])
+    alpha = _table(('Category', 'Alpha', 'Units'), [
+        (category.value, score.alpha, score.units) for category, score in report.alpha_scores.items()
+    ])
+    counts = _table(('Category', 'Significant disagreements'), [
+        (category.value, count) for category, count in report.disagreement_counts.items()
+    ])
+    figure_links = "".join(
+        f'<figure><img src="{name}" alt="{html.escape(caption)}" loading="lazy"><figcaption>{html.escape(caption)}</figcaption></figure>'
+        for name, caption in FIGURES
+        if figures and (output / name).exists()
+    )
+
+    document = f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>Inter-rater Agreement Analysis Report</title>
+<style>{STYLE}</style>
+</head>
+<body>
+<h1>Inter-rater Agreement Analysis Report</h1>
+<h2>Overview</h2>
+{overview}
+<h2>Overall Category Agreement</h2>
+{overall}
+<h2>Agreement by Category and Turn</h2>
+{_heatmap(report)}
+{figure_links}
+<h2>Krippendorff's Alpha (MASI distance)</h2>
+{alpha}
+<h2>Lowest Agreement Categories by Turn</h2>
+{lowest}
+<h2>Significant Disagreements by Category</h2>
+{counts}
+<h2>Disagreement Examples</h2>
+<p><button id="previous">Previous</button> <span id="page"></span> <button id="next">Next</button></p>
+<div id="examples"></div>
+<script>{SCRIPT % {'pages': pages, 'pages_dir': PAGES_DIR}}</script>
+</body>
+</html>
+"""
+    path = output / DASHBOARD_FILE
+    path.write_text(document, encoding='utf-8')
+    return str(path)
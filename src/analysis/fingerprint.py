@@ -0,0 +1,52 @@
+import hashlib
+import unicodedata
+from typing import Iterable, List, Optional
+
+# Bump when the normalization below changes so persisted fingerprints are not reused
+FINGERPRINT_VERSION = 1
+DIGEST_SIZE = 16  # 128-bit digests, rendered as 32 hex characters
+
+# Unit separator between turns; cannot appear in normalized turn text
+_TURN_SEPARATOR = b"\x1f"
+_CHUNK_SIZE = 1 << 20
+
+def normalize_turn_text(text: str) -> str:
+    """Normalize a turn's text so cosmetic differences don't change the fingerprint."""
+    text = unicodedata.normalize('NFC', text)
+    text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text.strip().replace('\x1f', ' ')
+
+def get_conversation(task: dict) -> List[dict]:
+    """Return the conversation turns of a batch or export task, whichever shape it uses."""
+    return task.get("data", {}).get("conversation", task.get("conversation", []))
+
+def conversation_fingerprint(conversation: Iterable[dict]) -> str:
+    """
+    Stable content-addressed fingerprint of a conversation.
+
+    Unlike the builtin hash(), this is identical across interpreter runs and machines,
+    so it can be persisted and used to match batch tasks with exported annotations.
+    """
+    hasher = hashlib.blake2b(digest_size=DIGEST_SIZE, person=b'nup-conv-v%d' % FINGERPRINT_VERSION)
+    for idx, turn in enumerate(conversation):
+        if idx:
+            hasher.update(_TURN_SEPARATOR)
+        text = turn.get('text', turn.get('content', '')) or ''
+        hasher.update(normalize_turn_text(text).encode('utf-8'))
+    return hasher.hexdigest()
+
+def task_fingerprint(task: dict) -> str:
+    """Fingerprint the conversation attached to a batch or export task."""
+    return conversation_fingerprint(get_conversation(task))
+
+def file_digest(path: str, digest_size: int = DIGEST_SIZE) -> str:
+    """BLAKE2 digest of a file's contents, read in chunks."""
+    hasher = hashlib.blake2b(digest_size=digest_size)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+def short_fingerprint(fingerprint: Optional[str], length: int = 8) -> str:
+    """Abbreviated fingerprint for log messages."""
+    return (fingerprint or '')[:length]
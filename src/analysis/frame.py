@@ -0,0 +1,297 @@
+from array import array
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .types import Task, AnnotationCategory, MissingAnnotation
+
+CATEGORIES: List[AnnotationCategory] = list(AnnotationCategory)
+CATEGORY_INDEX: Dict[AnnotationCategory, int] = {category: idx for idx, category in enumerate(CATEGORIES)}
+
+# Role codes; a message's role follows from its parity (odd indices are responses)
+ROLE_PROMPT = 0
+ROLE_RESPONSE = 1
+
+class StringTable:
+    """Interns strings to dense integer ids."""
+
+    def __init__(self, values: Optional[List[str]] = None):
+        self.values: List[str] = []
+        self._ids: Dict[str, int] = {}
+        for value in values or []:
+            self.intern(value)
+
+    def intern(self, value: str) -> int:
+        idx = self._ids.get(value)
+        if idx is None:
+            idx = self._ids[value] = len(self.values)
+            self.values.append(value)
+        return idx
+
+    def get(self, value: str) -> Optional[int]:
+        return self._ids.get(value)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+class MissingAnnotations(Sequence[MissingAnnotation]):
+    """
+    Struct-of-arrays list of missing (task, turn, category, annotator) cells. Behaves
+    like a List[MissingAnnotation]; records are only built when accessed.
+    """
+    __slots__ = ('task', 'turn', 'category', 'annotator', 'task_ids', 'annotator_ids', 'categories')
+
+    def __init__(
+        self,
+        task: np.ndarray,
+        turn: np.ndarray,
+        category: np.ndarray,
+        annotator: np.ndarray,
+        task_ids: List[str],
+        annotator_ids: List[str],
+        categories: List[AnnotationCategory]
+    ):
+        self.task = task
+        self.turn = turn
+        self.category = category
+        self.annotator = annotator
+        self.task_ids = task_ids
+        self.annotator_ids = annotator_ids
+        self.categories = categories
+
+    def __len__(self) -> int:
+        return len(self.task)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self._record(i) for i in range(*idx.indices(len(self)))]
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError(idx)
+        return self._record(idx)
+
+    def __iter__(self) -> Iterator[MissingAnnotation]:
+        task_ids, annotator_ids, categories = self.task_ids, self.annotator_ids, self.categories
+        for task, turn, category, annotator in zip(
+            self.task.tolist(), self.turn.tolist(), self.category.tolist(), self.annotator.tolist()
+        ):
+            yield MissingAnnotation(task_ids[task], turn, categories[category], annotator_ids[annotator], turn % 2 == 1)
+
+    def _record(self, idx: int) -> MissingAnnotation:
+        turn = int(self.turn[idx])
+        return MissingAnnotation(
+            task_id=self.task_ids[self.task[idx]],
+            turn_idx=turn,
+            category=self.categories[self.category[idx]],
+            annotator_id=self.annotator_ids[self.annotator[idx]],
+            is_response=turn % 2 == 1
+        )
+
+def expand_roles(turn: np.ndarray, per_role: List[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Expand each message into the categories of its role. per_role[role] lists category
+    indices in the order they should appear. Returns the number of categories of each
+    message (for np.repeat of the message columns) and the flat category column.
+    """
+    role = turn % 2
+    n_categories = np.array([len(c) for c in per_role], dtype=np.int64)[role]
+    category = np.empty(int(n_categories.sum()), dtype=np.int8)
+    offsets = np.cumsum(n_categories) - n_categories
+    for role_code, role_categories in enumerate(per_role):
+        rows = offsets[role == role_code]
+        for position, category_idx in enumerate(role_categories):
+            category[rows + position] = category_idx
+    return n_categories, category
+
+def _categorical(codes: np.ndarray, values: List[str]):
+    """pandas Categorical from integer codes into a string table."""
+    import pandas as pd
+
+    if len(set(values)) == len(values):
+        return pd.Categorical.from_codes(codes, values)
+    # Tables with repeated entries (e.g. duplicate task ids) can't be categories directly
+    return pd.Categorical(np.asarray(values, dtype=object)[codes])
+
+@dataclass
+class AnnotationFrame:
+    """
+    Columnar view of every label assignment: row i says annotator[i] chose label[i]
+    for category[i] on message turn[i] of task[i]. Integer columns index into the
+    string tables, so 10^6 assignments take ~16 MB instead of nested dicts of sets.
+    """
+    task: np.ndarray  # int32, index into task_ids
+    annotator: np.ndarray  # int32, index into annotator_ids
+    turn: np.ndarray  # int16, 0-based message index
+    role: np.ndarray  # int8, ROLE_PROMPT or ROLE_RESPONSE
+    category: np.ndarray  # int8, index into CATEGORIES
+    label: np.ndarray  # int32, index into labels
+    annotation: np.ndarray  # int32, index into annotation_task / annotation_annotator
+    task_ids: List[str]
+    annotator_ids: List[str]
+    labels: List[str]
+    # One row per (task, annotator) annotation, including ones without any labels
+    annotation_task: np.ndarray  # int32
+    annotation_annotator: np.ndarray  # int32
+    # Number of conversation messages in each task
+    task_turn_counts: np.ndarray  # int32
+    # One row per turn present in an annotation's turns (labelled or not), in annotation order
+    present_annotation: np.ndarray  # int32, index into annotation_task / annotation_annotator
+    present_turn: np.ndarray  # int16
+    categories: List[AnnotationCategory] = field(default_factory=lambda: list(CATEGORIES))
+
+    def __len__(self) -> int:
+        return len(self.label)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the array columns."""
+        return sum(
+            column.nbytes for column in (
+                self.task, self.annotator, self.turn, self.role, self.category, self.label, self.annotation,
+                self.annotation_task, self.annotation_annotator, self.task_turn_counts,
+                self.present_annotation, self.present_turn
+            )
+        )
+
+    @classmethod
+    def from_tasks(cls, tasks: List[Task]) -> 'AnnotationFrame':
+        """Build the frame in a single pass over the loaded tasks."""
+        annotation_task, annotation_annotator, turn_counts = array('i'), array('i'), array('i')
+        present_annotation, present_turn = array('i'), array('h')
+        # One entry per labelled (present turn, category) cell; its labels are appended to label_col
+        cell_present, cell_category, cell_size, label_col = array('i'), array('b'), array('i'), array('i')
+        annotators, labels = StringTable(), StringTable()
+        intern_label = labels.intern
+        fields = [(category_idx, category.value) for category_idx, category in enumerate(CATEGORIES)]
+        task_ids = []
+
+        for task_idx, task in enumerate(tasks):
+            task_ids.append(task.task_id)
+            data = task.original_data
+            turn_counts.append(len(data.get("data", {}).get("conversation", data.get("conversation", []))))
+            for annotation in task.annotations:
+                annotation_idx = len(annotation_task)
+                annotation_task.append(task_idx)
+                annotation_annotator.append(annotators.intern(annotation.annotator_id))
+                for turn_idx, turn in annotation.turns.items():
+                    present_idx = len(present_turn)
+                    present_annotation.append(annotation_idx)
+                    present_turn.append(turn_idx)
+                    for category_idx, name in fields:
+                        values = getattr(turn, name)
+                        if values:
+                            cell_present.append(present_idx)
+                            cell_category.append(category_idx)
+                            cell_size.append(len(values))
+                            label_col.extend([intern_label(value) for value in values])
+
+        def column(values: array, dtype) -> np.ndarray:
+            return np.frombuffer(values, dtype=dtype).copy()
+
+        annotation_task = column(annotation_task, np.int32)
+        annotation_annotator = column(annotation_annotator, np.int32)
+        present_annotation = column(present_annotation, np.int32)
+        present_turn = column(present_turn, np.int16)
+
+        # Expand cells to one row per label
+        sizes = column(cell_size, np.int32)
+        row_present = np.repeat(column(cell_present, np.int32), sizes)
+        annotation = present_annotation[row_present]
+        turn = present_turn[row_present]
+        return cls(
+            task=annotation_task[annotation],
+            annotator=annotation_annotator[annotation],
+            turn=turn,
+            role=(turn % 2).astype(np.int8),
+            category=np.repeat(column(cell_category, np.int8), sizes),
+            label=column(label_col, np.int32),
+            annotation=annotation,
+            task_ids=task_ids,
+            annotator_ids=annotators.values,
+            labels=labels.values,
+            annotation_task=annotation_task,
+            annotation_annotator=annotation_annotator,
+            task_turn_counts=column(turn_counts, np.int32),
+            present_annotation=present_annotation,
+            present_turn=present_turn
+        )
+
+    def pack_cells(self, task: np.ndarray, annotator: np.ndarray, turn: np.ndarray, category: np.ndarray) -> np.ndarray:
+        """Pack (task, annotator, turn, category) columns into one int64 key per cell."""
+        n_annotators = max(len(self.annotator_ids), 1)
+        n_turns = max(
+            int(self.turn.max()) + 1 if len(self) else 1,
+            int(self.task_turn_counts.max()) if len(self.task_turn_counts) else 1
+        )
+        key = task.astype(np.int64)
+        key = key * n_annotators + annotator
+        key = key * n_turns + turn
+        key = key * len(self.categories) + category
+        return key
+
+    def cell_keys(self) -> np.ndarray:
+        """Cell key of each row, so cells can be grouped with np.unique instead of Python dicts."""
+        return self.pack_cells(self.task, self.annotator, self.turn, self.category)
+
+    def completed_cells(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Unique (task, annotator, turn, category) cells that have at least one label."""
+        if not len(self):
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty, empty, empty
+        _, first = np.unique(self.cell_keys(), return_index=True)
+        return self.task[first], self.annotator[first], self.turn[first], self.category[first]
+
+    def expected_cells(self, required: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Every (task, annotator, turn, category) cell each annotation should have labelled,
+        for the turns of its conversation, ordered by task, turn, annotation and category.
+        required is a bool (role, category) matrix of the categories that apply to prompts
+        and responses.
+        """
+        # One row per (annotation, turn)
+        counts = self.task_turn_counts[self.annotation_task].astype(np.int64)
+        turn_task = np.repeat(self.annotation_task, counts)
+        turn_annotator = np.repeat(self.annotation_annotator, counts)
+        starts = np.repeat(np.cumsum(counts) - counts, counts)
+        turn = np.arange(len(turn_task), dtype=np.int64) - starts
+
+        order = np.lexsort((np.repeat(np.arange(len(counts)), counts), turn, turn_task))
+        turn_task, turn_annotator, turn = turn_task[order], turn_annotator[order], turn[order]
+
+        # Expand each (annotation, turn) into the categories its role requires
+        per_role = [np.flatnonzero(required[role]) for role in (ROLE_PROMPT, ROLE_RESPONSE)]
+        n_categories, category = expand_roles(turn, per_role)
+        return (
+            np.repeat(turn_task, n_categories),
+            np.repeat(turn_annotator, n_categories),
+            np.repeat(turn, n_categories).astype(np.int16),
+            category
+        )
+
+    def completed_counts(self) -> np.ndarray:
+        """Completed cell counts as an (annotator, category) matrix."""
+        _, annotator, _, category = self.completed_cells()
+        counts = np.zeros((len(self.annotator_ids), len(self.categories)), dtype=np.int64)
+        np.add.at(counts, (annotator, category), 1)
+        return counts
+
+    def label_counts(self, category: AnnotationCategory) -> Dict[str, int]:
+        """How often each label was chosen for a category, across all annotators."""
+        rows = self.category == self.categories.index(category)
+        ids, counts = np.unique(self.label[rows], return_counts=True)
+        return {self.labels[idx]: int(count) for idx, count in zip(ids, counts)}
+
+    def to_pandas(self):
+        """Long-format DataFrame with categorical string columns."""
+        import pandas as pd
+
+        return pd.DataFrame({
+            'task_id': _categorical(self.task, self.task_ids),
+            'annotator_id': _categorical(self.annotator, self.annotator_ids),
+            'turn': self.turn,
+            'role': _categorical(self.role, ['prompt', 'response']),
+            'category': _categorical(self.category, [c.value for c in self.categories]),
+            'label': _categorical(self.label, self.labels)
+        })
@@ -0,0 +1,128 @@
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+from .types import Task
+from .agreement import ScoredPairs, score_cell_pairs
+from .bitset import WORD_BITS
+from .confusion import one_hot
+from .frame import AnnotationFrame
+
+ALL_PAIRS = '(all pairs)'
+
+class LabelAgreementTable(NamedTuple):
+    """
+    Binary agreement on each label, per category and annotator pair, as parallel
+    columns with one row per (category, label, pair). Rows with annotator1 set to
+    ALL_PAIRS pool every pair's counts for that label.
+    """
+    category: np.ndarray  # str
+    label: np.ndarray  # str
+    annotator1: np.ndarray  # str
+    annotator2: np.ndarray  # str
+    cells: np.ndarray  # Compared cells
+    both: np.ndarray  # Both chose the label
+    only1: np.ndarray  # Only annotator1 chose it
+    only2: np.ndarray  # Only annotator2 chose it
+    neither: np.ndarray
+    prevalence: np.ndarray  # Share of the two annotators' choices that include the label
+    kappa: np.ndarray  # Cohen's kappa; nan when chance agreement is 1
+    pabak: np.ndarray  # Prevalence- and bias-adjusted kappa, 2 * observed agreement - 1
+    positive_agreement: np.ndarray  # 2a / (2a + b + c); nan when neither chose it
+    negative_agreement: np.ndarray  # 2d / (2d + b + c); nan when both always chose it
+
+def binary_agreement(both: np.ndarray, only1: np.ndarray, only2: np.ndarray, neither: np.ndarray) -> Dict[str, np.ndarray]:
+    """Prevalence, Cohen's kappa, PABAK and positive/negative agreement from 2x2 counts, elementwise."""
+    a, b, c, d = (np.asarray(x, dtype=np.float64) for x in (both, only1, only2, neither))
+    n = a + b + c + d
+    with np.errstate(divide='ignore', invalid='ignore'):
+        observed = (a + d) / n
+        chance = ((a + b) * (a + c) + (c + d) * (b + d)) / (n * n)
+        return {
+            'prevalence': (2 * a + b + c) / (2 * n),
+            'kappa': np.where(chance < 1, (observed - chance) / (1 - chance), np.nan),
+            'pabak': 2 * observed - 1,
+            'positive_agreement': (2 * a) / (2 * a + b + c),
+            'negative_agreement': (2 * d) / (2 * d + b + c)
+        }
+
+def label_agreement(
+    tasks: List[Task],
+    frame: Optional[AnnotationFrame] = None,
+    pairs: Optional[ScoredPairs] = None
+) -> LabelAgreementTable:
+    """
+    2x2 agreement counts and binary agreement metrics for every label of every
+    category and every annotator pair (unordered), from one pass over the one-hot
+    label arrays of the compared cells: counts are summed per (category, pair) group
+    with np.add.reduceat over rows sorted by group. pairs may be passed if the frame's
+    cell pairs were already scored.
+    """
+    if frame is None:
+        frame = AnnotationFrame.from_tasks(tasks)
+    cells, first, second, _ = pairs if pairs is not None else score_cell_pairs(frame)
+    n_annotators = len(frame.annotator_ids)
+
+    # Unordered annotator pair of each compared cell pair
+    annotator1 = frame.annotation_annotator[cells.annotation[first]].astype(np.int64)
+    annotator2 = frame.annotation_annotator[cells.annotation[second]].astype(np.int64)
+    low, high = np.minimum(annotator1, annotator2), np.maximum(annotator1, annotator2)
+    category = cells.category[first].astype(np.int64)
+    group_key = (category * n_annotators + low) * n_annotators + high
+    order = np.argsort(group_key, kind='stable')
+    groups, starts = np.unique(group_key[order], return_index=True)
+
+    n_labels = min(max(len(cells.vocab.labels[c]) for c in frame.categories), cells.words.shape[1] * WORD_BITS)
+    # Label arrays of the lower and higher annotator index of each pair, sorted by group
+    swap = (annotator1 > annotator2)[order]
+    x1 = one_hot(cells, np.where(swap, second[order], first[order]), n_labels)
+    x2 = one_hot(cells, np.where(swap, first[order], second[order]), n_labels)
+    if len(groups):
+        both = np.add.reduceat(x1 & x2, starts, axis=0, dtype=np.int64)
+        chosen1 = np.add.reduceat(x1, starts, axis=0, dtype=np.int64)
+        chosen2 = np.add.reduceat(x2, starts, axis=0, dtype=np.int64)
+    else:
+        both = chosen1 = chosen2 = np.zeros((0, n_labels), dtype=np.int64)
+    n_cells = np.diff(np.append(starts, len(order)))
+
+    group_category, rest = np.divmod(groups, n_annotators * n_annotators)
+    group_low, group_high = np.divmod(rest, n_annotators)
+
+    rows: Dict[str, list] = {name: [] for name in LabelAgreementTable._fields}
+    for category_idx in np.unique(group_category).tolist():
+        category_name = frame.categories[category_idx].value
+        labels = cells.vocab.labels[frame.categories[category_idx]]
+        in_category = np.flatnonzero(group_category == category_idx)
+        # Labels anyone chose in this category
+        used = np.flatnonzero((chosen1[in_category] + chosen2[in_category]).sum(axis=0)[:len(labels)])
+        if not len(used):
+            continue
+
+        pair_counts = [
+            (frame.annotator_ids[group_low[g]], frame.annotator_ids[group_high[g]], n_cells[g], both[g], chosen1[g], chosen2[g])
+            for g in in_category.tolist()
+        ]
+        pair_counts.append((
+            ALL_PAIRS, ALL_PAIRS, n_cells[in_category].sum(),
+            both[in_category].sum(axis=0), chosen1[in_category].sum(axis=0), chosen2[in_category].sum(axis=0)
+        ))
+        for name1, name2, n, a, n1, n2 in pair_counts:
+            a, n1, n2 = a[used], n1[used], n2[used]
+            rows['category'].append(np.full(len(used), category_name, dtype=object))
+            rows['label'].append(np.array([labels[i] for i in used.tolist()], dtype=object))
+            rows['annotator1'].append(np.full(len(used), name1, dtype=object))
+            rows['annotator2'].append(np.full(len(used), name2, dtype=object))
+            rows['cells'].append(np.full(len(used), n, dtype=np.int64))
+            rows['both'].append(a)
+            rows['only1'].append(n1 - a)
+            rows['only2'].append(n2 - a)
+            rows['neither'].append(n - n1 - n2 + a)
+
+    text_columns = ('category', 'label', 'annotator1', 'annotator2')
+    columns = {
+        name: np.concatenate(values) if values else np.zeros(0, dtype=object if name in text_columns else np.int64)
+        for name, values in rows.items()
+        if name in text_columns + ('cells', 'both', 'only1', 'only2', 'neither')
+    }
+    columns.update(binary_agreement(columns['both'], columns['only1'], columns['only2'], columns['neither']))
+    return LabelAgreementTable(**columns)
@@ -1,28 +1,30 @@
 import json
 import glob
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Set, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Set, Optional, Tuple
 from datetime import datetime
 
+import numpy as np
+
 from .types import Annotation, Task, TurnAnnotation, AnnotationCategory, CompletionStats, MissingAnnotation
+from .cache import ExportCache
+from .stream import ExportReader
+from .schema import lookup_control
+from .frame import AnnotationFrame, MissingAnnotations, ROLE_PROMPT, ROLE_RESPONSE
+from .agreement import get_applicable_categories
+from .batches import BATCH_DIR, BatchCatalog, get_catalog
 
 def extract_turn_number(name: str) -> Optional[int]:
-    """Extract turn number from field name (e.g., 'media_format_1' -> 0)."""
-    # Note: We subtract 1 from the turn number since we want 0-based indexing
-    if name.endswith('_1'):
-        return 0
-    elif name.endswith('_2'):
-        return 1
-    elif name.endswith('_3'):
-        return 2
-    return None
+    """Extract 0-based message index from field name (e.g., 'media_format_prompt_1' -> 0, 'answer_form_response_1' -> 1)."""
+    spec = lookup_control(name)
+    return spec.message_indices[0] if spec else None
 
 def extract_category(name: str) -> Optional[str]:
-    """Extract category from field name (e.g., 'media_format_1' -> 'media_format')."""
-    parts = name.rsplit('_', 1)
-    if len(parts) == 2 and parts[1].isdigit():
-        return parts[0]
-    return None
+    """Extract category from field name (e.g., 'media_format_prompt_1' -> 'media_format')."""
+    spec = lookup_control(name)
+    return spec.category.value if spec else None
 
 def load_annotator_exports(exports_dir: str = "annotator_exports") -> List[dict]:
     """Load all JSON files from the annotator_exports directory."""
@@ -30,20 +32,18 @@ def load_annotator_exports(exports_dir: str = "annotator_exports") -> List[dict]
     all_annotations = []
     
     for json_file in json_files:
-        with open(json_file, 'r') as f:
-            data = json.load(f)
-            if 'annotations' in data:  # Handle the new format with metadata
-                annotator = data.get('metadata', {}).get('annotator', '')
-                for task in data['annotations']:
+        with ExportReader(json_file, keep_data=True) as reader:
+            if reader.format == 'wrapped':  # Handle the new format with metadata
+                for task in reader:
                     if task.get('annotations'):  # Check if task has annotations
                         for annotation in task['annotations']:
                             # Add task data and annotator to the annotation
                             annotation['task'] = task['id']
                             annotation['data'] = task['data']
-                            annotation['_annotator'] = annotator
+                            annotation['_annotator'] = reader.header.get('metadata', {}).get('annotator', '')
                             all_annotations.append(annotation)
             else:  # Handle direct list of annotations
-                all_annotations.extend(data)
+                all_annotations.extend(reader)
     
     return all_annotations
 
@@ -62,51 +62,26 @@ def parse_annotation(raw_annotation: dict) -> Tuple[Annotation, Dict[int, Set[st
     completed_categories: Dict[int, Set[str]] = {}
     
     # First pass: collect all annotations by turn
-    for result in raw_annotation['result']:
+    for result in raw_annotation.get('result', []):
         if 'value' not in result or 'choices' not in result['value']:
             continue
             
-        from_name = result['from_name']
-        turn_idx = extract_turn_number(from_name)
-        if turn_idx is None:
+        # One lookup gives the category and the conversation message(s) it covers
+        spec = lookup_control(result['from_name'])
+        if spec is None:
             continue
             
-        # Extract base category name without turn number
-        category = extract_category(from_name)
-        if not category:
+        # Only count category as completed if it has choices
+        choices = result['value']['choices']
+        if not choices:
             continue
             
-        if turn_idx not in turns:
-            turns[turn_idx] = {
-                'media_format': set(),
-                'topic': set(),
-                'function_purpose': set(),
-                'multi_turn_relationship': set(),
-                'anthropomorphization': set(),
-                'restricted_flags': set(),
-                'answer_form': set(),
-                'self_disclosure': set()
-            }
-            completed_categories[turn_idx] = set()
-            
-        # Map the category to our internal names
-        category_map = {
-            'media_format': 'media_format',
-            'topic': 'topic',
-            'function_purpose': 'function_purpose',
-            'multi_turn_relationship': 'multi_turn_relationship',
-            'anthropomorphization': 'anthropomorphization',
-            'restricted_flags': 'restricted_flags',
-            'answer_form': 'answer_form',
-            'self_disclosure': 'self_disclosure'
-        }
-        
-        internal_category = category_map.get(category)
-        if internal_category:
-            # Only count category as completed if it has choices
-            if result['value']['choices']:
-                turns[turn_idx][internal_category].update(result['value']['choices'])
-                completed_categories[turn_idx].add(internal_category)
+        for turn_idx in spec.message_indices:
+            if turn_idx not in turns:
+                turns[turn_idx] = {category.value: set() for category in AnnotationCategory}
+                completed_categories[turn_idx] = set()
+            turns[turn_idx][spec.category.value].update(choices)
+            completed_categories[turn_idx].add(spec.category.value)
     
     # Second pass: convert to TurnAnnotation objects
     turn_annotations = {}
@@ -137,131 +112,174 @@ def parse_annotation(raw_annotation: dict) -> Tuple[Annotation, Dict[int, Set[st
     
     return annotation, completed_categories
 
-def load_original_tasks(batch_dir: str = "data") -> List[dict]:
-    """Load original tasks from batch JSON files."""
+def load_original_tasks(batch_dir: str = BATCH_DIR) -> List[dict]:
+    """Load original tasks from the numbered batch files, tagged with their batch number and fingerprint."""
+    catalog = get_catalog(batch_dir)
     tasks = []
-    batch_files = sorted(glob.glob(f"{batch_dir}/batch_*.json"))
-    
-    for batch_file in batch_files:
-        with open(batch_file, 'r') as f:
-            try:
-                batch_data = json.load(f)
-                # Extract batch number from filename
-                batch_num = int(batch_file.split('_')[-1].split('.')[0])
-                
-                # Add batch info to each task
-                for task in batch_data:
-                    task['_batch_num'] = batch_num
-                    # Add a hash of the conversation text to help with matching
-                    conversation = task.get("data", {}).get("conversation", task.get("conversation", []))
-                    conv_text = "\n".join(
-                        turn["text"] for turn in conversation
-                    )
-                    task["_conv_hash"] = hash(conv_text)
-                    tasks.append(task)
-            except json.JSONDecodeError:
-                print(f"Warning: Failed to parse {batch_file}")
-                continue
-    
+    for batch_num in catalog.batches():
+        tasks.extend(catalog.load_batch(batch_num))
     return tasks
 
-def map_annotators_to_batches() -> Dict[str, List[dict]]:
-    """Create a mapping of annotator -> list of their assigned tasks from batch files."""
-    # Map of annotator name -> batch number based on filename convention
-    annotator_batches = {
-        'ahmet': 1,
-        'anka': 2,
-        'cedricwhitney': 3,
-        'dayeon': 4,
-        'megan': 5,
-        'niloofar': 6,
-        'shayne': 7,
-        'victor': 8,
-        'wenting': 9,
-        'yuntian': 10,
-        'zhiping': 11,
-        'advisor': 12
-    }
-    
-    # Load each batch and map to annotator
+def map_annotators_to_batches(
+    annotators: Optional[Iterable[str]] = None,
+    catalog: Optional[BatchCatalog] = None
+) -> Dict[str, List[dict]]:
+    """
+    Create a mapping of annotator -> list of their assigned tasks from batch files.
+    Annotator names may be export or Label Studio usernames; by default every rater
+    with a batch is mapped under their lowercased name.
+    """
+    catalog = catalog or get_catalog()
+    if annotators is None:
+        annotators = [entry.assignee.lower() for entry in catalog.batches().values() if entry.assignee]
+
     annotator_tasks = {}
-    for annotator, batch_num in annotator_batches.items():
-        batch_file = f"data/batch_{batch_num}.json"
-        try:
-            with open(batch_file, 'r') as f:
-                batch_data = json.load(f)
-                # Add batch info to each task
-                for task in batch_data:
-                    task['_batch_num'] = batch_num
-                    # Add a hash of the conversation text to help with matching
-                    conversation = task.get("data", {}).get("conversation", task.get("conversation", []))
-                    conv_text = "\n".join(
-                        turn["text"] for turn in conversation
-                    )
-                    task["_conv_hash"] = hash(conv_text)
-                annotator_tasks[annotator] = batch_data
-        except (json.JSONDecodeError, FileNotFoundError) as e:
-            print(f"Warning: Failed to load batch {batch_num} for {annotator}: {e}")
+    for annotator in annotators:
+        batch_num = catalog.batch_for(annotator)
+        if batch_num is None:
+            print(f"Warning: No batch assigned to {annotator}")
             continue
+        annotator_tasks[annotator] = catalog.load_batch(batch_num)
     
     return annotator_tasks
 
-def get_latest_annotations(exports_dir: str = "annotator_exports") -> Dict[str, Dict[str, Tuple[dict, datetime]]]:
+def load_latest_from_export(json_file: str) -> Tuple[Optional[str], Dict[str, Tuple[Annotation, datetime]]]:
     """
-    Get the most recent annotation for each task by each annotator.
-    Returns: Dict[annotator_name, Dict[task_hash, (annotation, timestamp)]]
+    Parse one annotator export into the latest annotation for each conversation.
+    Tasks are streamed one at a time, so memory does not grow with the export size.
+    Returns: (annotator_name, Dict[conversation_fingerprint, (annotation, timestamp)]),
+    or (None, {}) if the file is not a metadata-wrapped export.
+    """
+    latest_annotations = {}
+    parsed_tasks = []
+    
+    with ExportReader(json_file) as reader:
+        if reader.format != 'wrapped':
+            return None, {}
+            
+        # Process each task's annotations
+        for task in reader:
+            if not task.get('annotations'):
+                continue
+                
+            # Find the latest annotation for this task
+            latest_timestamp = None
+            latest_annotation = None
+            
+            for annotation in task['annotations']:
+                timestamp = datetime.fromisoformat(annotation['created_at'].rstrip('Z'))
+                if latest_timestamp is None or timestamp > latest_timestamp:
+                    latest_timestamp = timestamp
+                    latest_annotation = annotation
+            
+            if latest_annotation and latest_timestamp:
+                latest_annotation['task'] = task['id']
+                # The reader already fingerprinted the conversation before dropping it
+                parsed_tasks.append((task['_conv_hash'], latest_annotation, latest_timestamp))
+        
+        # Metadata may follow the task array, so only read it once the file is consumed
+        annotator = reader.header['metadata']['annotator']
+    
+    for conv_hash, latest_annotation, latest_timestamp in parsed_tasks:
+        latest_annotation['_annotator'] = annotator
+        parsed, _ = parse_annotation(latest_annotation)
+        latest_annotations[conv_hash] = (parsed, latest_timestamp)
+    
+    return annotator, latest_annotations
+
+def resolve_workers(workers: Optional[int]) -> int:
+    """Number of worker processes to use; 0 or None means one per CPU core."""
+    if not workers:
+        return os.cpu_count() or 1
+    return max(1, workers)
+
+def map_files(
+    func: Callable[..., Any],
+    calls: List[Tuple],
+    workers: int = 1
+) -> Iterator[Tuple[Tuple, Any, Optional[Exception]]]:
+    """
+    Run func(*args) for each argument tuple (typically one per file), in a process pool
+    when workers > 1. Yields (args, result, error) in input order; errors are returned
+    rather than raised so one bad file does not abort the whole ingest.
+    """
+    workers = min(resolve_workers(workers), len(calls))
+    if workers <= 1:
+        for args in calls:
+            try:
+                yield args, func(*args), None
+            except Exception as e:
+                yield args, None, e
+        return
+    
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(func, *args) for args in calls]
+        for args, future in zip(calls, futures):
+            try:
+                yield args, future.result(), None
+            except Exception as e:
+                yield args, None, e
+
+def get_latest_annotations(
+    exports_dir: str = "annotator_exports",
+    cache: Optional[ExportCache] = None,
+    workers: int = 1
+) -> Dict[str, Dict[str, Tuple[Annotation, datetime]]]:
+    """
+    Get the most recent annotation for each task by each annotator, already parsed.
+    Exports whose size, mtime or content are unchanged are served from the cache if given;
+    the rest are decoded and parsed in parallel across `workers` processes.
+    Returns: Dict[annotator_name, Dict[conversation_fingerprint, (annotation, timestamp)]]
     """
     latest_annotations = {}
     
     json_files = glob.glob(f"{exports_dir}/*.json")
+    payloads = {}
     for json_file in json_files:
-        try:
-            with open(json_file, 'r') as f:
-                data = json.load(f)
-                if 'metadata' not in data or 'annotations' not in data:
-                    continue
-                    
-                annotator = data['metadata']['annotator']
-                if annotator not in latest_annotations:
-                    latest_annotations[annotator] = {}
-                
-                # Process each task's annotations
-                for task in data['annotations']:
-                    if not task.get('annotations'):
-                        continue
-                        
-                    # Get conversation hash for matching
-                    conversation = task.get("data", {}).get("conversation", [])
-                    conv_text = "\n".join(
-                        turn["text"] for turn in conversation
-                    )
-                    conv_hash = hash(conv_text)
-                    
-                    # Find the latest annotation for this task
-                    latest_timestamp = None
-                    latest_annotation = None
-                    
-                    for annotation in task['annotations']:
-                        timestamp = datetime.fromisoformat(annotation['created_at'].rstrip('Z'))
-                        if latest_timestamp is None or timestamp > latest_timestamp:
-                            latest_timestamp = timestamp
-                            latest_annotation = annotation
-                            # Add task data and annotator to the annotation
-                            latest_annotation['task'] = task['id']
-                            latest_annotation['data'] = task['data']
-                            latest_annotation['_annotator'] = annotator
-                    
-                    if latest_annotation and latest_timestamp:
-                        latest_annotations[annotator][conv_hash] = (latest_annotation, latest_timestamp)
-        except (json.JSONDecodeError, KeyError) as e:
-            print(f"Warning: Failed to process {json_file}: {e}")
+        payload = cache.get(json_file) if cache is not None else None
+        if payload is not None:
+            payloads[json_file] = payload
+    
+    pending = [json_file for json_file in json_files if json_file not in payloads]
+    for (json_file,), payload, error in map_files(load_latest_from_export, [(f,) for f in pending], workers):
+        if error is not None:
+            if not isinstance(error, (json.JSONDecodeError, KeyError)):
+                raise error
+            print(f"Warning: Failed to process {json_file}: {error}")
             continue
+        payloads[json_file] = payload
+        if cache is not None:
+            cache.put(json_file, payload)
+    
+    # Merge in directory order so the result does not depend on which files were cached
+    for json_file in json_files:
+        if json_file not in payloads:
+            continue
+        annotator, file_annotations = payloads[json_file]
+        if annotator is None:
+            continue
+        if annotator not in latest_annotations:
+            latest_annotations[annotator] = {}
+        latest_annotations[annotator].update(file_annotations)
     
     return latest_annotations
 
-def match_annotations(annotator_tasks: Dict[str, List[dict]], latest_annotations: Dict[str, Dict[str, Tuple[dict, datetime]]]) -> List[Task]:
-    """Match annotations with their original tasks and create Task objects."""
+def index_annotations(latest_annotations: Dict[str, Dict[str, Tuple[Annotation, datetime]]]) -> Dict[str, List[Annotation]]:
+    """Invert annotator -> conversation fingerprint -> annotation into fingerprint -> annotations, in one pass."""
+    index: Dict[str, List[Annotation]] = {}
+    for ann_tasks in latest_annotations.values():
+        for conv_hash, (annotation, _) in ann_tasks.items():
+            # Skip empty annotations and ones with no completed categories
+            if not any(annotation.completed_categories.values()):
+                continue
+            index.setdefault(conv_hash, []).append(annotation)
+    return index
+
+def match_annotations(annotator_tasks: Dict[str, List[dict]], latest_annotations: Dict[str, Dict[str, Tuple[Annotation, datetime]]]) -> List[Task]:
+    """Match annotations with their original tasks and create one Task per annotated conversation."""
     tasks = []
+    annotations_by_hash = index_annotations(latest_annotations)
+    emitted: Set[str] = set()
     
     # For each annotator's assigned tasks
     for annotator, assigned_tasks in annotator_tasks.items():
@@ -274,22 +292,14 @@ def match_annotations(annotator_tasks: Dict[str, List[dict]], latest_annotations
             conv_hash = task['_conv_hash']
             batch_num = task['_batch_num']
             
-            # Find all annotators who have annotated this task
-            task_annotations = []
-            for ann_name, ann_tasks in latest_annotations.items():
-                if conv_hash in ann_tasks:
-                    raw_annotation, _ = ann_tasks[conv_hash]
-                    # Skip empty annotations
-                    if not raw_annotation.get('result'):
-                        continue
-                    annotation, completed_categories = parse_annotation(raw_annotation)
-                    # Skip annotations with no completed categories
-                    if not any(completed_categories.values()):
-                        continue
-                    task_annotations.append(annotation)
+            # A task assigned to several annotators is emitted under its first assignment only
+            if conv_hash in emitted:
+                continue
+            task_annotations = annotations_by_hash.get(conv_hash, [])
             
             # Only include tasks with at least 2 annotators
             if len(task_annotations) >= 2:
+                emitted.add(conv_hash)
                 # Create a task ID that reflects its position in the batch
                 task_id = f"batch_{batch_num}_task_{task_idx + 1}"  # 1-based indexing for display
                 tasks.append(Task(
@@ -300,15 +310,23 @@ def match_annotations(annotator_tasks: Dict[str, List[dict]], latest_annotations
     
     return tasks
 
-def analyze_agreement(exports_dir: str = "annotator_exports") -> List[Task]:
+def analyze_agreement(
+    exports_dir: str = "annotator_exports",
+    cache: Optional[ExportCache] = None,
+    workers: int = 1
+) -> List[Task]:
     """Main function to analyze agreement between annotators."""
-    # Step 1: Map annotators to their batch tasks
-    print("Mapping annotators to batch tasks...")
-    annotator_tasks = map_annotators_to_batches()
-    
-    # Step 2: Get latest annotations for each task
+    # Step 1: Get latest annotations for each task
     print("Getting latest annotations...")
-    latest_annotations = get_latest_annotations(exports_dir)
+    latest_annotations = get_latest_annotations(exports_dir, cache, workers)
+    if cache is not None:
+        cache.flush()
+        print(f"Reused {cache.hits} cached export(s), parsed {cache.misses}")
+    
+    # Step 2: Map annotators to their batch tasks
+    print("Mapping annotators to batch tasks...")
+    catalog = get_catalog(cache_dir=str(cache.cache_dir) if cache is not None else None)
+    annotator_tasks = map_annotators_to_batches(latest_annotations, catalog)
     
     # Step 3: Match annotations with tasks
     print("Matching annotations with tasks...")
@@ -341,105 +359,47 @@ def filter_dual_annotated_tasks(tasks: List[Task]) -> List[Task]:
         task.annotations[0].annotator_id != task.annotations[1].annotator_id
     ]
 
-def analyze_completion_rates(tasks: List[Task]) -> CompletionStats:
+def analyze_completion_rates(tasks: List[Task], frame: Optional[AnnotationFrame] = None) -> CompletionStats:
     """Analyze completion rates and missing annotations across all tasks."""
-    # Initialize counters
-    total_tasks = len(tasks)
-    total_turns = 0
-    category_counts: Dict[AnnotationCategory, int] = {cat: 0 for cat in AnnotationCategory}
-    annotator_counts: Dict[str, Dict[AnnotationCategory, int]] = {}
-    missing_annotations: List[MissingAnnotation] = []
-    
-    # Track expected counts
-    category_expected: Dict[AnnotationCategory, int] = {cat: 0 for cat in AnnotationCategory}
-    annotator_expected: Dict[str, Dict[AnnotationCategory, int]] = {}
-    
-    for task in tasks:
-        # Count total turns
-        conversation = task.original_data.get("data", {}).get("conversation", task.original_data.get("conversation", []))
-        total_turns += len(conversation)
-        
-        # Get all annotators
-        for annotation in task.annotations:
-            if annotation.annotator_id not in annotator_counts:
-                annotator_counts[annotation.annotator_id] = {cat: 0 for cat in AnnotationCategory}
-                annotator_expected[annotation.annotator_id] = {cat: 0 for cat in AnnotationCategory}
-        
-        # For each turn, check what categories should be present
-        for turn_idx in range(len(conversation)):
-            is_response = turn_idx % 2 == 1
-            
-            # Determine required categories for this turn
-            required_categories = {
-                AnnotationCategory.MEDIA_FORMAT,
-                AnnotationCategory.TOPIC,
-                AnnotationCategory.RESTRICTED_FLAGS
-            }
-            
-            if is_response:
-                required_categories.update({
-                    AnnotationCategory.ANSWER_FORM,
-                    AnnotationCategory.SELF_DISCLOSURE
-                })
-            else:
-                required_categories.update({
-                    AnnotationCategory.FUNCTION_PURPOSE,
-                    AnnotationCategory.MULTI_TURN_RELATIONSHIP,
-                    AnnotationCategory.ANTHROPOMORPHIZATION
-                })
-            
-            # Update expected counts
-            for category in required_categories:
-                category_expected[category] += len(task.annotations)
-                for annotation in task.annotations:
-                    annotator_expected[annotation.annotator_id][category] += 1
-            
-            # Check what's actually present
-            for annotation in task.annotations:
-                completed = (
-                    annotation.completed_categories.get(turn_idx, set()) 
-                    if hasattr(annotation, 'completed_categories') 
-                    else set()
-                )
-                
-                # Update completion counts
-                for category in completed:
-                    if category in required_categories:
-                        category_counts[AnnotationCategory(category)] += 1
-                        annotator_counts[annotation.annotator_id][AnnotationCategory(category)] += 1
-                
-                # Track missing categories
-                for category in required_categories:
-                    if category.value not in completed:
-                        missing_annotations.append(MissingAnnotation(
-                            task_id=task.task_id,
-                            turn_idx=turn_idx,
-                            category=category,
-                            annotator_id=annotation.annotator_id,
-                            is_response=is_response
-                        ))
-    
-    # Calculate completion rates
-    completion_by_category = {
-        cat: (count / category_expected[cat] if category_expected[cat] > 0 else 0.0)
-        for cat, count in category_counts.items()
-    }
-    
-    completion_by_annotator = {
-        annotator_id: {
-            cat: (count / annotator_expected[annotator_id][cat] 
-                  if annotator_expected[annotator_id][cat] > 0 else 0.0)
-            for cat, count in counts.items()
+    if frame is None:
+        frame = AnnotationFrame.from_tasks(tasks)
+    categories = frame.categories
+    n_annotators, n_categories = len(frame.annotator_ids), len(categories)
+
+    # Categories each prompt (row 0) and response (row 1) should be labelled with
+    required = np.zeros((2, n_categories), dtype=bool)
+    for role, is_response in ((ROLE_PROMPT, False), (ROLE_RESPONSE, True)):
+        for category in get_applicable_categories(is_response):
+            required[role, categories.index(category)] = True
+
+    # Every cell that should be labelled, and whether it was
+    task, annotator, turn, category = frame.expected_cells(required)
+    done = np.isin(frame.pack_cells(task, annotator, turn, category), frame.cell_keys())
+
+    expected = np.zeros((n_annotators, n_categories), dtype=np.int64)
+    completed = np.zeros((n_annotators, n_categories), dtype=np.int64)
+    np.add.at(expected, (annotator, category), 1)
+    np.add.at(completed, (annotator[done], category[done]), 1)
+
+    def rates(counts: np.ndarray, totals: np.ndarray) -> Dict[AnnotationCategory, float]:
+        return {
+            cat: (int(counts[idx]) / int(totals[idx]) if totals[idx] > 0 else 0.0)
+            for idx, cat in enumerate(categories)
         }
-        for annotator_id, counts in annotator_counts.items()
-    }
-    
+
+    missing = ~done
     return CompletionStats(
-        total_tasks=total_tasks,
-        total_turns=total_turns,
-        completion_by_category=completion_by_category,
-        completion_by_annotator=completion_by_annotator,
-        missing_annotations=missing_annotations
+        total_tasks=len(tasks),
+        total_turns=int(frame.task_turn_counts.sum()),
+        completion_by_category=rates(completed.sum(axis=0), expected.sum(axis=0)),
+        completion_by_annotator={
+            annotator_id: rates(completed[idx], expected[idx])
+            for idx, annotator_id in enumerate(frame.annotator_ids)
+        },
+        missing_annotations=MissingAnnotations(
+            task[missing], turn[missing], category[missing], annotator[missing],
+            frame.task_ids, frame.annotator_ids, categories
+        )
     )
 
 def format_completion_report(stats: CompletionStats) -> str:
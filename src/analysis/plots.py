@@ -0,0 +1,94 @@
+import hashlib
+import json
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, NamedTuple
+
+import numpy as np
+
+from .cache import _atomic_write
+from .load import resolve_workers
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Bump whenever a plotting function draws differently, so every figure is redrawn once
+PLOT_VERSION = 1
+
+MANIFEST_FILE = "plot_manifest.json"
+
+class PlotJob(NamedTuple):
+    """One figure to draw: render(data, f"{output_dir}/{name}", **options)."""
+    name: str  # File name within the output directory
+    render: Callable  # Module-level function, so jobs can be sent to worker processes
+    data: 'pd.DataFrame'
+    options: Dict[str, Any]
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, np.ndarray):
+        return {'dtype': str(value.dtype), 'values': value.tolist()}
+    if isinstance(value, np.generic):
+        return value.item()
+    return repr(value)
+
+def plot_digest(job: PlotJob) -> str:
+    """
+    Digest of everything that determines a figure: the plotting function, its options
+    and the DataFrame's values, index, columns and dtypes.
+    """
+    import pandas as pd
+    digest = hashlib.sha256()
+    header = {
+        'version': PLOT_VERSION,
+        'render': f"{job.render.__module__}.{job.render.__qualname__}",
+        'options': job.options,
+        'columns': [str(column) for column in job.data.columns],
+        'dtypes': [str(dtype) for dtype in job.data.dtypes]
+    }
+    digest.update(json.dumps(header, sort_keys=True, default=_jsonable).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(job.data, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+def _init_worker():
+    # Worker processes only save figures to files, so no GUI backend is needed
+    import matplotlib
+    matplotlib.use('Agg')
+
+def _render(job: PlotJob, output_dir: str):
+    job.render(job.data, f"{output_dir}/{job.name}", **job.options)
+
+def render_plots(jobs: List[PlotJob], output_dir: str, workers: int = 1) -> List[str]:
+    """
+    Draw the figures whose input changed since the last run into output_dir and return
+    their names. Each figure's plot_digest is recorded in plot_manifest.json; figures
+    whose digest matches and whose file still exists are skipped. The rest are drawn
+    across `workers` processes (0 = one per CPU core), whose backend is set to Agg;
+    drawing in the calling process leaves its backend unchanged.
+    """
+    manifest_path = Path(output_dir) / MANIFEST_FILE
+    try:
+        with open(manifest_path, 'r') as f:
+            previous = json.load(f)
+        if previous.get('version') != PLOT_VERSION:
+            previous = {}
+    except (FileNotFoundError, json.JSONDecodeError, AttributeError):
+        previous = {}
+    previous_digests = previous.get('plots', {})
+
+    digests = {job.name: plot_digest(job) for job in jobs}
+    pending = [
+        job for job in jobs
+        if previous_digests.get(job.name) != digests[job.name] or not (Path(output_dir) / job.name).exists()
+    ]
+
+    workers = min(resolve_workers(workers), len(pending))
+    if workers <= 1:
+        for job in pending:
+            _render(job, output_dir)
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+            list(executor.map(_render, pending, [output_dir] * len(pending)))
+
+    payload = json.dumps({'version': PLOT_VERSION, 'plots': digests}, indent=2)
+    _atomic_write(manifest_path, payload.encode('utf-8'), public=True)
+    return [job.name for job in pending]
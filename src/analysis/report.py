@@ -1,16 +1,48 @@
-from typing import Dict, List, Set
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Set, Tuple
 import json
+import math
 from pathlib import Path
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
+import numpy as np
 
-from .types import Task, AnnotationCategory, AgreementScore, AgreementReport
-from .agreement import calculate_agreement_scores, find_lowest_agreement_categories
+from .types import Task, AnnotationCategory, AgreementScore, AgreementReport, DisagreementExample, MissingAnnotation
+from .agreement import CellScores, calculate_agreement_scores, cell_scores, find_lowest_agreement_categories, rater_pairs, score_cell_pairs
+from .alpha import krippendorff_alpha
+from .bootstrap import bootstrap_agreement
+from .columnar import write_columnar_tables, write_table
+from .dashboard import write_dashboard
+from .confusion import LabelMatrix, label_matrices
+from .label_agreement import label_agreement
+from .annotators import AnnotatorMatrix, annotator_matrices
+from .frame import AnnotationFrame
 from .load import validate_annotations, analyze_completion_rates
+from .plots import PlotJob, render_plots
+from .shards import INDEX_FILE, SHARD_ROWS, ShardWriter
 
-def generate_agreement_matrix(scores_by_category: Dict[AnnotationCategory, Dict[int, List[AgreementScore]]]) -> pd.DataFrame:
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Directory, within the output directory, of the detailed report's JSON Lines shards
+SHARDS_DIR = "detailed_report"
+
+def _plotting():
+    """
+    A factory of Agg-backed figures and seaborn, imported on first use: together they
+    take most of this module's import time. Figures are not registered with pyplot, so
+    drawing them leaves the caller's backend and open figures alone.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    import seaborn as sns
+
+    def figure(figsize: Tuple[float, float]) -> Figure:
+        fig = Figure(figsize=figsize)
+        FigureCanvasAgg(fig)
+        return fig
+    return figure, sns
+
+def generate_agreement_matrix(scores_by_category: Dict[AnnotationCategory, Dict[int, List[AgreementScore]]]) -> 'pd.DataFrame':
     """Generate a matrix of agreement scores by category and turn."""
+    import pandas as pd
     data = []
     
     for category in AnnotationCategory:
@@ -41,8 +73,9 @@ def generate_agreement_matrix(scores_by_category: Dict[AnnotationCategory, Dict[
     else:
         return df
 
-def generate_overall_agreement_table(overall_scores: Dict[AnnotationCategory, List[AgreementScore]]) -> pd.DataFrame:
+def generate_overall_agreement_table(overall_scores: Dict[AnnotationCategory, List[AgreementScore]]) -> 'pd.DataFrame':
     """Generate a table of overall agreement scores by category."""
+    import pandas as pd
     data = []
     
     for category in AnnotationCategory:
@@ -60,62 +93,217 @@ def generate_overall_agreement_table(overall_scores: Dict[AnnotationCategory, Li
         
     return pd.DataFrame(data).sort_values('Overall Agreement Score', ascending=False)
 
-def plot_agreement_heatmap(matrix: pd.DataFrame, output_path: str = "agreement_heatmap.png"):
-    """Generate a heatmap visualization of agreement scores."""
-    plt.figure(figsize=(12, 8))
+def plot_heatmap(
+    matrix: 'pd.DataFrame',
+    output_path: str,
+    title: str,
+    empty_message: str = 'No agreement data available',
+    figsize: Tuple[float, float] = (12, 8),
+    **heatmap_kwargs
+):
+    """Save a seaborn heatmap of a matrix, or a placeholder if it is empty."""
+    figure, sns = _plotting()
+    fig = figure(figsize)
+    ax = fig.subplots()
     
     # Only create heatmap if we have data
     if not matrix.empty and not matrix.columns.empty:
-        sns.heatmap(
-            matrix,
-            annot=True,
-            cmap='RdYlGn',
-            vmin=0,
-            vmax=1,
-            center=0.5,
-            fmt='.2f'
-        )
-        plt.title('Inter-rater Agreement Scores by Category and Turn')
+        sns.heatmap(matrix, ax=ax, **heatmap_kwargs)
+        ax.set_title(title)
     else:
-        plt.text(0.5, 0.5, 'No agreement data available',
+        ax.text(0.5, 0.5, empty_message,
                 horizontalalignment='center',
                 verticalalignment='center')
-        plt.title('No Agreement Data')
+        ax.set_title('No Agreement Data')
     
-    plt.tight_layout()
-    plt.savefig(output_path)
-    plt.close()
+    fig.tight_layout()
+    fig.savefig(output_path)
+
+def plot_agreement_heatmap(matrix: 'pd.DataFrame', output_path: str = "agreement_heatmap.png"):
+    """Generate a heatmap visualization of agreement scores."""
+    plot_heatmap(
+        matrix,
+        output_path,
+        'Inter-rater Agreement Scores by Category and Turn',
+        annot=True,
+        cmap='RdYlGn',
+        vmin=0,
+        vmax=1,
+        center=0.5,
+        fmt='.2f'
+    )
+
+def label_matrix_table(matrix: LabelMatrix) -> 'pd.DataFrame':
+    """Label-by-label counts as a DataFrame indexed by label on both axes."""
+    import pandas as pd
+    return pd.DataFrame(matrix.counts, index=matrix.labels, columns=matrix.labels)
+
+def write_label_matrices(matrices: Dict[str, Dict[AnnotationCategory, LabelMatrix]], output_dir: str) -> List[PlotJob]:
+    """
+    Save each label matrix with write_table as {kind}_{category}.parquet (or .csv.gz
+    without pyarrow), its row labels in a leading 'label' column. Returns the
+    {kind}_{category}.png heatmaps to draw with render_plots.
+    """
+    titles = {
+        'confusion': 'Label Confusion Between Annotators',
+        'cooccurrence': 'Label Co-occurrence Within Annotations'
+    }
+    jobs = []
+    for kind, by_category in matrices.items():
+        for category, matrix in by_category.items():
+            table = label_matrix_table(matrix)
+            path = f"{output_dir}/{kind}_{category.value}"
+            write_table(table.rename_axis('label').reset_index(), path)
+            size = max(8, 0.35 * len(matrix.labels) + 4)
+            jobs.append(PlotJob(f"{kind}_{category.value}.png", plot_heatmap, table, {
+                'title': f"{titles.get(kind, kind)}: {category.value}",
+                'figsize': (size, size),
+                'annot': len(matrix.labels) <= 20,
+                'fmt': 'd',
+                'cmap': 'Blues',
+                'square': True
+            }))
+    return jobs
 
-def plot_overall_agreement_bars(overall_scores: pd.DataFrame, output_path: str = "overall_agreement.png"):
+def plot_overall_agreement_bars(overall_scores: 'pd.DataFrame', output_path: str = "overall_agreement.png"):
     """Generate a bar plot of overall agreement scores."""
-    plt.figure(figsize=(12, 6))
+    figure, sns = _plotting()
+    fig = figure((12, 6))
+    ax = fig.subplots()
     sns.barplot(
         data=overall_scores,
         x='Category',
         y='Overall Agreement Score',
-        color='skyblue'
+        color='skyblue',
+        ax=ax
     )
-    plt.xticks(rotation=45, ha='right')
-    plt.title('Overall Inter-rater Agreement Scores by Category')
-    plt.tight_layout()
-    plt.savefig(output_path)
-    plt.close()
+    for label in ax.get_xticklabels():
+        label.set_rotation(45)
+        label.set_horizontalalignment('right')
+    ax.set_title('Overall Inter-rater Agreement Scores by Category')
+    fig.tight_layout()
+    fig.savefig(output_path)
 
-def generate_report(tasks: List[Task], output_dir: str = "reports") -> AgreementReport:
-    """Generate a comprehensive agreement report."""
+def write_annotator_matrices(matrices: Dict[AnnotationCategory, AnnotatorMatrix], output_dir: str) -> List[PlotJob]:
+    """
+    Save each category's annotator-by-annotator mean F1 and overlap counts as
+    annotator_agreement_{category}.csv / annotator_overlap_{category}.csv. Returns the
+    annotator_agreement_{category}.png heatmaps of agreement, annotated with the
+    overlap counts, to draw with render_plots.
+    """
+    import pandas as pd
+    jobs = []
+    for category, matrix in matrices.items():
+        agreement = pd.DataFrame(matrix.agreement, index=matrix.annotators, columns=matrix.annotators)
+        overlap = pd.DataFrame(matrix.overlap, index=matrix.annotators, columns=matrix.annotators)
+        agreement.to_csv(f"{output_dir}/annotator_agreement_{category.value}.csv")
+        overlap.to_csv(f"{output_dir}/annotator_overlap_{category.value}.csv")
+        labels = [
+            [f"{score:.2f}\n({count})" if count else '' for score, count in zip(scores, counts)]
+            for scores, counts in zip(matrix.agreement.tolist(), matrix.overlap.tolist())
+        ]
+        jobs.append(PlotJob(f"annotator_agreement_{category.value}.png", plot_heatmap, agreement, {
+            'title': f"Agreement Between Annotators: {category.value}",
+            'figsize': (max(8, len(matrix.annotators) + 2), max(6, len(matrix.annotators))),
+            'annot': np.array(labels, dtype=object),
+            'fmt': '',
+            'cmap': 'RdYlGn',
+            'vmin': 0,
+            'vmax': 1,
+            'center': 0.5,
+            'square': True
+        }))
+    return jobs
+
+def disagreement_rows(examples: Iterable[DisagreementExample]) -> Iterator[dict]:
+    """detailed_report rows of disagreement examples; conversation text is looked up one example at a time."""
+    for ex in examples:
+        yield {
+            'task_id': ex.task_id,
+            'turn': ex.turn_idx + 1,  # Convert to 1-based indexing for display
+            'category': ex.category.value,
+            'annotator1': {
+                'id': ex.annotator1_id,
+                'values': sorted(ex.annotator1_values)
+            },
+            'annotator2': {
+                'id': ex.annotator2_id,
+                'values': sorted(ex.annotator2_values)
+            },
+            'conversation_text': ex.conversation_text,
+            'f1_score': ex.f1_score
+        }
+
+def missing_annotation_rows(missing_annotations: Iterable[MissingAnnotation]) -> Iterator[dict]:
+    for missing in missing_annotations:
+        yield {
+            'task_id': missing.task_id,
+            'turn': missing.turn_idx + 1,
+            'category': missing.category.value,
+            'annotator_id': missing.annotator_id,
+            'is_response': missing.is_response
+        }
+
+def cell_score_rows(scores: CellScores, frame: AnnotationFrame, chunk_rows: int = SHARD_ROWS) -> Iterator[dict]:
+    """detailed_report rows of per-cell scores, converted from the score columns a chunk at a time."""
+    task_ids, annotator_ids = frame.task_ids, frame.annotator_ids
+    categories = [category.value for category in frame.categories]
+    for start in range(0, len(scores.f1_score), chunk_rows):
+        chunk = [column[start:start + chunk_rows].tolist() for column in scores]
+        for task, turn, category, annotator1, annotator2, f1 in zip(*chunk):
+            yield {
+                'task_id': task_ids[task],
+                'turn': turn + 1,
+                'category': categories[category],
+                'annotator1': annotator_ids[annotator1],
+                'annotator2': annotator_ids[annotator2],
+                'f1_score': f1
+            }
+
+def generate_report(
+    tasks: List[Task],
+    output_dir: str = "reports",
+    bootstrap_resamples: int = 1000,
+    workers: int = 1,
+    overall: str = 'union',
+    plots: bool = True,
+    shard_rows: int = SHARD_ROWS,
+    columnar: bool = False,
+    dashboard: bool = True
+) -> AgreementReport:
+    """
+    Generate a comprehensive agreement report. Agreement is reported with bootstrap
+    confidence intervals from bootstrap_resamples resamples of the tasks, drawn across
+    `workers` processes (0 = one per CPU core). overall picks how turns aggregate into
+    overall category scores (see calculate_agreement_scores). Figures are drawn across
+    the same workers and skipped when their input data is unchanged since the last run
+    into output_dir (see render_plots). With plots unset no .png is drawn and matplotlib
+    is never imported; the JSON and CSV outputs are unchanged.
+
+    detailed_report.json holds the summary only. Disagreement examples, missing
+    annotations and per-cell scores are streamed to JSON Lines shards of shard_rows
+    rows under detailed_report/, listed in detailed_report/index.json. With columnar
+    set, the same data is also written as typed tables under tables/ (see
+    write_columnar_tables). With dashboard set, report.html summarizes the report and
+    pages through the disagreement examples (see write_dashboard).
+    """
     # Ensure output directory exists
     Path(output_dir).mkdir(parents=True, exist_ok=True)
     
     # Calculate agreement scores
-    scores_by_category, overall_scores, disagreement_examples = calculate_agreement_scores(tasks)
+    frame = AnnotationFrame.from_tasks(tasks)
+    # Every measure below reads the same per-cell F1 scores, so cell pairs are scored once
+    pairs = score_cell_pairs(frame)
+    scores_by_category, overall_scores, disagreement_examples, disagreement_counts = calculate_agreement_scores(
+        tasks, frame=frame, overall=overall, pairs=pairs, return_counts=True
+    )
+    alpha_scores = krippendorff_alpha(tasks, frame=frame, pairs=pairs)
+    category_intervals, turn_intervals = bootstrap_agreement(
+        tasks, n_resamples=bootstrap_resamples, workers=workers, frame=frame, pairs=pairs
+    )
     
     # Get annotator pairs
-    annotator_pairs = list({
-        (ann1.annotator_id, ann2.annotator_id)
-        for task in tasks
-        if len(task.annotations) >= 2
-        for ann1, ann2 in [(task.annotations[0], task.annotations[1])]
-    })
+    annotator_pairs = rater_pairs(tasks)
     
     # Find problematic tasks
     missing_annotations = validate_annotations(tasks)
@@ -125,14 +313,16 @@ def generate_report(tasks: List[Task], output_dir: str = "reports") -> Agreement
     
     # Generate agreement matrix and plot
     matrix = generate_agreement_matrix(scores_by_category)
-    plot_agreement_heatmap(matrix, f"{output_dir}/agreement_heatmap.png")
     
     # Generate overall agreement table and plot
     overall_table = generate_overall_agreement_table(overall_scores)
-    plot_overall_agreement_bars(overall_table, f"{output_dir}/overall_agreement.png")
+    plot_jobs = [
+        PlotJob("agreement_heatmap.png", plot_agreement_heatmap, matrix, {}),
+        PlotJob("overall_agreement.png", plot_overall_agreement_bars, overall_table, {})
+    ]
     
     # Calculate completion stats
-    completion_stats = analyze_completion_rates(tasks)
+    completion_stats = analyze_completion_rates(tasks, frame=frame)
     
     # Create report object
     report = AgreementReport(
@@ -144,10 +334,15 @@ def generate_report(tasks: List[Task], output_dir: str = "reports") -> Agreement
         lowest_agreement_categories=lowest_by_turn,
         lowest_agreement_overall=[(cat, score) for cat, score in lowest_overall],
         disagreement_examples=disagreement_examples,
-        completion_stats=completion_stats
+        completion_stats=completion_stats,
+        alpha_scores=alpha_scores,
+        category_intervals=category_intervals,
+        turn_intervals=turn_intervals,
+        disagreement_counts=disagreement_counts
     )
     
-    # Save detailed report as JSON
+    # Save the summary as JSON, then stream the large sections
+    per_cell = cell_scores(frame, pairs)
     with open(f"{output_dir}/detailed_report.json", 'w') as f:
         json.dump({
             'tasks_analyzed': report.tasks_analyzed,
@@ -156,7 +351,9 @@ def generate_report(tasks: List[Task], output_dir: str = "reports") -> Agreement
                 {
                     'category': cat.value,
                     'turn': turn,
-                    'score': score
+                    'score': score,
+                    'ci_low': turn_intervals[cat][turn].low,
+                    'ci_high': turn_intervals[cat][turn].high
                 }
                 for cat, turn, score in report.lowest_agreement_categories
             ],
@@ -167,24 +364,34 @@ def generate_report(tasks: List[Task], output_dir: str = "reports") -> Agreement
                 }
                 for cat, score in report.lowest_agreement_overall
             ],
-            'disagreement_examples': [
-                {
-                    'task_id': ex.task_id,
-                    'turn': ex.turn_idx + 1,  # Convert to 1-based indexing for display
-                    'category': ex.category.value,
-                    'annotator1': {
-                        'id': ex.annotator1_id,
-                        'values': list(ex.annotator1_values)
-                    },
-                    'annotator2': {
-                        'id': ex.annotator2_id,
-                        'values': list(ex.annotator2_values)
-                    },
-                    'conversation_text': ex.conversation_text,
-                    'f1_score': ex.f1_score
+            'confidence_intervals': {
+                'confidence': 0.95,
+                'resamples': bootstrap_resamples,
+                'by_category': {
+                    cat.value: interval._asdict()
+                    for cat, interval in category_intervals.items()
+                },
+                'by_turn': [
+                    {
+                        'category': cat.value,
+                        'turn': turn,
+                        **interval._asdict()
+                    }
+                    for cat, intervals in turn_intervals.items()
+                    for turn, interval in intervals.items()
+                ]
+            },
+            'krippendorff_alpha': {
+                cat.value: {
+                    'alpha': None if math.isnan(score.alpha) else score.alpha,
+                    'observed_disagreement': score.observed_disagreement,
+                    'expected_disagreement': score.expected_disagreement,
+                    'units': score.units,
+                    'values': score.values
                 }
-                for ex in disagreement_examples
-            ],
+                for cat, score in alpha_scores.items()
+            },
+            'disagreement_counts': {cat.value: count for cat, count in disagreement_counts.items()},
             'missing_annotations': report.missing_annotations,
             'completion_stats': {
                 'total_tasks': completion_stats.total_tasks,
@@ -199,23 +406,48 @@ def generate_report(tasks: List[Task], output_dir: str = "reports") -> Agreement
                         for cat, rate in rates.items()
                     }
                     for annotator_id, rates in completion_stats.completion_by_annotator.items()
-                },
-                'missing_annotations': [
-                    {
-                        'task_id': missing.task_id,
-                        'turn': missing.turn_idx + 1,
-                        'category': missing.category.value,
-                        'annotator_id': missing.annotator_id,
-                        'is_response': missing.is_response
-                    }
-                    for missing in completion_stats.missing_annotations
-                ]
+                }
+            },
+            # Large sections are streamed to JSON Lines shards listed in the index
+            'shards': f"{SHARDS_DIR}/{INDEX_FILE}",
+            'section_rows': {
+                'disagreement_examples': len(disagreement_examples),
+                'missing_annotations': len(completion_stats.missing_annotations),
+                'cell_scores': len(per_cell.f1_score)
             }
         }, f, indent=2)
+
+    with ShardWriter(f"{output_dir}/{SHARDS_DIR}", shard_rows) as writer:
+        writer.write_section('disagreement_examples', disagreement_rows(disagreement_examples))
+        writer.write_section('missing_annotations', missing_annotation_rows(completion_stats.missing_annotations))
+        writer.write_section('cell_scores', cell_score_rows(per_cell, frame))
+
+    if columnar:
+        write_columnar_tables(output_dir, frame, completion_stats.missing_annotations, overall_scores, pairs, per_cell)
     
     # Save agreement matrices as CSV
     matrix.to_csv(f"{output_dir}/agreement_matrix.csv")
     overall_table.to_csv(f"{output_dir}/overall_agreement.csv")
+
+    # Label-level confusion and co-occurrence per category
+    plot_jobs += write_label_matrices(label_matrices(tasks, frame=frame, pairs=pairs), output_dir)
+
+    # Agreement of every annotator pair per category
+    plot_jobs += write_annotator_matrices(annotator_matrices(tasks, frame=frame, pairs=pairs), output_dir)
+
+    # Per-label binary agreement, lowest kappa first within each category
+    import pandas as pd
+    label_table = pd.DataFrame(label_agreement(tasks, frame=frame, pairs=pairs)._asdict())
+    label_table.sort_values(['category', 'kappa', 'label'], na_position='last').to_csv(
+        f"{output_dir}/label_agreement.csv", index=False
+    )
+
+    # Figures last, drawn in parallel and only where their data changed
+    if plots:
+        render_plots(plot_jobs, output_dir, workers)
+
+    if dashboard:
+        write_dashboard(report, output_dir, f"{output_dir}/{SHARDS_DIR}", figures=plots)
     
     return report
 
@@ -231,9 +463,16 @@ def format_report_summary(report: AgreementReport) -> str:
     for category, score in report.lowest_agreement_overall:
         summary.append(f"- {category.value}: {score:.2f}")
     
+    if report.alpha_scores:
+        summary.append("\n## Krippendorff's Alpha (MASI distance)")
+        for category, score in report.alpha_scores.items():
+            summary.append(f"- {category.value}: {score.alpha:.2f} ({score.units} units)")
+
     summary.append("\n## Lowest Agreement Categories by Turn")
     for category, turn, score in report.lowest_agreement_categories:
-        summary.append(f"- {category.value} (Turn {turn + 1}): {score:.2f}")
+        interval = report.turn_intervals.get(category, {}).get(turn)
+        bounds = f" (95% CI {interval.low:.2f}-{interval.high:.2f})" if interval else ""
+        summary.append(f"- {category.value} (Turn {turn + 1}): {score:.2f}{bounds}")
     
     if report.disagreement_examples:
         # Group examples by category
@@ -258,7 +497,8 @@ def format_report_summary(report: AgreementReport) -> str:
             worst_examples = examples[:3]
             
             summary.append(f"\n### {category.value}")
-            summary.append(f"Found {len(examples)} significant disagreements. Here are the worst examples:")
+            count = report.disagreement_counts.get(category, len(examples))
+            summary.append(f"Found {count} significant disagreements. Here are the worst examples:")
             
             for ex in worst_examples:
                 summary.append(f"\n#### Task {ex.task_id}, Turn {ex.turn_idx + 1} (F1: {ex.f1_score:.2f})")
@@ -283,6 +523,43 @@ def format_report_summary(report: AgreementReport) -> str:
     summary.append("- overall_agreement.png: Bar plot of overall category agreement")
     summary.append("- agreement_matrix.csv: Detailed per-turn agreement scores")
     summary.append("- overall_agreement.csv: Overall agreement scores by category")
-    summary.append("- detailed_report.json: Complete analysis results with disagreement examples")
+    summary.append("- report.html: Dashboard of the summary tables with pageable disagreement examples (report_pages/)")
+    summary.append("- detailed_report.json: Summary of the analysis results")
+    summary.append("- detailed_report/: Disagreement examples, missing annotations and per-cell scores as JSON Lines shards, listed in index.json")
+    summary.append("- confusion_<category>.parquet/.csv.gz/.png: Which labels annotators chose against each other")
+    summary.append("- cooccurrence_<category>.parquet/.csv.gz/.png: Which labels annotators chose together")
+    summary.append("- annotator_agreement_<category>.csv/.png, annotator_overlap_<category>.csv: Agreement and overlap of every annotator pair")
+    summary.append("- label_agreement.csv: Per-label kappa, PABAK and positive/negative agreement by annotator pair")
+    summary.append("- tables/: Per-cell scores, per-pair scores, label assignments and missing annotations as Parquet or .csv.gz (with --columnar)")
+    summary.append("- plot_manifest.json: Input digest of every figure, used to skip unchanged figures on the next run")
     
     return "\n".join(summary)
+
+def report_summary_dict(report: AgreementReport) -> dict:
+    """The content of format_report_summary as a JSON-serializable dict, without example text."""
+    def optional(value: float):
+        return None if math.isnan(value) else value
+
+    return {
+        'tasks_analyzed': report.tasks_analyzed,
+        'annotator_pairs': len(report.annotator_pairs),
+        'overall_agreement': {category.value: score for category, score in report.lowest_agreement_overall},
+        'krippendorff_alpha': {
+            category.value: {'alpha': optional(score.alpha), 'units': score.units}
+            for category, score in report.alpha_scores.items()
+        },
+        'lowest_agreement_categories': [
+            {
+                'category': category.value,
+                'turn': turn + 1,
+                'score': score,
+                **({
+                    'ci_low': report.turn_intervals[category][turn].low,
+                    'ci_high': report.turn_intervals[category][turn].high
+                } if turn in report.turn_intervals.get(category, {}) else {})
+            }
+            for category, turn, score in report.lowest_agreement_categories
+        ],
+        'disagreement_counts': {category.value: count for category, count in report.disagreement_counts.items()},
+        'missing_annotations': len(report.missing_annotations)
+    }
@@ -0,0 +1,100 @@
+import re
+import xml.etree.ElementTree as ET
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from src.core.label_config import MAX_CHAT_TURNS, generate_dynamic_label_config
+
+from .types import AnnotationCategory
+
+# Which part of a conversation turn a control annotates
+PROMPT = "prompt"
+RESPONSE = "response"
+WHOLE = "whole"  # Applies to both the prompt and the response of the turn
+
+# Control name prefix -> (category, role). Control names are "<prefix>_<turn number>".
+CONTROL_PREFIXES: Dict[str, Tuple[AnnotationCategory, str]] = {
+    # Emitted by generate_dynamic_label_config
+    'media_format_prompt': (AnnotationCategory.MEDIA_FORMAT, PROMPT),
+    'function_purpose': (AnnotationCategory.FUNCTION_PURPOSE, PROMPT),
+    'multi_turn_relationship': (AnnotationCategory.MULTI_TURN_RELATIONSHIP, PROMPT),
+    'interaction_features': (AnnotationCategory.ANTHROPOMORPHIZATION, PROMPT),
+    'restricted_flags_prompt': (AnnotationCategory.RESTRICTED_FLAGS, PROMPT),
+    'media_format_response': (AnnotationCategory.MEDIA_FORMAT, RESPONSE),
+    'answer_form_response': (AnnotationCategory.ANSWER_FORM, RESPONSE),
+    'interaction_features_response': (AnnotationCategory.SELF_DISCLOSURE, RESPONSE),
+    'restricted_flags_response': (AnnotationCategory.RESTRICTED_FLAGS, RESPONSE),
+    'topic_turn_whole': (AnnotationCategory.TOPIC, WHOLE),
+}
+
+# Control names used by the round one label config, which is no longer generated
+LEGACY_CONTROL_PREFIXES: Dict[str, Tuple[AnnotationCategory, str]] = {
+    'media_format': (AnnotationCategory.MEDIA_FORMAT, PROMPT),
+    'topic': (AnnotationCategory.TOPIC, PROMPT),
+    'topic_response': (AnnotationCategory.TOPIC, RESPONSE),
+    'anthropomorphization': (AnnotationCategory.ANTHROPOMORPHIZATION, PROMPT),
+    'restricted_flags': (AnnotationCategory.RESTRICTED_FLAGS, PROMPT),
+    'answer_form': (AnnotationCategory.ANSWER_FORM, RESPONSE),
+    'self_disclosure': (AnnotationCategory.SELF_DISCLOSURE, RESPONSE),
+}
+
+_CONTROL_NAME = re.compile(r'^(?P<prefix>[a-z_]+?)_(?P<turn>\d+)$')
+
+class ControlSpec(NamedTuple):
+    """What a single Choices control annotates."""
+    category: AnnotationCategory
+    turn: int  # 1-based conversation turn (a prompt/response pair), as in the label config
+    role: str  # PROMPT, RESPONSE or WHOLE
+
+    @property
+    def message_indices(self) -> Tuple[int, ...]:
+        """0-based conversation message indices covered (even = prompt, odd = response)."""
+        prompt_idx = 2 * (self.turn - 1)
+        if self.role == PROMPT:
+            return (prompt_idx,)
+        if self.role == RESPONSE:
+            return (prompt_idx + 1,)
+        return (prompt_idx, prompt_idx + 1)
+
+def resolve_control_name(name: str) -> Optional[ControlSpec]:
+    """Derive the spec of a control from its name, or None if it isn't a taxonomy control."""
+    match = _CONTROL_NAME.match(name)
+    if not match:
+        return None
+    prefix = match.group('prefix')
+    mapping = CONTROL_PREFIXES.get(prefix) or LEGACY_CONTROL_PREFIXES.get(prefix)
+    if mapping is None:
+        return None
+    category, role = mapping
+    return ControlSpec(category, int(match.group('turn')), role)
+
+def control_names_from_config(label_config: str) -> List[str]:
+    """Names of every Choices control in a Label Studio label config."""
+    root = ET.fromstring(label_config)
+    return [element.get('name') for element in root.iter('Choices') if element.get('name')]
+
+@lru_cache(maxsize=None)
+def build_control_table(max_turns: int = MAX_CHAT_TURNS) -> Dict[str, Optional[ControlSpec]]:
+    """
+    Precompute the dispatch table from every control name the label config can emit
+    (plus the round one names) to its (category, turn, role).
+    """
+    table: Dict[str, Optional[ControlSpec]] = {}
+    for name in control_names_from_config(generate_dynamic_label_config(max_turns)):
+        table[name] = resolve_control_name(name)
+    for prefix, (category, role) in LEGACY_CONTROL_PREFIXES.items():
+        for turn in range(1, max_turns + 1):
+            table[f"{prefix}_{turn}"] = ControlSpec(category, turn, role)
+    return table
+
+def lookup_control(name: str) -> Optional[ControlSpec]:
+    """
+    Resolve a result's from_name with a single dict lookup. Names outside the
+    precomputed table (e.g. turns beyond MAX_CHAT_TURNS) are resolved once and memoized.
+    """
+    table = build_control_table()
+    try:
+        return table[name]
+    except KeyError:
+        spec = table[name] = resolve_control_name(name)
+        return spec
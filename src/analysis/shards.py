@@ -0,0 +1,90 @@
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from .cache import _atomic_write
+
+# Bump whenever the index or row layout changes
+SHARD_VERSION = 1
+
+SHARD_ROWS = 10000  # Rows per JSONL shard
+INDEX_FILE = "index.json"
+
+class ShardWriter:
+    """
+    Write named sections of rows as JSON Lines shards under one directory, with an
+    index of every section's shards and row counts.
+
+    Rows are serialized and written one at a time and a new shard is started every
+    rows_per_shard rows, so memory stays flat however many rows a section has and
+    readers can open the first shard as soon as it is closed. An existing index is
+    removed before any shard is touched and the new one is written last (atomically),
+    so its presence means every shard it lists is complete, also on a rerun into the
+    same directory.
+
+    Usage:
+        with ShardWriter(directory) as writer:
+            writer.write_section('disagreements', rows)
+    """
+
+    def __init__(self, directory: str, rows_per_shard: int = SHARD_ROWS):
+        if rows_per_shard < 1:
+            raise ValueError(f"rows_per_shard must be at least 1, got {rows_per_shard}")
+        self.directory = Path(directory)
+        self.rows_per_shard = rows_per_shard
+        self.sections: Dict[str, dict] = {}
+
+    def __enter__(self) -> 'ShardWriter':
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # The previous run's index lists shards this run is about to replace
+        (self.directory / INDEX_FILE).unlink(missing_ok=True)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.write_index()
+
+    def write_section(self, name: str, rows: Iterable[Any]) -> dict:
+        """Write rows (JSON-serializable) as {name}-00000.jsonl, {name}-00001.jsonl, ... and return its index entry."""
+        # Shards left by an earlier, larger run would otherwise look like part of this one
+        for stale in self.directory.glob(f"{name}-*.jsonl"):
+            stale.unlink()
+        shards: List[dict] = []
+        total = 0
+        f = None
+        try:
+            for row in rows:
+                if f is None or shards[-1]['rows'] == self.rows_per_shard:
+                    if f is not None:
+                        f.close()
+                    shard_name = f"{name}-{len(shards):05d}.jsonl"
+                    f = open(self.directory / shard_name, 'w', encoding='utf-8')
+                    shards.append({'file': shard_name, 'rows': 0})
+                f.write(json.dumps(row, ensure_ascii=False))
+                f.write('\n')
+                shards[-1]['rows'] += 1
+                total += 1
+        finally:
+            if f is not None:
+                f.close()
+        self.sections[name] = {'rows': total, 'shards': shards}
+        return self.sections[name]
+
+    def write_index(self):
+        payload = {'version': SHARD_VERSION, 'sections': self.sections}
+        _atomic_write(self.directory / INDEX_FILE, json.dumps(payload, indent=2).encode('utf-8'), public=True)
+
+def read_index(directory: str) -> dict:
+    with open(Path(directory) / INDEX_FILE, 'r', encoding='utf-8') as f:
+        index = json.load(f)
+    if index.get('version') != SHARD_VERSION:
+        raise ValueError(f"Unsupported shard index version: {index.get('version')}")
+    return index
+
+def read_section(directory: str, name: str, index: Optional[dict] = None) -> Iterator[Any]:
+    """Stream the rows of one section back, shard by shard."""
+    index = index or read_index(directory)
+    for shard in index['sections'][name]['shards']:
+        with open(Path(directory) / shard['file'], 'r', encoding='utf-8') as f:
+            for line in f:
+                yield json.loads(line)
@@ -0,0 +1,256 @@
+import json
+from typing import Any, Dict, Iterator, List, Optional
+
+from .fingerprint import task_fingerprint
+
+# Keys we actually use from an exported task; drafts, predictions, comment
+# metadata and the like are dropped as soon as each task is decoded
+TASK_KEYS = ('id', 'data', 'annotations')
+ANNOTATION_KEYS = ('id', 'completed_by', 'result', 'created_at', 'was_cancelled')
+# Without keep_data only the stable id survives; the conversation is replaced by its fingerprint
+LIGHT_DATA_KEYS = ('conversation_id',)
+
+# Top-level keys that mark a metadata-wrapped export ({"metadata": ..., "annotations": [...]})
+WRAPPER_KEYS = ('metadata', 'projects')
+WRAPPED_TASKS_KEY = 'annotations'
+
+DEFAULT_CHUNK_SIZE = 1 << 16
+_WHITESPACE = ' \t\n\r'
+
+def is_task(item: Any) -> bool:
+    """Whether an exported item looks like a Label Studio task (as opposed to a bare annotation)."""
+    return isinstance(item, dict) and ('annotations' in item or 'data' in item)
+
+def prune_task(task: dict, keep_data: bool = False) -> dict:
+    """
+    Drop everything from an exported task that the analysis never reads.
+    The conversation fingerprint is computed first and stored as '_conv_hash', so the
+    conversation itself can be dropped unless keep_data is set.
+    """
+    pruned = {key: task[key] for key in TASK_KEYS if key in task}
+    pruned['_conv_hash'] = task_fingerprint(task)
+
+    data = task.get('data')
+    if isinstance(data, dict) and not keep_data:
+        pruned['data'] = {key: data[key] for key in LIGHT_DATA_KEYS if key in data}
+
+    annotations = task.get('annotations')
+    if isinstance(annotations, list):
+        pruned['annotations'] = [
+            {key: annotation[key] for key in ANNOTATION_KEYS if key in annotation}
+            if isinstance(annotation, dict) else annotation
+            for annotation in annotations
+        ]
+    return pruned
+
+class ExportReader:
+    """
+    Stream the tasks of a Label Studio export one at a time.
+
+    Handles a top-level array of tasks, a metadata-wrapped export
+    ({"metadata": {...}, "annotations": [...]}) and JSON Lines. Only one task is
+    decoded at a time, so peak memory stays flat regardless of export size.
+
+    Usage:
+        with ExportReader(path) as reader:
+            for task in reader:
+                ...
+            annotator = reader.header.get('metadata', {}).get('annotator')
+    """
+
+    def __init__(
+        self,
+        path: str,
+        keep_data: bool = False,
+        prune: bool = True,
+        chunk_size: int = DEFAULT_CHUNK_SIZE
+    ):
+        self.path = path
+        self.keep_data = keep_data
+        self.prune = prune
+        self.chunk_size = chunk_size
+        self.format: Optional[str] = None  # 'array', 'wrapped' or 'jsonl'
+        self.header: Dict[str, Any] = {}  # Non-task top-level members of a wrapped export
+        self._decoder = json.JSONDecoder()
+        self._file = None
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+        self._pin: Optional[int] = None  # Position that buffer compaction must preserve
+        self._has_tasks = True
+        self._iterated = False
+
+    def __enter__(self) -> 'ExportReader':
+        self._file = open(self.path, 'r', encoding='utf-8')
+        self._detect_format()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    # --- Buffer management -------------------------------------------------
+
+    def _fill(self, size: int) -> bool:
+        """Append up to size characters to the buffer, discarding consumed input."""
+        if self._eof:
+            return False
+        if self._pin is None and self._pos > len(self._buf) // 2:
+            self._buf = self._buf[self._pos:]
+            self._pos = 0
+        chunk = self._file.read(size)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buf += chunk
+        return True
+
+    def _peek(self) -> str:
+        """Skip whitespace and return the next character, or '' at end of input."""
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill(self.chunk_size):
+                return ''
+
+    def _expect(self, chars: str) -> str:
+        char = self._peek()
+        if not char or char not in chars:
+            raise json.JSONDecodeError(f"Expected one of {chars!r}", self._buf, self._pos)
+        self._pos += 1
+        return char
+
+    def _decode_value(self) -> Any:
+        """Decode the next complete JSON value, reading more input until it fits."""
+        self._peek()
+        read_size = self.chunk_size
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+                # A number or literal that ends exactly at the buffer edge may be truncated
+                if end < len(self._buf) or self._eof:
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            # Grow reads geometrically so very large tasks don't cost quadratic retries
+            self._fill(read_size)
+            read_size *= 2
+
+    # --- Format handling ---------------------------------------------------
+
+    def _detect_format(self):
+        first = self._peek()
+        if first == '[':
+            self.format = 'array'
+            self._pos += 1
+        elif first == '{':
+            start = self._pin = self._pos
+            self._pos += 1
+            is_wrapped = self._starts_wrapped()
+            self._pos = start + 1 if is_wrapped else start
+            self._pin = None
+            if is_wrapped:
+                self.format = 'wrapped'
+                self._has_tasks = self._seek_wrapped_tasks()
+            else:
+                self.format = 'jsonl'
+        elif first == '':
+            self.format = 'array'
+            self._has_tasks = False
+        else:
+            raise json.JSONDecodeError("Expected a JSON array, object or JSON Lines", self._buf, self._pos)
+
+    def _starts_wrapped(self) -> bool:
+        """
+        Whether the object just opened is a wrapped export rather than the first task of
+        JSON Lines. Wrapped exports start with metadata or with the task array; a task
+        may also start with its own 'annotations', so that key only counts if the array's
+        first item is a task (or, for an empty array, if metadata or nothing follows).
+        """
+        if self._peek() != '"':
+            return False
+        key = self._decode_value()
+        if key in WRAPPER_KEYS:
+            return True
+        if key != WRAPPED_TASKS_KEY:
+            return False
+        self._expect(':')
+        if self._peek() != '[':
+            return False
+        self._pos += 1
+        if self._peek() != ']':
+            return is_task(self._decode_value())
+        self._pos += 1
+        if self._expect(',}') == '}':
+            return True
+        return self._peek() == '"' and self._decode_value() in WRAPPER_KEYS
+
+    def _seek_wrapped_tasks(self) -> bool:
+        """
+        Read top-level members of a wrapped export until the task array starts.
+        Returns False once the closing brace is reached.
+        """
+        while True:
+            if self._peek() == '}':
+                self._pos += 1
+                return False
+            key = self._decode_value()
+            self._expect(':')
+            if key == WRAPPED_TASKS_KEY and self._peek() == '[':
+                self._pos += 1
+                return True
+            self.header[key] = self._decode_value()
+            if self._expect(',}') == '}':
+                return False
+
+    def _iter_array(self) -> Iterator[Any]:
+        """Yield elements of an array whose opening bracket was already consumed."""
+        if self._peek() == ']':
+            self._pos += 1
+            return
+        while True:
+            yield self._decode_value()
+            if self._expect(',]') == ']':
+                return
+
+    def _iter_raw(self) -> Iterator[Any]:
+        if not self._has_tasks:
+            return
+        if self.format == 'array':
+            yield from self._iter_array()
+        elif self.format == 'wrapped':
+            yield from self._iter_array()
+            # Pick up any metadata stored after the task array
+            if self._expect(',}') == ',':
+                self._seek_wrapped_tasks()
+        else:
+            while self._peek():
+                yield self._decode_value()
+
+    def __iter__(self) -> Iterator[Any]:
+        if self._file is None:
+            raise ValueError("ExportReader must be used as a context manager")
+        if self._iterated:
+            raise ValueError("ExportReader can only be iterated once")
+        self._iterated = True
+        for item in self._iter_raw():
+            if self.prune and is_task(item):
+                item = prune_task(item, self.keep_data)
+            yield item
+
+def iter_export_tasks(path: str, keep_data: bool = False) -> Iterator[dict]:
+    """Convenience generator over the (pruned) tasks of an export file of any supported shape."""
+    with ExportReader(path, keep_data=keep_data) as reader:
+        yield from reader
+
+def load_export_tasks(path: str, keep_data: bool = False) -> List[dict]:
+    """Read all (pruned) tasks of an export into a list."""
+    return list(iter_export_tasks(path, keep_data))
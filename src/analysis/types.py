@@ -1,5 +1,5 @@
-from dataclasses import dataclass
-from typing import Dict, List, Optional, Set
+from dataclasses import dataclass, field
+from typing import Dict, List, NamedTuple, Optional, Sequence, Set
 from enum import Enum
 
 class AnnotationCategory(str, Enum):
@@ -55,8 +55,17 @@ class Task:
     original_data: dict  # The original conversation data
     annotations: List[Annotation]
     
-@dataclass
-class AgreementScore:
+def turn_text(original_data: dict, turn_idx: int) -> str:
+    """Text of one message of a task's conversation."""
+    conversation = original_data.get("data", {}).get("conversation", original_data.get("conversation", []))
+    if not conversation or turn_idx >= len(conversation):
+        return "Text not available"
+    return conversation[turn_idx].get('text', "Text not available")
+
+# Result records are created once per (task, turn, category, pair), so they are
+# tuples rather than dataclasses to keep allocation cheap
+
+class AgreementScore(NamedTuple):
     """Agreement score for a specific category in a turn."""
     category: AnnotationCategory
     turn_idx: int
@@ -64,8 +73,7 @@ class AgreementScore:
     annotator_pair: tuple[str, str]
     disagreement_examples: Optional[List[str]] = None
 
-@dataclass
-class DisagreementExample:
+class DisagreementExample(NamedTuple):
     """Example of a disagreement between annotators."""
     task_id: str
     turn_idx: int
@@ -74,11 +82,15 @@ class DisagreementExample:
     annotator2_id: str
     annotator1_values: Set[str]
     annotator2_values: Set[str]
-    conversation_text: str  # The actual text from the conversation for this turn
+    task_data: dict  # The task's original data, shared rather than copied
     f1_score: float
 
-@dataclass
-class MissingAnnotation:
+    @property
+    def conversation_text(self) -> str:
+        """The text of this turn, looked up only when the example is rendered."""
+        return turn_text(self.task_data, self.turn_idx)
+
+class MissingAnnotation(NamedTuple):
     """Details about a missing category annotation."""
     task_id: str
     turn_idx: int
@@ -86,6 +98,21 @@ class MissingAnnotation:
     annotator_id: str
     is_response: bool  # Whether this was a response turn
 
+class AlphaScore(NamedTuple):
+    """Krippendorff's alpha for one category, over every rated (task, turn) unit."""
+    category: AnnotationCategory
+    alpha: float  # nan when expected disagreement is zero (a single value was ever used)
+    observed_disagreement: float
+    expected_disagreement: float
+    units: int  # Units rated by at least two annotators
+    values: int  # Label sets in those units
+
+class ConfidenceInterval(NamedTuple):
+    """Bootstrap percentile interval around a mean per-cell F1 score."""
+    estimate: float
+    low: float
+    high: float
+
 @dataclass
 class CompletionStats:
     """Statistics about annotation completion rates."""
@@ -93,7 +120,7 @@ class CompletionStats:
     total_turns: int
     completion_by_category: Dict[AnnotationCategory, float]  # category -> completion rate
     completion_by_annotator: Dict[str, Dict[AnnotationCategory, float]]  # annotator -> category -> completion rate
-    missing_annotations: List[MissingAnnotation]  # Detailed list of what's missing
+    missing_annotations: Sequence[MissingAnnotation]  # Detailed list of what's missing
 
 @dataclass
 class AgreementReport:
@@ -108,6 +135,13 @@ class AgreementReport:
     lowest_agreement_categories: List[tuple[AnnotationCategory, int, float]]  # (category, turn_idx, score)
     lowest_agreement_overall: List[tuple[AnnotationCategory, float]]  # (category, score)
     # Examples of major disagreements
-    disagreement_examples: List[DisagreementExample]  # Examples of significant disagreements
+    disagreement_examples: List[DisagreementExample]  # Worst examples of significant disagreements per category
     # Completion statistics
     completion_stats: CompletionStats  # Statistics about annotation completion
+    # Chance-corrected agreement
+    alpha_scores: Dict[AnnotationCategory, AlphaScore] = field(default_factory=dict)
+    # Bootstrap intervals of mean per-cell F1, by category and by (category, turn)
+    category_intervals: Dict[AnnotationCategory, ConfidenceInterval] = field(default_factory=dict)
+    turn_intervals: Dict[AnnotationCategory, Dict[int, ConfidenceInterval]] = field(default_factory=dict)
+    # Number of significant disagreements per category, including those without a kept example
+    disagreement_counts: Dict[AnnotationCategory, int] = field(default_factory=dict)
@@ -0,0 +1,77 @@
+import xml.etree.ElementTree as ET
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Set
+
+from src.core.label_config import generate_dynamic_label_config
+
+from .types import AnnotationCategory
+from .schema import resolve_control_name
+
+try:
+    popcount = int.bit_count  # Python 3.10+
+except AttributeError:
+    def popcount(mask: int) -> int:
+        """Number of set bits in a non-negative int."""
+        return bin(mask).count('1')
+
+class LabelVocabulary:
+    """
+    Maps each choice of each category to a bit position so a set of labels can be
+    stored as an int. Seeded from the label config; values the config doesn't know
+    (e.g. round one labels) are appended as they are seen.
+    """
+
+    def __init__(self):
+        self.labels: Dict[AnnotationCategory, List[str]] = {category: [] for category in AnnotationCategory}
+        self._bits: Dict[AnnotationCategory, Dict[str, int]] = {category: {} for category in AnnotationCategory}
+
+    @classmethod
+    def from_config(cls, label_config: str) -> 'LabelVocabulary':
+        """Build the vocabulary from the Choice values of every taxonomy control."""
+        vocab = cls()
+        for choices in ET.fromstring(label_config).iter('Choices'):
+            spec = resolve_control_name(choices.get('name', ''))
+            if spec is None:
+                continue
+            for choice in choices.iter('Choice'):
+                vocab.bit(spec.category, choice.get('value'))
+        return vocab
+
+    def bit(self, category: AnnotationCategory, label: str) -> int:
+        """Bit position of a label, assigning the next free one to unseen labels."""
+        bits = self._bits[category]
+        idx = bits.get(label)
+        if idx is None:
+            idx = bits[label] = len(self.labels[category])
+            self.labels[category].append(label)
+        return idx
+
+    def size(self, category: AnnotationCategory) -> int:
+        return len(self.labels[category])
+
+    def encode(self, category: AnnotationCategory, values: Optional[Iterable[str]]) -> Optional[int]:
+        """Bitmask of a label set; None (category not applicable) stays None."""
+        if values is None:
+            return None
+        mask = 0
+        for value in values:
+            mask |= 1 << self.bit(category, value)
+        return mask
+
+    def decode(self, category: AnnotationCategory, mask: Optional[int]) -> Optional[Set[str]]:
+        """Label set of a bitmask."""
+        if mask is None:
+            return None
+        labels = self.labels[category]
+        values = set()
+        while mask:
+            low = mask & -mask
+            values.add(labels[low.bit_length() - 1])
+            mask ^= low
+        return values
+
+@lru_cache(maxsize=None)
+def default_vocabulary() -> LabelVocabulary:
+    """Process-wide vocabulary seeded from the current label config."""
+    # Every turn offers the same choices, so a single-turn config covers the taxonomy
+    return LabelVocabulary.from_config(generate_dynamic_label_config(1))
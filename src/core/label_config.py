@@ -0,0 +1,371 @@
+"""Label Studio labeling configuration for the conversation taxonomy."""
+
+# Maximum number of turns to support in the UI
+MAX_CHAT_TURNS = 10
+
+def generate_dynamic_label_config(max_turns=None):
+    """Generate a dynamic Label Studio configuration based on the maximum number of turns."""
+    
+    # If max_turns is not provided, use the default
+    if max_turns is None:
+        max_turns = MAX_CHAT_TURNS
+    
+    # Base view with conversation display
+    base_view = """
+<View style="display: flex;">
+    <Style>.htx-text{ white-space: pre-wrap; }</Style>
+    <View style="width: 60%; padding-right: 1em; white-space: pre-wrap;">
+        <Paragraphs name="conversation" value="$conversation" 
+        layout="dialogue" textKey="text" nameKey="role"/>
+        <Header value="Conversation ID: $conversation_id" style="margin-top: 1em; font-size: 0.9em; color: #555;"/>
+    </View>
+    
+    <View style="width: 40%; padding-left: 1em; overflow-y: auto;">
+        <View style="margin-bottom: 1em; padding: 1em; background: #f0f0f0; border-radius: 5px;">
+            <Header value="Select turns to display:" />
+            <Choices name="turn_selector" toName="conversation" choice="multiple" showInline="true">
+"""
+    
+    # Add checkbox for each possible turn
+    for turn_num in range(1, max_turns + 1):
+        base_view += f'                <Choice value="Turn {turn_num}">Turn {turn_num}</Choice>\n'
+    
+    base_view += """
+                            </Choices>
+                </View>
+"""
+
+    # Generate panels for each turn
+    turn_panels = ""
+    for turn_num in range(1, max_turns + 1):
+        # Create panel for the prompt (user message)
+        prompt_panel = f"""
+        <View>
+            <View whenTagName="turn_selector" whenChoiceValue="Turn {turn_num}" visibleWhen="choice-selected">
+                <Collapse visibleWhen="$turn{turn_num}_dialogue[0].text">
+                    <Panel value="Turn {turn_num} - Prompt">
+                        <View>
+                            <View style="margin-bottom: 1em;">
+                                <Text name="turn_{turn_num}_prompt_warning" value="⚠️ Please complete all required fields for Turn {turn_num} - Prompt:" style="color: #ff6b6b; font-weight: bold;" />
+                            </View>
+
+                            <Collapse>
+                                <Panel value="Media Format">
+                                    <Filter name="filter_media_prompt_{turn_num}" toName="media_format_prompt_{turn_num}" minlength="0" placeholder="Filter media formats..."/>
+                                    <Choices whenTagName="turn_selector" whenChoiceValue="Turn {turn_num}" visibleWhen="choice-selected" name="media_format_prompt_{turn_num}" toName="conversation" choice="multiple" required="true">
+                                        <Choice value="Audio" />
+                                        <Choice value="Charts / graphs" />
+                                        <Choice value="Formatted enumeration / itemization" />
+                                        <Choice value="HTML" />
+                                        <Choice value="Images" />
+                                        <Choice value="Likely retrieved / pasted content" />
+                                        <Choice value="Math / symbols" />
+                                        <Choice value="URLs" />
+                                        <Choice value="Likely retrieved / pasted content" />
+                                        <Choice value="Natural language" />
+                                        <Choice value="Code" />
+                                        <Choice value="Other" />
+                                    </Choices>
+                                </Panel>
+                            </Collapse>
+                            
+                            <Collapse>
+                                <Panel value="Function/Purpose">
+                                    <Filter name="filter_function_{turn_num}" toName="function_purpose_{turn_num}" minlength="0" placeholder="Filter functions..."/>
+                                    <Choices whenTagName="turn_selector" whenChoiceValue="Turn {turn_num}" visibleWhen="choice-selected" name="function_purpose_{turn_num}" toName="conversation" choice="multiple" required="true">
+                                        <Choice value="Advice, guidance, &amp; recommendations: Instructions / how-to" />
+                                        <Choice value="Advice, guidance, &amp; recommendations: Social and personal advice" />
+                                        <Choice value="Advice, guidance, &amp; recommendations: Professional advice" />
+                                        <Choice value="Advice, guidance, &amp; recommendations: Activity / product recommendations" />
+                                        <Choice value="Advice, guidance, &amp; recommendations: Action planning (scheduling, robotics)" />
+                                        <Choice value="Editorial &amp; formatting: Natural language content editing" />
+                                        <Choice value="Editorial &amp; formatting: Natural language style or re-formatting" />
+                                        <Choice value="Editorial &amp; formatting: Code content editing" />
+                                        <Choice value="Editorial &amp; formatting: Code style and re-formatting" />
+                                        <Choice value="Editorial &amp; formatting: Content summarization" />
+                                        <Choice value="Editorial &amp; formatting: Content expansion" />
+                                        <Choice value="Editorial &amp; formatting: Information processing &amp; re-formatting" />
+                                        <Choice value="Information analysis: Content explanation / interpretation" />
+                                        <Choice value="Information analysis: Content quality review or assessment" />
+                                        <Choice value="Information analysis: Content classification" />
+                                        <Choice value="Information analysis: Ranking or scoring" />
+                                        <Choice value="Information analysis: Other content analysis / description" />
+                                        <Choice value="Information retrieval: General info from web" />
+                                        <Choice value="Information retrieval: General info from prompt content" />
+                                        <Choice value="Reasoning: Mathematical or numerical problem solving" />
+                                        <Choice value="Reasoning: Verbal problems, logic games, puzzles or riddles" />
+                                        <Choice value="Reasoning: Other general problem solving" />
+                                        <Choice value="Role-play / social simulation: Platonic companion / friend" />
+                                        <Choice value="Role-play / social simulation: Romantic companion" />
+                                        <Choice value="Role-play / social simulation: Simulation of real person / celebrity" />
+                                        <Choice value="Role-play / social simulation: User study persona simulations or polling" />
+                                        <Choice value="Role-play / social simulation: Therapist / coach" />
+                                        <Choice value="Translation (language to language)" />
+                                        <Choice value="Content generation: Brainstorming / ideation" />
+                                        <Choice value="Content generation: Creative / fiction writing" />
+                                        <Choice value="Content generation: Academic / essay" />
+                                        <Choice value="Content generation: Administrative writing" />
+                                        <Choice value="Content generation: Code" />
+                                        <Choice value="Content generation: Code documentation" />
+                                        <Choice value="Content generation: General prose, discussion or explanation" />
+                                        <Choice value="Content generation: Prompts for another AI system" />
+                                        <Choice value="Content generation: Other" />
+                                        <Choice value="Other" />
+                                        <Choice value="No clear ask" />
+                                    </Choices>
+                                </Panel>
+                            </Collapse>
+
+                            <Collapse>
+                                <Panel value="Multi-turn Relationship">
+                                    <Choices whenTagName="turn_selector" whenChoiceValue="Turn {turn_num}" visibleWhen="choice-selected" name="multi_turn_relationship_{turn_num}" toName="conversation" choice="single" required="true">
+                                        <Choice value="First request" />
+                                        <Choice value="Completely new request" />
+                                        <Choice value="Re-attempt / revision on prior request" />
+                                        <Choice value="New variation of prior task" />
+                                        <Choice value="Extend, deepen, or build on prior task" />
+                                    </Choices>
+                                </Panel>
+                            </Collapse>
+
+                            <Collapse>
+                                <Panel value="Interaction Features">
+                                    <Choices whenTagName="turn_selector" whenChoiceValue="Turn {turn_num}" visibleWhen="choice-selected" name="interaction_features_{turn_num}" toName="conversation" choice="multiple" required="true">
+                                        <Choice value="Companionship" />
+                                        <Choice value="Courtesy / politeness" />
+                                        <Choice value="Jailbreak attempt" />
+                                        <Choice value="Reinforcement / praise" />
+                                        <Choice value="Role-assignment" />
+                                        <Choice value="None" />
+                                    </Choices>
+                                </Panel>
+                            </Collapse>
+
+                            <Collapse>
+                                <Panel value="Sensitive Use Flags">
+                                    <Filter name="filter_flags_prompt_{turn_num}" toName="restricted_flags_prompt_{turn_num}" minlength="0" placeholder="Filter flags..."/>
+                                    <Choices whenTagName="turn_selector" whenChoiceValue="Turn {turn_num}" visibleWhen="choice-selected" name="restricted_flags_prompt_{turn_num}" toName="conversation" choice="multiple" required="true">
+                                        <Choice value="Sexually explicit content: Fictitious person" />
+                                        <Choice value="Sexually explicit content: Real person" />
+                                        <Choice value="Sexually explicit content: Request / discussion of CSAM" />
+                                        <Choice value="Sexually explicit content: Other" />
+                                        <Choice value="Apparent attempt to impersonate a real person or organization" />
+                                        <Choice value="Apparent use or generation of misinformation" />
+                                        <Choice value="CBRN-related outputs" />
+                                        <Choice value="Content related to criminal planning or other suspected illegal activity not listed elsewhere" />
+                                        <Choice value="Content related to cyberattacks (enabling / enacting malware, viruses, worms, etc.)" />
+                                        <Choice value="Discriminatory practices: Misrepresnetation, stereotyping, or inappropriate reference to sensitive attributes" />
+                                        <Choice value="Generating defamatory content" />
+                                        <Choice value="Generating spam" />
+                                        <Choice value="Possible presence of copyrighted, unreferenced material" />
+                                        <Choice value="Private information: Possible identifiable information (e.g., social security, driver's license, passport, biometric, financial, address, phone number, etc.)" />
+                                        <Choice value="Private information: Possible sensitive information (e.g., API keys, passwords, other confidential information)" />
+                                        <Choice value="Uses that may violate academic or professional standards" />
+                                        <Choice value="Uses related to high-stakes automated decision-making" />
+                                        <Choice value="Violent, hateful or other harmful behavior: Harassment &amp; bullying" />
+                                        <Choice value="Violent, hateful or other harmful behavior: Physical harm" />
+                                        <Choice value="Violent, hateful or other harmful behavior: Self-harm" />
+                                        <Choice value="Weapons &amp; drugs" />
+                                        <Choice value="Other" />
+                                        <Choice value="None" />
+                                    </Choices>
+                                </Panel>
+                            </Collapse>
+
+                            <Collapse>
+                                <Panel value="Other Feedback">
+                                    <TextArea name="other_feedback_prompt_{turn_num}" toName="conversation" 
+                                              placeholder="Enter any additional feedback, observations, or notes about this turn (including 'other' selections)..." 
+                                              rows="4" maxSubmissions="1" editable="true" />
+                                </Panel>
+                            </Collapse>
+                        </View>
+                    </Panel>
+                </Collapse>
+            </View>
+        </View>
+"""
+
+        # Create panel for the response
+        response_panel = f"""
+        <View>
+            <View whenTagName="turn_selector" whenChoiceValue="Turn {turn_num}" visibleWhen="choice-selected">
+                <Collapse visibleWhen="$turn{turn_num}_dialogue[1].text">
+                    <Panel value="Turn {turn_num} - Response">
+                        <View>
+                            <View style="margin-bottom: 1em;">
+                                <Text name="turn_{turn_num}_response_warning" value="⚠️ Please complete all required fields for Turn {turn_num} - Response:" style="color: #ff6b6b; font-weight: bold;" />
+                            </View>
+                            <Collapse>
+                                <Panel value="Media Format">
+                                    <Filter name="filter_media_response_{turn_num}" toName="media_format_response_{turn_num}" minlength="0" placeholder="Filter media formats..."/>
+                                    <Choices whenTagName="turn_selector" whenChoiceValue="Turn {turn_num}" visibleWhen="choice-selected" name="media_format_response_{turn_num}" toName="conversation" choice="multiple" required="true">
+                                        <Choice value="Audio" />
+                                        <Choice value="Charts / graphs" />
+                                        <Choice value="Formatted enumeration / itemization" />
+                                        <Choice value="HTML" />
+                                        <Choice value="Images" />
+                                        <Choice value="Likely retrieved / pasted content" />
+                                        <Choice value="Math / symbols" />
+                                        <Choice value="URLs" />
+                                        <Choice value="Likely retrieved / pasted content" />
+                                        <Choice value="Natural language" />
+                                        <Choice value="Code" />
+                                        <Choice value="Other" />
+                                    </Choices>
+                                </Panel>
+                            </Collapse>
+
+                            <Collapse>
+                                <Panel value="Answer Form">
+                                    <Choices whenTagName="turn_selector" whenChoiceValue="Turn {turn_num}" visibleWhen="choice-selected" name="answer_form_response_{turn_num}" toName="conversation" choice="single" required="true">
+                                        <Choice value="Refusal to answer (with explanation)" />
+                                        <Choice value="Refusal to answer (without explanation)" />
+                                        <Choice value="Partial refusal / expressing uncertainty / disclaiming" />
+                                        <Choice value="Direct answer / open generation" />
+                                        <Choice value="Continuation of input" />
+                                        <Choice value="Request for information or clarification" />
+                                    </Choices>
+                                </Panel>
+                            </Collapse>
+
+                            <Collapse>
+                                <Panel value="Interaction Features">
+                                    <Choices whenTagName="turn_selector" whenChoiceValue="Turn {turn_num}" visibleWhen="choice-selected" name="interaction_features_response_{turn_num}" toName="conversation" choice="multiple" required="true">
+                                        <Choice value="Apology" />
+                                        <Choice value="Content: Direct response" />
+                                        <Choice value="Content: Preferences / feelings / opinions / religious beliefs" />
+                                        <Choice value="Content: Empathy" />
+                                        <Choice value="Register and style: Phatic expressions" />
+                                        <Choice value="Register and style: Expressions of confidence and doubt" />
+                                        <Choice value="Non-personalization" />
+                                        <Choice value="Self-disclosure" />
+                                        <Choice value="None" />
+                                    </Choices>
+                                </Panel>
+                            </Collapse>
+
+                            <Collapse>
+                                <Panel value="Sensitive Use Flags">
+                                    <Filter name="filter_flags_response_{turn_num}" toName="restricted_flags_response_{turn_num}" minlength="0" placeholder="Filter flags..."/>
+                                    <Choices whenTagName="turn_selector" whenChoiceValue="Turn {turn_num}" visibleWhen="choice-selected" name="restricted_flags_response_{turn_num}" toName="conversation" choice="multiple" required="true">
+                                        <Choice value="Sexually explicit content: Fictitious person" />
+                                        <Choice value="Sexually explicit content: Real person" />
+                                        <Choice value="Sexually explicit content: Request / discussion of CSAM" />
+                                        <Choice value="Sexually explicit content: Other" />
+                                        <Choice value="Apparent attempt to impersonate a real person or organization" />
+                                        <Choice value="Apparent use or generation of misinformation" />
+                                        <Choice value="CBRN-related outputs" />
+                                        <Choice value="Content related to criminal planning or other suspected illegal activity not listed elsewhere" />
+                                        <Choice value="Content related to cyberattacks (enabling / enacting malware, viruses, worms, etc.)" />
+                                        <Choice value="Discriminatory practices: Misrepresnetation, stereotyping, or inappropriate reference to sensitive attributes" />
+                                        <Choice value="Generating defamatory content" />
+                                        <Choice value="Generating spam" />
+                                        <Choice value="Possible presence of copyrighted, unreferenced material" />
+                                        <Choice value="Private information: Possible identifiable information (e.g., social security, driver's license, passport, biometric, financial, address, phone number, etc.)" />
+                                        <Choice value="Private information: Possible sensitive information (e.g., API keys, passwords, other confidential information)" />
+                                        <Choice value="Uses that may violate academic or professional standards" />
+                                        <Choice value="Uses related to high-stakes automated decision-making" />
+                                        <Choice value="Violent, hateful or other harmful behavior: Harassment &amp; bullying" />
+                                        <Choice value="Violent, hateful or other harmful behavior: Physical harm" />
+                                        <Choice value="Violent, hateful or other harmful behavior: Self-harm" />
+                                        <Choice value="Weapons &amp; drugs" />
+                                        <Choice value="Other" />
+                                        <Choice value="None" />
+                                    </Choices>
+                                </Panel>
+                            </Collapse>
+
+                            <Collapse>
+                                <Panel value="Other Feedback">
+                                    <TextArea name="other_feedback_response_{turn_num}" toName="conversation" 
+                                              placeholder="Enter any additional feedback, observations, or notes about this turn (including 'other' selections)..." 
+                                              rows="4" maxSubmissions="1" editable="true" />
+                                </Panel>
+                            </Collapse>
+                        </View>
+                    </Panel>
+                </Collapse>
+            </View>
+        </View>
+"""
+        
+        # Create panel for the whole panel
+        whole_panel = f"""
+        <View>
+            <View whenTagName="turn_selector" whenChoiceValue="Turn {turn_num}" visibleWhen="choice-selected">
+                <Collapse visibleWhen="$turn{turn_num}_dialogue[1].text">
+                    <Panel value="Turn {turn_num} - Whole Turn">
+                        <View>
+                            <View style="margin-bottom: 1em;">
+                                <Text name="turn_{turn_num}_whole_turn_warning" value="⚠️ Please complete all required fields for Turn {turn_num} - Whole Turn:" style="color: #ff6b6b; font-weight: bold;" />
+                            </View>
+                            <Collapse>
+                                <Panel value="Topic">
+                                    <Filter name="filter_topic_turn_whole_{turn_num}" toName="topic_turn_whole_{turn_num}" minlength="0" placeholder="Filter topics..."/>
+                                    <Choices whenTagName="turn_selector" whenChoiceValue="Turn {turn_num}" visibleWhen="choice-selected" name="topic_turn_whole_{turn_num}" toName="conversation" choice="multiple" required="true">
+                                        <Choice value="Adult &amp; illicit content" />
+                                        <Choice value="Art &amp; design" />
+                                        <Choice value="Business &amp; finances" />
+                                        <Choice value="Culture" />
+                                        <Choice value="Economics" />
+                                        <Choice value="Education" />
+                                        <Choice value="Employment &amp; hiring" />
+                                        <Choice value="Entertainment, hobbies &amp; leisure" />
+                                        <Choice value="Fantasy / fiction / fanfiction" />
+                                        <Choice value="Fashion &amp; beauty" />
+                                        <Choice value="Food &amp; dining" />
+                                        <Choice value="Geography" />
+                                        <Choice value="Health &amp; medicine" />
+                                        <Choice value="History" />
+                                        <Choice value="Housing" />
+                                        <Choice value="Immigration / migration" />
+                                        <Choice value="Insurance &amp; social scoring" />
+                                        <Choice value="Interpersonal relationships &amp; communication" />
+                                        <Choice value="Law, criminal justice, law enforcement" />
+                                        <Choice value="Lifestyle" />
+                                        <Choice value="Linguistics &amp; languages" />
+                                        <Choice value="Literature &amp; writing" />
+                                        <Choice value="Math &amp; sciences" />
+                                        <Choice value="Nature &amp; environment" />
+                                        <Choice value="News &amp; current affairs" />
+                                        <Choice value="Non-software engineering &amp; infrastructure" />
+                                        <Choice value="Politics &amp; elections" />
+                                        <Choice value="Psychology, philosophy &amp; human behavior" />
+                                        <Choice value="Religion &amp; spirituality" />
+                                        <Choice value="Same topics as prior conversation turn" />
+                                        <Choice value="Social issues &amp; movements" />
+                                        <Choice value="Sports" />
+                                        <Choice value="Technology, software &amp; computing" />
+                                        <Choice value="Transportation" />
+                                        <Choice value="Travel &amp; tourism" />
+                                        <Choice value="Video games" />
+                                        <Choice value="Other" />
+                                        <Choice value="None" />
+                                    </Choices>
+                                </Panel>
+                            </Collapse>
+                            
+                            <Collapse>
+                                <Panel value="Other Feedback">
+                                    <TextArea name="other_feedback_whole_{turn_num}" toName="conversation" 
+                                              placeholder="Enter any additional feedback, observations, or notes about this turn (including 'other' selections)..." 
+                                              rows="4" maxSubmissions="1" editable="true" />
+                                </Panel>
+                            </Collapse>
+                        </View>
+                    </Panel>
+                </Collapse>
+            </View>
+        </View>
+"""
+        turn_panels += prompt_panel + response_panel + whole_panel
+
+    # Close the views
+    closing_tags = """
+    </View>
+</View>
+"""
+
+    # Combine everything
+    return base_view + turn_panels + closing_tags
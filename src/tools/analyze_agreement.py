@@ -4,10 +4,21 @@ Script to analyze inter-rater agreement between annotators.
 """
 
 import argparse
+import contextlib
+import json
+import sys
 from pathlib import Path
 
+from src.analysis.agreement import OVERALL_MODES
+from src.analysis.cache import ExportCache, DEFAULT_CACHE_DIR
 from src.analysis.load import analyze_agreement
-from src.analysis.report import generate_report, format_report_summary
+from src.analysis.report import generate_report, format_report_summary, report_summary_dict
+
+def positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {value}")
+    return number
 
 def main():
     parser = argparse.ArgumentParser(description="Analyze inter-rater agreement between annotators.")
@@ -21,21 +32,80 @@ def main():
         default="reports",
         help="Directory to save report outputs"
     )
+    parser.add_argument(
+        "--cache-dir",
+        default=DEFAULT_CACHE_DIR,
+        help="Directory for the parsed-export cache"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Re-parse every export instead of reusing cached results"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processes used to parse exports and bootstrap intervals in parallel (0 = one per CPU core)"
+    )
+    parser.add_argument(
+        "--bootstrap-resamples",
+        type=positive_int,
+        default=1000,
+        help="Task resamples used for agreement confidence intervals"
+    )
+    parser.add_argument(
+        "--overall",
+        choices=OVERALL_MODES,
+        default="union",
+        help="How overall category scores aggregate turns: union of labels, pooled label counts (micro) or mean per-turn F1 (macro)"
+    )
+    parser.add_argument(
+        "--no-plots",
+        action="store_true",
+        help="Skip the .png figures (and the matplotlib import); data files are still written"
+    )
+    parser.add_argument(
+        "--no-html",
+        action="store_true",
+        help="Skip the report.html dashboard"
+    )
+    parser.add_argument(
+        "--columnar",
+        action="store_true",
+        help="Also write per-cell, per-pair, label and missing-annotation tables as Parquet (or .csv.gz without pyarrow)"
+    )
+    parser.add_argument(
+        "--format",
+        choices=("markdown", "json"),
+        default="markdown",
+        help="Summary printed to stdout; with json, progress messages go to stderr"
+    )
     args = parser.parse_args()
 
-    # Load and process annotations
-    print("Analyzing inter-annotator agreement...")
-    tasks = analyze_agreement(args.exports_dir)
-    
-    print(f"Found {len(tasks)} tasks with multiple annotators")
-    
-    # Generate report
-    print("\nGenerating agreement report...")
-    report = generate_report(tasks, args.output_dir)
+    # Keep stdout parseable when it carries the JSON summary
+    progress = contextlib.redirect_stdout(sys.stderr) if args.format == "json" else contextlib.nullcontext()
+    with progress:
+        # Load and process annotations
+        print("Analyzing inter-annotator agreement...")
+        cache = None if args.no_cache else ExportCache(args.cache_dir)
+        tasks = analyze_agreement(args.exports_dir, cache, args.workers)
+        
+        print(f"Found {len(tasks)} tasks with multiple annotators")
+        
+        # Generate report
+        print("\nGenerating agreement report...")
+        report = generate_report(
+            tasks, args.output_dir, args.bootstrap_resamples, args.workers, args.overall,
+            plots=not args.no_plots, columnar=args.columnar, dashboard=not args.no_html
+        )
     
     # Print summary
-    print("\n" + format_report_summary(report))
-    print(f"\nDetailed results saved to {args.output_dir}/")
+    if args.format == "json":
+        print(json.dumps(report_summary_dict(report), indent=2))
+    else:
+        print("\n" + format_report_summary(report))
+        print(f"\nDetailed results saved to {args.output_dir}/")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
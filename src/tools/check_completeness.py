@@ -1,3 +1,4 @@
+import argparse
 import json
 import os
 import sys
@@ -7,6 +8,10 @@ import logging
 from typing import Dict, List, Set, Tuple
 import csv # Import csv module
 
+from src.analysis.batches import BATCH_ASSIGNEES, get_catalog
+from src.analysis.load import map_files, resolve_workers
+from src.analysis.stream import iter_export_tasks
+
 # Remove BatchCreator import as we now read batches directly
 # # Add project root to sys.path to allow importing BatchCreator
 # project_root = Path(__file__).resolve().parent.parent.parent
@@ -35,29 +40,16 @@ BATCH_DIR = Path("data/batches") # Corrected Path for batch files
 OUTPUT_DIR = Path("data/rater_agreement") # Output directory for report
 REPORT_FILE = OUTPUT_DIR / "completeness_report.csv" # CSV report file path
 
-# Rater Name Mapping (Corrected based on user feedback)
+# Rater Name Mapping, shared with the analysis package's batch catalog
 # Indices correspond to rater_id (0-11) used in BatchCreator
 # Rater ID = batch number - 1
-RATER_NAME_MAP = {
-    0: 'Ahmet',      # batch_1
-    1: 'Anka',       # batch_2
-    2: 'Cedric',     # batch_3
-    3: 'Zoey',       # batch_4 (Corrected: Was Dayeon)
-    4: 'Megan',      # batch_5
-    5: 'Niloofar',   # batch_6
-    6: 'Shayne',     # batch_7
-    7: 'Victor',     # batch_8
-    8: 'Wenting',    # batch_9
-    9: 'Yuntian',    # batch_10
-    10: 'Zhiping',   # batch_11
-    11: 'ZSuperhero' # batch_12
-}
+RATER_NAME_MAP = {batch_num - 1: name for batch_num, name in BATCH_ASSIGNEES.items()}
 # --- End Configuration ---
 
 
 def get_expected_assignments_from_batches(batch_dir: Path, rater_map: Dict[int, str]) -> Dict[str, Set[str]]:
-    """Generates the expected assignments by reading batch files."""
-    logging.info(f"Generating expected task assignments by reading batch files from: {batch_dir}")
+    """Generates the expected assignments from the batch catalog's index of the batch files."""
+    logging.info(f"Generating expected task assignments from batch files in: {batch_dir}")
     task_to_expected_raters = defaultdict(set)
     processed_batches = 0
 
@@ -65,42 +57,21 @@ def get_expected_assignments_from_batches(batch_dir: Path, rater_map: Dict[int,
         logging.error(f"Batch directory not found: {batch_dir}")
         return {}
 
-    for filename in os.listdir(batch_dir):
-        if filename.lower().startswith('batch_') and filename.lower().endswith('.json'):
-            filepath = batch_dir / filename
-            try:
-                # Extract batch number to get rater ID
-                batch_num_str = filename.lower().split('_')[-1].split('.')[0]
-                batch_num = int(batch_num_str)
-                rater_id = batch_num - 1 # Rater ID is 0-indexed
-                annotator_name = rater_map.get(rater_id)
-
-                if annotator_name is None:
-                    logging.warning(f"Could not map batch number {batch_num} (from {filename}) to a rater name. Skipping file.")
-                    continue
-
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    batch_tasks = json.load(f)
-                    if not isinstance(batch_tasks, list):
-                        logging.warning(f"Expected a list in batch file {filename}. Skipping.")
-                        continue
-
-                    for task in batch_tasks:
-                        if isinstance(task, dict):
-                            task_id = task.get('id') # Assuming ID is conv_XXXX format here
-                            if task_id:
-                                task_to_expected_raters[task_id].add(annotator_name)
-                            else:
-                                logging.warning(f"Task missing 'id' in batch file {filename}.")
-                    processed_batches += 1
-                    logging.debug(f"Processed batch file {filename} for annotator {annotator_name}")
-
-            except (ValueError, IndexError) as e:
-                logging.warning(f"Could not parse batch number from filename {filename}: {e}")
-            except json.JSONDecodeError as e:
-                logging.error(f"Error decoding JSON from batch file {filepath}: {e}")
-            except Exception as e:
-                logging.error(f"Error processing batch file {filepath}: {e}")
+    for batch_num, entry in get_catalog(str(batch_dir)).batches().items():
+        rater_id = batch_num - 1 # Rater ID is 0-indexed
+        annotator_name = rater_map.get(rater_id)
+
+        if annotator_name is None:
+            logging.warning(f"Could not map batch number {batch_num} (from {entry.name}) to a rater name. Skipping file.")
+            continue
+
+        for task_id in entry.task_ids:
+            if task_id:
+                task_to_expected_raters[task_id].add(annotator_name)
+            else:
+                logging.warning(f"Task missing 'id' in batch file {entry.name}.")
+        processed_batches += 1
+        logging.debug(f"Processed batch file {entry.name} for annotator {annotator_name}")
 
     logging.info(f"Successfully generated expected assignments from {processed_batches} batch files.")
     return dict(task_to_expected_raters)
@@ -171,17 +142,9 @@ def process_annotation_file(filepath: Path, annotator_name: str) -> Dict[str, Di
     """Processes a single annotator's export file."""
     processed_data = {} # task_id -> {annotator, selected_turns}
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            try:
-                tasks = json.load(f)
-            except json.JSONDecodeError:
-                logging.warning(f"Standard JSON decode failed for {filepath.name}. Trying JSON Lines.")
-                f.seek(0)
-                tasks = [json.loads(line) for line in f if line.strip()]
-
-        if not isinstance(tasks, list):
-            logging.warning(f"Expected a list of tasks in {filepath.name}, got {type(tasks)}. Skipping file.")
-            return {}
+        # Stream tasks one at a time (JSON array, wrapped export or JSON Lines);
+        # conversations and other unused keys are dropped as each task is decoded
+        tasks = iter_export_tasks(str(filepath))
 
         logged_ids_count = 0 # Debug: Counter for logged IDs per file
         for task in tasks:
@@ -250,7 +213,7 @@ def get_max_turns_for_task(task_data: Dict) -> int:
      return (len(conversation) + 1) // 2
 
 
-def check_completeness():
+def check_completeness(workers: int = 1):
     """Main function to check and report completeness."""
     logging.info("--- Starting Completeness Check ---")
 
@@ -288,9 +251,13 @@ def check_completeness():
 
     # 4. Process Actual Annotations
     actual_annotations = defaultdict(dict) # task_id -> {annotator_name: {selected_turns}}
-    for name, filepath in available_annotators_files.items():
-        logging.info(f"Processing annotations for: {name} ({filepath.name})")
-        annotator_data = process_annotation_file(filepath, name)
+    calls = [(filepath, name) for name, filepath in available_annotators_files.items()]
+    logging.info(f"Processing {len(calls)} annotation files with {resolve_workers(workers)} worker(s)")
+    for (filepath, name), annotator_data, error in map_files(process_annotation_file, calls, workers):
+        if error is not None:
+            logging.error(f"Error processing file {filepath}: {error}")
+            continue
+        logging.info(f"Processed annotations for: {name} ({filepath.name})")
         for task_id, data in annotator_data.items():
             if task_id in actual_annotations:
                  actual_annotations[task_id][name] = data # Store annotator's specific data
@@ -411,4 +378,12 @@ def check_completeness():
 
 
 if __name__ == "__main__":
-    check_completeness() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Check annotation completeness against batch assignments.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processes used to read annotator exports in parallel (0 = one per CPU core)"
+    )
+    args = parser.parse_args()
+    check_completeness(args.workers) 
\ No newline at end of file
@@ -4,6 +4,8 @@ from collections import defaultdict
 import logging
 from pathlib import Path
 
+from src.analysis.stream import iter_export_tasks
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -39,21 +41,9 @@ def package_annotations():
             logging.info(f"Processing file: {filepath} for annotator: {annotator_name}")
 
             try:
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    # Handle potential multiple JSON objects or non-standard formats if necessary
-                    # For now, assume it's a list of task objects
-                    try:
-                        tasks = json.load(f)
-                    except json.JSONDecodeError as e:
-                         # Attempt to load JSON Lines format if standard JSON fails
-                        logging.warning(f"Standard JSON decode failed for {filename}: {e}. Trying JSON Lines.")
-                        f.seek(0) # Reset file pointer
-                        tasks = [json.loads(line) for line in f if line.strip()]
-
-
-                if not isinstance(tasks, list):
-                    logging.warning(f"Expected a list of tasks in {filename}, but got {type(tasks)}. Skipping file.")
-                    continue
+                # Stream tasks one at a time (JSON array, wrapped export or JSON Lines),
+                # keeping the task data we write out but dropping drafts, predictions etc.
+                tasks = iter_export_tasks(filepath, keep_data=True)
 
                 for task in tasks:
                     if not isinstance(task, dict):
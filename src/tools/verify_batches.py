@@ -1,24 +1,11 @@
-import json
-from collections import defaultdict
+from src.analysis.batches import get_catalog
+from src.analysis.fingerprint import short_fingerprint
 
 def verify_batches():
-    # Track which conversations appear in which batches
-    conversation_batches = defaultdict(list)
-    batch_sizes = {}
-    
-    # Read each batch file
-    for i in range(1, 13):
-        filename = f"data/batch_{i}.json"
-        with open(filename) as f:
-            data = json.load(f)
-            batch_sizes[i] = len(data)
-            
-            # Track each conversation
-            for task in data:
-                # Create a unique identifier for the conversation
-                # Using the first message as an identifier
-                conv = task['data']['conversation'][0]['text']
-                conversation_batches[conv].append(i)
+    catalog = get_catalog()
+    batch_sizes = {batch_num: len(entry.task_ids) for batch_num, entry in catalog.batches().items()}
+    # Which batches each conversation (identified by a fingerprint of all its turns) appears in
+    conversation_batches = catalog.fingerprint_batches()
     
     # Print batch sizes
     print("\nBatch sizes:")
@@ -34,11 +21,11 @@ def verify_batches():
     print(f"Conversations appearing exactly twice: {correct_coverage}")
     
     # Print any irregularities
-    if total_conversations != 60 or correct_coverage != 60:
+    if correct_coverage != total_conversations:
         print("\nIrregularities found:")
         for conv, batches in conversation_batches.items():
             if len(batches) != 2:
-                print(f"Conversation appears in {len(batches)} batches: {batches}")
+                print(f"Conversation {short_fingerprint(conv)} appears in {len(batches)} batches: {batches}")
 
 if __name__ == "__main__":
     verify_batches() 
\ No newline at end of file
@@ -0,0 +1,54 @@
+"""Builders of small annotation fixtures shared by the analysis tests."""
+
+import random
+
+from src.analysis.types import Annotation, Task, TurnAnnotation
+
+def make_turn(turn_idx, **values):
+    """TurnAnnotation with empty sets for the categories that apply to the message role."""
+    if turn_idx % 2 == 0:
+        fields = dict(media_format=set(), topic=set(), function_purpose=set(), multi_turn_relationship=set(),
+                      anthropomorphization=set(), restricted_flags=set(), answer_form=None, self_disclosure=None)
+    else:
+        fields = dict(media_format=set(), topic=set(), function_purpose=None, multi_turn_relationship=None,
+                      anthropomorphization=None, restricted_flags=set(), answer_form=set(), self_disclosure=set())
+    fields.update(values)
+    return TurnAnnotation(**fields)
+
+def make_annotation(task_id, annotator, turns):
+    return Annotation(
+        task_id=task_id,
+        annotator_id=annotator,
+        timestamp="2025-03-01T00:00:00Z",
+        turns={turn_idx: make_turn(turn_idx, **values) for turn_idx, values in turns.items()},
+        completed_categories={}
+    )
+
+def make_tasks():
+    conversation = [{"role": "User", "text": "Hi"}, {"role": "LLM", "text": "Hello"}]
+    return [
+        Task("1", {"data": {"conversation": conversation}}, [
+            make_annotation("1", "megan", {
+                0: {"media_format": {"Natural language"}, "topic": {"Sports", "Travel"}},
+                1: {"answer_form": {"Direct answer / open generation"}}
+            }),
+            make_annotation("1", "victor", {0: {"topic": {"Sports"}}})
+        ]),
+        Task("2", {"conversation": conversation * 2}, [
+            make_annotation("2", "victor", {2: {"restricted_flags": {"None"}}}),
+            make_annotation("2", "zhiping", {})
+        ])
+    ]
+
+def make_random_tasks(n_tasks=60, seed=0):
+    rng = random.Random(seed)
+    labels = ["Sports", "Travel", "Food"]
+    return [
+        Task(str(idx), {"conversation": []}, [
+            make_annotation(str(idx), rater, {
+                turn: {"topic": set(rng.sample(labels, rng.randint(0, 2)))} for turn in (0, 2)
+            })
+            for rater in ("a", "b", "c")
+        ])
+        for idx in range(n_tasks)
+    ]
@@ -0,0 +1,71 @@
+import pytest
+
+from src.analysis.accumulator import AgreementAccumulator
+from src.analysis.agreement import calculate_agreement_scores
+from src.analysis.types import AnnotationCategory
+from tests.analysis.helpers import make_annotation, make_random_tasks
+
+def accumulate(tasks):
+    accumulator = AgreementAccumulator()
+    for task in tasks:
+        for annotation in task.annotations:
+            accumulator.add_annotation(annotation, task.task_id)
+    return accumulator
+
+def batch_turn_scores(tasks):
+    scores_by_category, _, _ = calculate_agreement_scores(tasks)
+    return {
+        category: {turn_idx: sum(s.f1_score for s in scores) / len(scores) for turn_idx, scores in turns.items()}
+        for category, turns in scores_by_category.items()
+    }
+
+def assert_same_scores(accumulated, expected):
+    assert accumulated.keys() == expected.keys()
+    for category, turns in expected.items():
+        assert accumulated[category] == pytest.approx(turns)
+
+def test_matches_batch_scores():
+    tasks = make_random_tasks(n_tasks=30)
+    accumulator = accumulate(tasks)
+    assert_same_scores(accumulator.turn_scores(), batch_turn_scores(tasks))
+    assert {key[2:] for key in accumulator.cells()} == {("a", "b"), ("a", "c"), ("b", "c")}
+
+def test_add_and_retract_only_touch_changed_cells():
+    tasks = make_random_tasks(n_tasks=30)
+    accumulator = accumulate(tasks)
+
+    # Retract one annotator's work on half the tasks, then revise another's
+    for task in tasks[:15]:
+        assert accumulator.retract_annotation(task.task_id, "b")
+        task.annotations = [a for a in task.annotations if a.annotator_id != "b"]
+    revised = make_annotation("0", "a", {0: {"topic": {"Travel"}}})
+    assert accumulator.add_annotation(revised)
+    assert not accumulator.add_annotation(revised)
+    tasks[0].annotations[0] = revised
+    assert not accumulator.retract_annotation("0", "b")
+
+    assert_same_scores(accumulator.turn_scores(), batch_turn_scores(tasks))
+
+def test_tp_fp_fn_counts():
+    accumulator = AgreementAccumulator()
+    accumulator.add_annotation(make_annotation("1", "a", {0: {"topic": {"Sports", "Travel"}}}))
+    accumulator.add_annotation(make_annotation("1", "b", {0: {"topic": {"Sports", "Food"}}}))
+    totals = accumulator.cells()[(AnnotationCategory.TOPIC, 0, "a", "b")]
+    assert (totals.tp, totals.fp, totals.fn, totals.count) == (1, 1, 1, 1)
+    assert accumulator.micro_f1()[AnnotationCategory.TOPIC] == 0.5
+
+def test_replace_annotator_and_round_trip(tmp_path):
+    tasks = make_random_tasks(n_tasks=10)
+    accumulator = accumulate(tasks)
+    path = tmp_path / "accumulator.json"
+    accumulator.save(str(path))
+    restored = AgreementAccumulator.load(str(path))
+    assert restored.turn_scores() == accumulator.turn_scores()
+
+    # Re-import c's export: one task dropped, one revised, the rest unchanged
+    export = {task.task_id: task.annotations[2] for task in tasks[1:]}
+    export["1"] = make_annotation("1", "c", {0: {"topic": {"Food"}}})
+    assert restored.replace_annotator("c", export) == 2
+    tasks[0].annotations = tasks[0].annotations[:2]
+    tasks[1].annotations[2] = export["1"]
+    assert_same_scores(restored.turn_scores(), batch_turn_scores(tasks))
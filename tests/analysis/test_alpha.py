@@ -0,0 +1,100 @@
+import itertools
+import math
+import random
+
+import numpy as np
+import pytest
+
+from src.analysis.agreement import score_cell_pairs
+from src.analysis.alpha import krippendorff_alpha, set_distance_matrix
+from src.analysis.frame import AnnotationFrame
+from src.analysis.types import AnnotationCategory, Task
+from tests.analysis.helpers import make_annotation
+
+def masi_distance(set1, set2):
+    """Reference MASI distance on Python sets."""
+    if not set1 and not set2:
+        return 0.0
+    jaccard = len(set1 & set2) / len(set1 | set2)
+    if set1 == set2:
+        monotonicity = 1.0
+    elif set1 <= set2 or set2 <= set1:
+        monotonicity = 2 / 3
+    elif set1 & set2:
+        monotonicity = 1 / 3
+    else:
+        monotonicity = 0.0
+    return 1.0 - jaccard * monotonicity
+
+def reference_alpha(units, distance):
+    """Krippendorff's alpha straight from the pairable-values definition."""
+    n = sum(len(values) for values in units)
+    observed = sum(
+        sum(distance(a, b) for a, b in itertools.permutations(values, 2)) / (len(values) - 1)
+        for values in units
+    ) / n
+    pooled = [value for values in units for value in values]
+    expected = sum(distance(a, b) for a, b in itertools.permutations(pooled, 2)) / (n * (n - 1))
+    return 1.0 - observed / expected
+
+def test_set_distances():
+    """Bitset distances match MASI and Jaccard on sets."""
+    words = np.array([[0b0011], [0b0111], [0b0110], [0b1000], [0]], dtype=np.uint64)
+    sets = [{0, 1}, {0, 1, 2}, {1, 2}, {3}, set()]
+    masi = set_distance_matrix(words, words)
+    jaccard = set_distance_matrix(words, words, 'jaccard')
+    for i, j in itertools.product(range(len(sets)), repeat=2):
+        assert masi[i, j] == pytest.approx(masi_distance(sets[i], sets[j]))
+        union = sets[i] | sets[j]
+        assert jaccard[i, j] == pytest.approx(1 - len(sets[i] & sets[j]) / len(union) if union else 0.0)
+    with pytest.raises(ValueError):
+        set_distance_matrix(words, words, 'hamming')
+
+def test_alpha_matches_definition_with_missing_raters():
+    """Any number of raters per unit, with raters missing from some turns."""
+    rng = random.Random(1)
+    labels = ["Sports", "Travel", "Food", "Health"]
+    tasks = []
+    for task_idx in range(30):
+        raters = rng.sample(["a", "b", "c", "d"], rng.randint(1, 4))
+        tasks.append(Task(str(task_idx), {"conversation": []}, [
+            make_annotation(str(task_idx), rater, {
+                turn: {"topic": set(rng.sample(labels, rng.randint(0, 2)))}
+                for turn in range(0, 2 * rng.randint(1, 2), 2)
+            })
+            for rater in raters
+        ]))
+
+    units = []
+    for task in tasks:
+        for turn in (0, 2):
+            values = [frozenset(a.turns[turn].topic) for a in task.annotations if turn in a.turns]
+            if len(values) >= 2:
+                units.append(values)
+
+    score = krippendorff_alpha(tasks)[AnnotationCategory.TOPIC]
+    assert score.units == len(units)
+    assert score.values == sum(len(values) for values in units)
+    assert score.alpha == pytest.approx(reference_alpha(units, masi_distance))
+
+    # Reusing already scored cell pairs gives the same alphas
+    frame = AnnotationFrame.from_tasks(tasks)
+    reused = krippendorff_alpha(tasks, frame=frame, pairs=score_cell_pairs(frame))
+    for category, expected in krippendorff_alpha(tasks, frame=frame).items():
+        assert reused[category]._replace(alpha=0.0) == expected._replace(alpha=0.0)
+        assert reused[category].alpha == pytest.approx(expected.alpha, nan_ok=True)
+
+def test_perfect_agreement_and_no_units():
+    tasks = [
+        Task(str(idx), {"conversation": []}, [
+            make_annotation(str(idx), rater, {0: {"topic": {"Sports"} if idx % 2 else {"Travel"}}})
+            for rater in ("a", "b", "c")
+        ])
+        for idx in range(4)
+    ]
+    scores = krippendorff_alpha(tasks, distance='jaccard')
+    assert scores[AnnotationCategory.TOPIC].alpha == 1.0
+    # Only one value was ever used, so expected disagreement is zero
+    assert math.isnan(scores[AnnotationCategory.FUNCTION_PURPOSE].alpha)
+    # No responses were labelled
+    assert scores[AnnotationCategory.ANSWER_FORM].units == 0
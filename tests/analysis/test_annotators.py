@@ -0,0 +1,30 @@
+import math
+
+from src.analysis.agreement import calculate_agreement_scores
+from src.analysis.annotators import annotator_matrices
+from src.analysis.types import AnnotationCategory
+from tests.analysis.helpers import make_random_tasks
+
+def test_matrices_match_per_pair_scores():
+    """Each entry is the mean of that pair's per-turn scores, whichever annotation came first."""
+    tasks = make_random_tasks(n_tasks=40)
+    for task in tasks[::2]:
+        task.annotations.reverse()
+    matrices = annotator_matrices(tasks)
+    scores_by_category, _, _ = calculate_agreement_scores(tasks)
+
+    for category, turns in scores_by_category.items():
+        matrix = matrices[category]
+        by_pair = {}
+        for scores in turns.values():
+            for score in scores:
+                by_pair.setdefault(frozenset(score.annotator_pair), []).append(score.f1_score)
+        for pair, values in by_pair.items():
+            i, j = (matrix.annotators.index(name) for name in sorted(pair))
+            assert matrix.overlap[i, j] == matrix.overlap[j, i] == len(values)
+            assert math.isclose(matrix.agreement[i, j], sum(values) / len(values))
+            assert matrix.agreement[j, i] == matrix.agreement[i, j]
+
+    topic = matrices[AnnotationCategory.TOPIC]
+    assert (topic.overlap.diagonal() == 0).all()
+    assert all(math.isnan(value) for value in topic.agreement.diagonal())
@@ -0,0 +1,69 @@
+import json
+
+from src.analysis.batches import BatchCatalog, canonical_annotator
+from src.analysis.fingerprint import task_fingerprint
+from src.analysis.load import map_annotators_to_batches
+
+def make_batch(conv_ids):
+    return [
+        {
+            "id": f"conv_{idx:04d}",
+            "data": {
+                "conversation": [{"role": "User", "text": f"Prompt {idx}"}, {"role": "LLM", "text": f"Response {idx}"}],
+                "conversation_id": f"conv_{idx:04d}"
+            }
+        }
+        for idx in conv_ids
+    ]
+
+def write_batches(directory):
+    directory.mkdir()
+    (directory / "batch_1.json").write_text(json.dumps(make_batch([1, 2])))
+    (directory / "batch_4.json").write_text(json.dumps(make_batch([2, 3])))
+    (directory / "shayne_rater_disagreement.json").write_text(json.dumps(make_batch([3])))
+    (directory / "master_sample_file.json").write_text(json.dumps(make_batch([1, 2, 3])))
+    return directory
+
+def test_catalog_index(tmp_path):
+    """Files are described by name; assignments and fingerprints come from the index."""
+    catalog = BatchCatalog(str(write_batches(tmp_path / "batches")), str(tmp_path / "cache"))
+
+    assert list(catalog.batches()) == [1, 4]
+    assert catalog.files()["batch_4.json"].display_name == "batch_4.json (Zoey)"
+    assert catalog.files()["shayne_rater_disagreement.json"].display_name == "shayne_rater_disagreement.json (Shayne (Disagreement))"
+    assert catalog.files()["master_sample_file.json"].assignee is None
+    assert catalog.assignments() == {"conv_0001": {"Ahmet"}, "conv_0002": {"Ahmet", "Zoey"}, "conv_0003": {"Zoey"}}
+    assert sorted(map(len, catalog.fingerprint_batches().values())) == [1, 1, 2]
+
+    tasks = catalog.load_batch(4)
+    assert tasks is catalog.load_batch(4)
+    assert [task["_batch_num"] for task in tasks] == [4, 4]
+    assert tasks[0]["_conv_hash"] == task_fingerprint(make_batch([2])[0])
+
+def test_catalog_reuses_persisted_index(tmp_path, monkeypatch):
+    """A second catalog only re-reads files that changed since the index was saved."""
+    batch_dir = write_batches(tmp_path / "batches")
+    BatchCatalog(str(batch_dir), str(tmp_path / "cache")).files()
+
+    (batch_dir / "batch_1.json").write_text(json.dumps(make_batch([1, 2, 5])))
+    indexed = []
+    original = BatchCatalog._index_file
+    monkeypatch.setattr(BatchCatalog, "_index_file", lambda self, path, stat: indexed.append(path.name) or original(self, path, stat))
+
+    catalog = BatchCatalog(str(batch_dir), str(tmp_path / "cache"))
+    assert len(catalog.batches()[1].task_ids) == 3
+    assert indexed == ["batch_1.json"]
+
+def test_annotator_names_map_to_batches(tmp_path):
+    """Export and Label Studio usernames resolve through one alias table."""
+    assert canonical_annotator("cedricwhitney") == "Cedric"
+    assert canonical_annotator("dayeon") == canonical_annotator("Zoey") == "Zoey"
+    assert canonical_annotator("advisor") == "ZSuperhero"
+    assert canonical_annotator("kizoey") is None
+
+    catalog = BatchCatalog(str(write_batches(tmp_path / "batches")), None)
+    mapped = map_annotators_to_batches(["ahmet", "dayeon", "megan"], catalog)
+    assert {name: [task["id"] for task in tasks] for name, tasks in mapped.items()} == {
+        "ahmet": ["conv_0001", "conv_0002"],
+        "dayeon": ["conv_0002", "conv_0003"]
+    }
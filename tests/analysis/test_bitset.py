@@ -0,0 +1,99 @@
+import random
+
+import numpy as np
+
+from src.analysis import bitset
+from src.analysis.agreement import calculate_agreement_scores, calculate_f1_score, rater_pairs
+from src.analysis.frame import AnnotationFrame
+from src.analysis.types import AnnotationCategory, Task
+from src.analysis.vocab import LabelVocabulary
+from tests.analysis.helpers import make_annotation, make_tasks
+
+def test_popcount_fallback(monkeypatch):
+    """The byte-table popcount matches np.bitwise_count."""
+    words = np.random.default_rng(0).integers(0, 2**63, size=(50, 3), dtype=np.int64).astype(np.uint64)
+    words[0, 0] = np.uint64(2**64 - 1)
+    expected = bitset.popcount_rows(words)
+    monkeypatch.delattr(np, "bitwise_count", raising=False)
+    assert bitset.popcount_rows(words).tolist() == expected.tolist()
+    assert expected[0] >= 64
+
+def test_f1_scores_match_set_f1():
+    """Vectorized F1 equals calculate_f1_score exactly, including labels beyond 64 bits."""
+    rng = random.Random(0)
+    vocab = LabelVocabulary()
+    labels = [f"label {idx}" for idx in range(100)]
+    sets = [(set(rng.sample(labels, rng.randint(0, 5))), set(rng.sample(labels, rng.randint(0, 5)))) for _ in range(500)]
+    sets.append((set(), set()))
+
+    def words(values):
+        mask = vocab.encode(AnnotationCategory.TOPIC, values)
+        return [(mask >> (64 * word)) & (2**64 - 1) for word in range(2)]
+
+    words1 = np.array([words(set1) for set1, _ in sets], dtype=np.uint64)
+    words2 = np.array([words(set2) for _, set2 in sets], dtype=np.uint64)
+    assert bitset.f1_scores(words1, words2).tolist() == [calculate_f1_score(set1, set2) for set1, set2 in sets]
+    assert bitset.decode_bitset(vocab, AnnotationCategory.TOPIC, words1[0]) == sets[0][0]
+
+def test_agreement_scores_from_bitsets():
+    """Per-turn scores cover every applicable category of every turn both annotators have."""
+    tasks = make_tasks()
+    scores, overall, disagreements = calculate_agreement_scores(tasks, frame=AnnotationFrame.from_tasks(tasks))
+
+    topic = scores[AnnotationCategory.TOPIC][0]
+    assert [(s.annotator_pair, s.f1_score) for s in topic] == [(("megan", "victor"), calculate_f1_score({"Sports", "Travel"}, {"Sports"}))]
+    assert topic[0].disagreement_examples == ["Annotator 1 only: ['Travel'], Annotator 2 only: []"]
+    # Both annotators left the prompt's function purpose empty
+    assert scores[AnnotationCategory.FUNCTION_PURPOSE][0][0].f1_score == 1.0
+    # Victor has no turn 1 in task 1, and zhiping no turns in task 2
+    assert 1 not in scores[AnnotationCategory.ANSWER_FORM]
+    assert [s.annotator_pair for s in overall[AnnotationCategory.TOPIC]] == [("megan", "victor")]
+    assert [d.category for d in disagreements] == [AnnotationCategory.MEDIA_FORMAT]
+    assert disagreements[0].annotator1_values == {"Natural language"}
+
+def test_every_rater_pair_is_compared():
+    """A task with three raters contributes a score for each of its three rater pairs."""
+    task = Task("3", {"conversation": []}, [
+        make_annotation("3", "a", {0: {"topic": {"Sports"}}}),
+        make_annotation("3", "b", {0: {"topic": {"Sports"}}}),
+        make_annotation("3", "c", {0: {"topic": {"Travel"}}})
+    ])
+    scores, overall, disagreements = calculate_agreement_scores([task])
+
+    topic = scores[AnnotationCategory.TOPIC][0]
+    assert [(s.annotator_pair, s.f1_score) for s in topic] == [(("a", "b"), 1.0), (("a", "c"), 0.0), (("b", "c"), 0.0)]
+    assert [s.annotator_pair for s in overall[AnnotationCategory.TOPIC]] == [("a", "b"), ("a", "c"), ("b", "c")]
+    assert [(d.annotator1_id, d.annotator2_id) for d in disagreements] == [("a", "c"), ("b", "c")]
+    assert rater_pairs([task]) == [("a", "b"), ("a", "c"), ("b", "c")]
+
+def test_smallest_per_group():
+    """The k smallest values of each group, ties to earlier positions, ordered by value."""
+    values = np.array([0.5, 0.0, 0.0, 0.2, 0.0, 0.1, 0.0])
+    group = np.array([0, 0, 1, 0, 0, 1, 0])
+    assert bitset.smallest_per_group(values, group, 2).tolist() == [1, 2, 4, 5]
+    assert bitset.smallest_per_group(values, group, None).tolist() == [1, 2, 4, 6, 5, 3, 0]
+    assert bitset.smallest_per_group(values[:0], group[:0], 2).tolist() == []
+
+def test_disagreement_examples_are_bounded_and_lazy():
+    """Only the worst examples per category are kept, and their text is read from the task on demand."""
+    tasks = [
+        Task(str(idx), {"conversation": [{"role": "User", "text": f"Message {idx}"}]}, [
+            make_annotation(str(idx), "a", {0: {"topic": {"Sports"}, "media_format": {"Natural language"}}}),
+            make_annotation(str(idx), "b", {0: {"topic": {"Travel"}}})
+        ])
+        for idx in range(10)
+    ]
+    _, _, disagreements = calculate_agreement_scores(tasks, max_examples_per_category=3)
+    assert [(d.category, d.task_id) for d in disagreements] == [
+        (category, task_id) for task_id in "012" for category in (AnnotationCategory.MEDIA_FORMAT, AnnotationCategory.TOPIC)
+    ]
+    assert disagreements[0].task_data is tasks[0].original_data
+    assert disagreements[-1].conversation_text == "Message 2"
+    assert len(calculate_agreement_scores(tasks, max_examples_per_category=None)[2]) == 20
+
+    scores_by_category, _, _, counts = calculate_agreement_scores(tasks, max_examples_per_category=3, return_counts=True)
+    assert counts == {
+        category: sum(score.f1_score < 0.5 for scores in turns.values() for score in scores)
+        for category, turns in scores_by_category.items()
+    }
+    assert counts[AnnotationCategory.TOPIC] == 10
@@ -0,0 +1,31 @@
+import pytest
+
+from src.analysis.agreement import calculate_agreement_scores, find_lowest_agreement_categories
+from src.analysis.bootstrap import bootstrap_agreement
+from src.analysis.types import AnnotationCategory, Task
+from tests.analysis.helpers import make_annotation, make_random_tasks
+
+def test_estimates_match_per_turn_averages():
+    """Per-(category, turn) estimates are the averages find_lowest_agreement_categories ranks."""
+    tasks = make_random_tasks()
+    by_category, by_turn = bootstrap_agreement(tasks, n_resamples=200)
+    lowest_by_turn, _ = find_lowest_agreement_categories(*calculate_agreement_scores(tasks)[:2], top_n=100)
+
+    for category, turn, score in lowest_by_turn:
+        interval = by_turn[category][turn]
+        assert interval.estimate == pytest.approx(score)
+        assert interval.low <= interval.estimate <= interval.high
+    topic = by_category[AnnotationCategory.TOPIC]
+    assert topic.low < topic.estimate < topic.high
+
+def test_reproducible_across_worker_counts():
+    """Each chunk of resamples has its own child seed, so the pool size doesn't change results."""
+    tasks = make_random_tasks(n_tasks=20)
+    serial = bootstrap_agreement(tasks, n_resamples=250, seed=7)
+    assert bootstrap_agreement(tasks, n_resamples=250, seed=7, workers=2) == serial
+    assert bootstrap_agreement(tasks, n_resamples=250, seed=8) != serial
+
+def test_no_pairs():
+    assert bootstrap_agreement([Task("1", {"conversation": []}, [make_annotation("1", "a", {0: {}})])]) == ({}, {})
+    with pytest.raises(ValueError):
+        bootstrap_agreement([], n_resamples=0)
@@ -0,0 +1,60 @@
+import os
+
+from src.analysis.cache import ExportCache
+
+def write_export(path, content):
+    path.write_text(content)
+    return str(path)
+
+def test_cache_hit_and_invalidation(tmp_path):
+    """Unchanged exports hit, touched-but-identical exports hit, edited exports miss."""
+    export = write_export(tmp_path / "megan.json", '{"annotations": []}')
+    cache = ExportCache(str(tmp_path / "cache"))
+    assert cache.get(export) is None
+    cache.put(export, ("megan", {"abc": 1}))
+
+    # A fresh instance reads the persisted index
+    cache = ExportCache(str(tmp_path / "cache"))
+    assert cache.get(export) == ("megan", {"abc": 1})
+
+    # Same content, new mtime: the content digest keeps the entry valid
+    stat = os.stat(export)
+    os.utime(export, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert cache.get(export) == ("megan", {"abc": 1})
+
+    # Same size, different content
+    write_export(tmp_path / "megan.json", '{"annotations": {}}')
+    assert cache.get(export) is None
+    assert cache.hits == 2
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    """Entries beyond the size cap are evicted oldest-use first."""
+    cache = ExportCache(str(tmp_path / "cache"), max_bytes=3000)
+    exports = [write_export(tmp_path / f"{name}.json", name) for name in ("a", "b", "c")]
+    for export in exports:
+        cache.put(export, "x" * 1000)
+        cache.get(exports[0])  # keep the first export hot
+
+    assert cache.get(exports[0]) is not None
+    assert cache.get(exports[1]) is None
+    assert cache.get(exports[2]) is not None
+
+def test_cache_hits_save_index_on_flush(tmp_path, monkeypatch):
+    """Hits are recorded in memory and written once by flush()."""
+    export = write_export(tmp_path / "megan.json", '{"annotations": []}')
+    cache = ExportCache(str(tmp_path / "cache"))
+    cache.put(export, ("megan", {}))
+    saved = cache.index_path.read_text()
+
+    saves = []
+    save_index = cache._save_index
+    monkeypatch.setattr(cache, '_save_index', lambda: saves.append(1) or save_index())
+    for _ in range(5):
+        assert cache.get(export) is not None
+    assert saves == [] and cache.index_path.read_text() == saved
+
+    cache.flush()
+    cache.flush()
+    assert saves == [1]
+    entry, = ExportCache(str(tmp_path / "cache"))._load_index().values()
+    assert entry['last_used'] == next(iter(cache._index.values()))['last_used']
@@ -0,0 +1,55 @@
+import math
+
+import pandas as pd
+
+from src.analysis.agreement import AgreementCounts, calculate_agreement_scores
+from src.analysis.columnar import (
+    CSV_SUFFIX, PARQUET_SUFFIX, TABLES_DIR, missing_annotation_table, read_table, write_columnar_tables
+)
+from src.analysis.frame import AnnotationFrame
+from src.analysis.load import analyze_completion_rates
+from tests.analysis.helpers import make_random_tasks
+
+def test_tables_round_trip(tmp_path):
+    tasks = make_random_tasks(n_tasks=30)
+    frame = AnnotationFrame.from_tasks(tasks)
+    scores_by_category, overall_scores, _ = calculate_agreement_scores(tasks, frame=frame)
+    missing = analyze_completion_rates(tasks, frame=frame).missing_annotations
+
+    written = write_columnar_tables(str(tmp_path), frame, missing, overall_scores)
+    assert set(written) == {'cell_scores', 'pair_scores', 'label_assignments', 'missing_annotations'}
+    assert all(path.endswith((PARQUET_SUFFIX, CSV_SUFFIX)) for path in written.values())
+
+    directory = tmp_path / TABLES_DIR
+    cells = read_table(str(directory / 'cell_scores'))
+    assert isinstance(cells['category'].dtype, pd.CategoricalDtype)
+    assert len(cells) == sum(len(scores) for turns in scores_by_category.values() for scores in turns.values())
+    by_turn = cells.groupby(['category', 'turn'], observed=True)['f1_score'].mean()
+    for category, turns in scores_by_category.items():
+        for turn, scores in turns.items():
+            assert math.isclose(by_turn[(category.value, turn)], sum(s.f1_score for s in scores) / len(scores))
+
+    pairs = read_table(str(directory / 'pair_scores'))
+    counts = AgreementCounts.from_frame(frame)
+    assert len(pairs) == len(counts.counts)
+    assert pairs['cells'].sum() == len(cells)
+    for category, scores in overall_scores.items():
+        for score in scores:
+            row = pairs[
+                (pairs['category'] == category.value)
+                & (pairs['annotator1'] == score.annotator_pair[0])
+                & (pairs['annotator2'] == score.annotator_pair[1])
+            ]
+            assert math.isclose(row['overall_score'].item(), score.f1_score)
+
+    assert len(read_table(str(directory / 'label_assignments'))) == len(frame)
+    assert len(read_table(str(directory / 'missing_annotations'))) == len(missing)
+
+def test_missing_table_from_records():
+    tasks = make_random_tasks(n_tasks=10)
+    missing = analyze_completion_rates(tasks).missing_annotations
+    from_arrays = missing_annotation_table(missing)
+    from_records = missing_annotation_table(list(missing))
+    assert from_records['category'].astype(str).tolist() == from_arrays['category'].astype(str).tolist()
+    assert from_records['turn'].tolist() == from_arrays['turn'].tolist()
+    assert from_records['is_response'].tolist() == from_arrays['is_response'].tolist()
@@ -0,0 +1,54 @@
+import random
+from collections import Counter
+from itertools import combinations
+
+from src.analysis.confusion import label_matrices
+from src.analysis.types import AnnotationCategory, Task
+from tests.analysis.helpers import make_annotation
+
+def make_label_tasks(seed=0):
+    rng = random.Random(seed)
+    labels = ["Sports", "Travel", "Food", "Health"]
+    return [
+        Task(str(idx), {"conversation": []}, [
+            make_annotation(str(idx), rater, {0: {"topic": set(rng.sample(labels, rng.randint(0, 3)))}})
+            for rater in rng.sample(["a", "b", "c"], rng.randint(2, 3))
+        ])
+        for idx in range(40)
+    ]
+
+def test_label_matrices_match_nested_loops():
+    tasks = make_label_tasks()
+    matrices = label_matrices(tasks)
+    confusion = matrices['confusion'][AnnotationCategory.TOPIC]
+    cooccurrence = matrices['cooccurrence'][AnnotationCategory.TOPIC]
+
+    expected_confusion, expected_cooccurrence = Counter(), Counter()
+    for task in tasks:
+        topics = [annotation.turns[0].topic for annotation in task.annotations]
+        for set1, set2 in combinations(topics, 2):
+            for label1 in set1:
+                for label2 in set2:
+                    expected_confusion[label1, label2] += 1
+                    expected_confusion[label2, label1] += 1
+        for values in topics:
+            for label1 in values:
+                for label2 in values:
+                    expected_cooccurrence[label1, label2] += 1
+
+    for matrix, expected in ((confusion, expected_confusion), (cooccurrence, expected_cooccurrence)):
+        assert sorted(matrix.labels) == ["Food", "Health", "Sports", "Travel"]
+        assert (matrix.counts == matrix.counts.T).all()
+        for i, label1 in enumerate(matrix.labels):
+            for j, label2 in enumerate(matrix.labels):
+                assert matrix.counts[i, j] == expected[label1, label2]
+
+def test_unused_labels_are_dropped():
+    tasks = [Task("1", {"conversation": []}, [
+        make_annotation("1", "a", {0: {"topic": {"Sports"}}}),
+        make_annotation("1", "b", {0: {}})
+    ])]
+    matrices = label_matrices(tasks)
+    assert matrices['confusion'][AnnotationCategory.TOPIC].labels == []
+    assert matrices['cooccurrence'][AnnotationCategory.TOPIC].counts.tolist() == [[1]]
+    assert label_matrices([]) == {'confusion': {}, 'cooccurrence': {}}
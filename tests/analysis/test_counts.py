@@ -0,0 +1,58 @@
+import pytest
+
+from src.analysis.accumulator import AgreementAccumulator
+from src.analysis.agreement import AgreementCounts, calculate_agreement_scores
+from src.analysis.frame import AnnotationFrame
+from src.analysis.types import AnnotationCategory, Task
+from tests.analysis.helpers import make_annotation, make_random_tasks
+
+def test_counts_with_underscored_usernames():
+    """Keys are tuples, so usernames containing underscores stay intact."""
+    tasks = [Task("1", {"conversation": []}, [
+        make_annotation("1", "jane_doe", {0: {"topic": {"Sports", "Travel"}}, 2: {"topic": {"Food"}}}),
+        make_annotation("1", "john_q_public", {0: {"topic": {"Sports"}}, 2: {"topic": {"Food", "Health"}}})
+    ])]
+    counts = AgreementCounts.from_frame(AnnotationFrame.from_tasks(tasks))
+    key = ("jane_doe", "john_q_public", AnnotationCategory.TOPIC)
+    assert counts.counts[key][:4] == [2, 1, 1, 2]
+    assert counts.micro_f1()[key] == pytest.approx(4 / 6)
+    assert counts.macro_f1()[key] == pytest.approx((2 / 3 + 2 / 3) / 2)
+
+    _, overall, _ = calculate_agreement_scores(tasks, overall='micro')
+    assert overall[AnnotationCategory.TOPIC][0].annotator_pair == ("jane_doe", "john_q_public")
+    assert overall[AnnotationCategory.TOPIC][0].f1_score == pytest.approx(4 / 6)
+    with pytest.raises(ValueError):
+        calculate_agreement_scores(tasks, overall='weighted')
+
+def test_shards_merge_exactly():
+    """Counts of two shards of tasks add up to the counts of the whole round."""
+    tasks = make_random_tasks(n_tasks=30)
+    whole = AgreementCounts.from_frame(AnnotationFrame.from_tasks(tasks))
+    shards = [AgreementCounts.from_frame(AnnotationFrame.from_tasks(part)) for part in (tasks[:12], tasks[12:])]
+    merged = AgreementCounts.from_dict(shards[0].to_dict()) + shards[1]
+
+    assert merged.counts.keys() == whole.counts.keys()
+    for key, values in whole.counts.items():
+        assert merged.counts[key][:4] == values[:4]
+        assert merged.counts[key][4] == pytest.approx(values[4])
+    assert merged.micro_f1() == whole.micro_f1()
+
+def test_macro_matches_per_turn_scores():
+    tasks = make_random_tasks(n_tasks=20)
+    scores_by_category, overall, _ = calculate_agreement_scores(tasks, overall='macro')
+    for category, scores in overall.items():
+        for score in scores:
+            per_turn = [
+                s.f1_score for turn_scores in scores_by_category[category].values()
+                for s in turn_scores if s.annotator_pair == score.annotator_pair
+            ]
+            assert score.f1_score == pytest.approx(sum(per_turn) / len(per_turn))
+
+def test_accumulator_counts():
+    tasks = make_random_tasks(n_tasks=10)
+    accumulator = AgreementAccumulator()
+    for task in tasks:
+        for annotation in task.annotations:
+            accumulator.add_annotation(annotation, task.task_id)
+    whole = AgreementCounts.from_frame(AnnotationFrame.from_tasks(tasks))
+    assert accumulator.counts().micro_f1() == whole.micro_f1()
@@ -0,0 +1,43 @@
+import json
+
+from src.analysis.dashboard import DASHBOARD_FILE, PAGES_DIR, write_dashboard
+from src.analysis.report import generate_report
+from src.analysis.shards import read_section
+from tests.analysis.helpers import make_random_tasks
+
+def read_page(path):
+    text = path.read_text()
+    assert text.startswith('disagreementPage(')
+    index, rows = text[len('disagreementPage('):].rstrip().rstrip(');').split(', ', 1)
+    return int(index), json.loads(rows)
+
+def test_disagreements_are_paged_from_shards(tmp_path):
+    report = generate_report(make_random_tasks(n_tasks=40), str(tmp_path), bootstrap_resamples=20, plots=False)
+    examples = list(read_section(str(tmp_path / 'detailed_report'), 'disagreement_examples'))
+    assert examples
+
+    write_dashboard(report, str(tmp_path), page_rows=7)
+    pages = sorted((tmp_path / PAGES_DIR).glob('disagreements-*.js'))
+    assert len(pages) == -(-len(examples) // 7)
+    rows = []
+    for position, path in enumerate(pages):
+        index, page = read_page(path)
+        assert index == position
+        rows += page
+    assert rows == examples
+
+    document = (tmp_path / DASHBOARD_FILE).read_text()
+    assert f"pageCount = {len(pages)}" in document
+    assert 'agreement_heatmap.png' not in document  # Figures are only linked when drawn
+    for category, _ in report.lowest_agreement_overall:
+        assert category.value in document
+    # Example text only lives in the pages
+    assert not any(row['conversation_text'] in document for row in examples)
+
+def test_nan_scores_render_as_na(tmp_path):
+    report = generate_report(make_random_tasks(n_tasks=10), str(tmp_path), bootstrap_resamples=20, plots=False)
+    category, _ = report.lowest_agreement_overall[0]
+    report.lowest_agreement_overall[0] = (category, float('nan'))
+    write_dashboard(report, str(tmp_path))
+    document = (tmp_path / DASHBOARD_FILE).read_text(encoding='utf-8')
+    assert f"<td>{category.value}</td><td class=\"score\">n/a</td>" in document
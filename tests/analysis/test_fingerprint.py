@@ -0,0 +1,51 @@
+import subprocess
+import sys
+
+from src.analysis.fingerprint import conversation_fingerprint, task_fingerprint, file_digest
+
+CONVERSATION = [
+    {"role": "User", "text": "How often do people visit parks?"},
+    {"role": "LLM", "text": "It depends on the season."}
+]
+
+def test_fingerprint_is_stable_across_processes():
+    """Fingerprints must not depend on the per-process hash seed."""
+    code = (
+        "from src.analysis.fingerprint import conversation_fingerprint;"
+        f"print(conversation_fingerprint({CONVERSATION!r}))"
+    )
+    outputs = {
+        subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True, text=True, check=True,
+            env={"PYTHONHASHSEED": seed, "PYTHONPATH": "."}
+        ).stdout.strip()
+        for seed in ("1", "2")
+    }
+    assert outputs == {conversation_fingerprint(CONVERSATION)}
+
+def test_fingerprint_matches_batch_and_export_shapes():
+    """Batch tasks and export tasks carrying the same conversation share a fingerprint."""
+    batch_task = {"id": "conv_0001", "data": {"conversation": CONVERSATION}}
+    export_task = {"id": 17, "data": {"conversation": CONVERSATION, "conversation_id": "conv_0001"}}
+    legacy_task = {"conversation": CONVERSATION}
+    assert task_fingerprint(batch_task) == task_fingerprint(export_task) == task_fingerprint(legacy_task)
+
+def test_fingerprint_normalization():
+    """Whitespace and line-ending noise is ignored, but turn boundaries and order are not."""
+    noisy = [
+        {"role": "User", "text": "  How often do people visit parks?\r\n"},
+        {"role": "LLM", "text": "It depends on the season."}
+    ]
+    assert conversation_fingerprint(noisy) == conversation_fingerprint(CONVERSATION)
+    assert conversation_fingerprint(CONVERSATION[::-1]) != conversation_fingerprint(CONVERSATION)
+    merged = [{"role": "User", "text": CONVERSATION[0]["text"] + CONVERSATION[1]["text"]}]
+    assert conversation_fingerprint(merged) != conversation_fingerprint(CONVERSATION)
+
+def test_file_digest(tmp_path):
+    """File digests change with content."""
+    path = tmp_path / "export.json"
+    path.write_text("[]")
+    first = file_digest(str(path))
+    path.write_text("[{}]")
+    assert file_digest(str(path)) != first
@@ -0,0 +1,72 @@
+import numpy as np
+
+from src.analysis.frame import AnnotationFrame, CATEGORY_INDEX, ROLE_PROMPT, ROLE_RESPONSE
+from src.analysis.load import analyze_completion_rates
+from src.analysis.types import AnnotationCategory, MissingAnnotation
+from tests.analysis.helpers import make_tasks
+
+def test_frame_rows_and_tables():
+    """Each chosen label becomes one row; ids are interned into shared tables."""
+    frame = AnnotationFrame.from_tasks(make_tasks())
+
+    assert len(frame) == 6
+    assert frame.task_ids == ["1", "2"]
+    assert frame.annotator_ids == ["megan", "victor", "zhiping"]
+    assert frame.task_turn_counts.tolist() == [2, 4]
+    assert frame.annotation_annotator.tolist() == [0, 1, 1, 2]
+    assert frame.role[frame.turn == 1].tolist() == [ROLE_RESPONSE]
+    assert set(frame.role[frame.turn != 1].tolist()) == {ROLE_PROMPT}
+    assert frame.label_counts(AnnotationCategory.TOPIC) == {"Sports": 2, "Travel": 1}
+    assert frame.nbytes < 200
+
+def test_completed_counts():
+    """Cells count once per (task, annotator, turn, category) however many labels they hold."""
+    frame = AnnotationFrame.from_tasks(make_tasks())
+    counts = frame.completed_counts()
+
+    assert counts.shape == (3, len(AnnotationCategory))
+    assert counts[0, CATEGORY_INDEX[AnnotationCategory.TOPIC]] == 1
+    assert counts[0].sum() == 3
+    assert counts[1].sum() == 2
+    assert counts[2].sum() == 0
+
+def test_empty_frame():
+    frame = AnnotationFrame.from_tasks([])
+    assert len(frame) == 0
+    assert frame.completed_counts().shape == (0, len(AnnotationCategory))
+    assert frame.to_pandas().empty
+
+def test_to_pandas():
+    """The long-format DataFrame decodes every column back to strings."""
+    df = AnnotationFrame.from_tasks(make_tasks()).to_pandas()
+
+    assert len(df) == 6
+    assert str(df["label"].dtype) == "category"
+    assert df["turn"].dtype == np.int16
+    row = df[(df["annotator_id"] == "megan") & (df["category"] == "answer_form")].iloc[0]
+    assert (row["task_id"], row["role"], row["label"]) == ("1", "response", "Direct answer / open generation")
+
+def test_completion_rates_from_frame():
+    """Missing cells come back as MissingAnnotation records from struct-of-arrays storage."""
+    tasks = make_tasks()
+    for task in tasks:
+        for annotation in task.annotations:
+            annotation.completed_categories = {
+                turn_idx: {category.value for category in AnnotationCategory if getattr(turn, category.value)}
+                for turn_idx, turn in annotation.turns.items()
+            }
+    stats = analyze_completion_rates(tasks)
+
+    assert stats.total_turns == 6
+    # megan: 6 prompt + 5 response cells expected, 3 labelled
+    assert len([m for m in stats.missing_annotations if m.annotator_id == "megan"]) == 8
+    assert stats.completion_by_annotator["megan"][AnnotationCategory.ANSWER_FORM] == 1.0
+    assert stats.completion_by_annotator["zhiping"][AnnotationCategory.TOPIC] == 0.0
+    assert stats.completion_by_category[AnnotationCategory.TOPIC] == 2 / 12
+
+    missing = stats.missing_annotations
+    assert len(missing) == 4 * 11 + 2 * 11 - 5
+    assert missing[0] == MissingAnnotation("1", 0, AnnotationCategory.FUNCTION_PURPOSE, "megan", False)
+    assert missing[-1] == list(missing)[-1]
+    assert missing[-1].is_response and missing[-1].annotator_id == "zhiping"
+    assert missing[:2] == list(missing)[:2]
@@ -0,0 +1,45 @@
+import math
+
+import pytest
+
+from src.analysis.label_agreement import ALL_PAIRS, binary_agreement, label_agreement
+from src.analysis.types import Task
+from tests.analysis.helpers import make_annotation
+
+def test_binary_agreement_formulas():
+    # a=20, b=5, c=10, d=15 (the classic 2x2 example, kappa = 0.4)
+    metrics = binary_agreement(20, 5, 10, 15)
+    assert float(metrics['kappa']) == pytest.approx(0.4)
+    assert float(metrics['pabak']) == pytest.approx(0.4)
+    assert float(metrics['positive_agreement']) == pytest.approx(40 / 55)
+    assert float(metrics['negative_agreement']) == pytest.approx(30 / 45)
+    assert float(metrics['prevalence']) == pytest.approx(55 / 100)
+    # Both raters never chose the label: perfect raw agreement, kappa undefined
+    assert math.isnan(float(binary_agreement(0, 0, 0, 10)['kappa']))
+
+def test_counts_per_label_and_pair():
+    """Pairs are unordered; only1/only2 follow the pair's annotator order whichever annotation came first."""
+    tasks = [
+        Task("1", {"conversation": []}, [
+            make_annotation("1", "b", {0: {"topic": {"Sports"}}}),
+            make_annotation("1", "a", {0: {"topic": {"Sports", "Travel"}}})
+        ]),
+        Task("2", {"conversation": []}, [
+            make_annotation("2", "a", {0: {"topic": set()}}),
+            make_annotation("2", "b", {0: {"topic": {"Travel"}}})
+        ])
+    ]
+    table = label_agreement(tasks)
+    rows = {
+        (row['label'], row['annotator1'], row['annotator2']): row
+        for row in (dict(zip(table._fields, values)) for values in zip(*table))
+        if row['category'] == 'topic'
+    }
+
+    travel = rows["Travel", "b", "a"]
+    assert (travel['cells'], travel['both'], travel['only1'], travel['only2'], travel['neither']) == (2, 0, 1, 1, 0)
+    sports = rows["Sports", "b", "a"]
+    assert (sports['both'], sports['only1'], sports['only2'], sports['neither']) == (1, 0, 0, 1)
+    assert sports['kappa'] == 1.0
+    assert rows["Sports", ALL_PAIRS, ALL_PAIRS]['cells'] == 2
+    assert {label for label, _, _ in rows} == {"Sports", "Travel"}
@@ -0,0 +1,86 @@
+import json
+
+import pytest
+
+from src.analysis.cache import ExportCache
+from src.analysis.fingerprint import conversation_fingerprint
+from src.analysis.load import get_latest_annotations, match_annotations
+
+def make_conversation(idx):
+    return [
+        {"role": "User", "text": f"Prompt {idx}"},
+        {"role": "LLM", "text": f"Response {idx}"}
+    ]
+
+def make_export(annotator, conv_ids, created_at="2025-03-01T10:00:00Z"):
+    """Build a metadata-wrapped export with one annotated task per conversation."""
+    return {
+        "metadata": {"annotator": annotator},
+        "annotations": [
+            {
+                "id": idx,
+                "data": {"conversation": make_conversation(idx), "conversation_id": f"conv_{idx:04d}"},
+                "annotations": [{
+                    "id": idx,
+                    "completed_by": 1,
+                    "created_at": created_at,
+                    "result": [{
+                        "from_name": "media_format_prompt_1",
+                        "type": "choices",
+                        "value": {"choices": ["Natural language"]}
+                    }]
+                }]
+            }
+            for idx in conv_ids
+        ]
+    }
+
+@pytest.fixture
+def exports_dir(tmp_path):
+    directory = tmp_path / "exports"
+    directory.mkdir()
+    for annotator, conv_ids in {"megan": [1, 2], "victor": [2, 3], "zhiping": [1, 3]}.items():
+        (directory / f"{annotator}.json").write_text(json.dumps(make_export(annotator, conv_ids)))
+    (directory / "broken.json").write_text("{\"metadata\": ")
+    return directory
+
+def test_parallel_ingest_matches_sequential(exports_dir):
+    """Decoding exports in a process pool merges to the same result as one process."""
+    sequential = get_latest_annotations(str(exports_dir))
+    parallel = get_latest_annotations(str(exports_dir), workers=2)
+    assert parallel == sequential
+    assert set(sequential) == {"megan", "victor", "zhiping"}
+    assert set(sequential["megan"]) == {
+        conversation_fingerprint(make_conversation(1)),
+        conversation_fingerprint(make_conversation(2))
+    }
+
+def test_cached_ingest_only_reparses_changed_exports(exports_dir, tmp_path):
+    """A rerun after one annotator re-exports parses only that annotator's file."""
+    cache = ExportCache(str(tmp_path / "cache"))
+    first = get_latest_annotations(str(exports_dir), cache)
+
+    (exports_dir / "megan.json").write_text(json.dumps(make_export("megan", [1, 2, 3])))
+    cache = ExportCache(str(tmp_path / "cache"))
+    second = get_latest_annotations(str(exports_dir), cache)
+
+    assert (cache.hits, cache.misses) == (2, 2)  # broken.json is never cached
+    assert len(second["megan"]) == 3
+    assert second["victor"] == first["victor"]
+
+def test_match_annotations_emits_each_task_once(exports_dir):
+    """A conversation annotated by several assigned annotators becomes a single Task."""
+    latest = get_latest_annotations(str(exports_dir))
+
+    def assigned(conv_ids):
+        return [
+            {"_conv_hash": conversation_fingerprint(make_conversation(idx)), "_batch_num": 1, "data": {}}
+            for idx in conv_ids
+        ]
+
+    tasks = match_annotations({"megan": assigned([1, 2]), "victor": assigned([2, 3]), "zhiping": assigned([1, 3])}, latest)
+
+    assert [task.task_id for task in tasks] == ["batch_1_task_1", "batch_1_task_2", "batch_1_task_2"]
+    assert [sorted(a.annotator_id for a in task.annotations) for task in tasks] == [
+        ["megan", "zhiping"], ["megan", "victor"], ["victor", "zhiping"]
+    ]
@@ -0,0 +1,45 @@
+import json
+
+import pandas as pd
+
+from src.analysis.plots import MANIFEST_FILE, PlotJob, plot_digest, render_plots
+from src.analysis.report import plot_heatmap
+
+def heatmap_job(values, name='matrix.png'):
+    table = pd.DataFrame(values, index=['a', 'b'], columns=['a', 'b'])
+    return PlotJob(name, plot_heatmap, table, {'title': 'Test', 'annot': True, 'fmt': 'd'})
+
+def test_digest_follows_data_and_options():
+    job = heatmap_job([[1, 2], [3, 4]])
+    assert plot_digest(job) == plot_digest(heatmap_job([[1, 2], [3, 4]]))
+    assert plot_digest(job) != plot_digest(heatmap_job([[1, 2], [3, 5]]))
+    assert plot_digest(job) != plot_digest(job._replace(options={**job.options, 'title': 'Other'}))
+    renamed = job._replace(data=job.data.rename(columns={'b': 'c'}))
+    assert plot_digest(job) != plot_digest(renamed)
+
+def test_unchanged_plots_are_skipped(tmp_path):
+    jobs = [heatmap_job([[1, 2], [3, 4]], 'first.png'), heatmap_job([[5, 6], [7, 8]], 'second.png')]
+    assert render_plots(jobs, str(tmp_path)) == ['first.png', 'second.png']
+    assert render_plots(jobs, str(tmp_path)) == []
+
+    jobs[1] = heatmap_job([[5, 6], [7, 9]], 'second.png')
+    (tmp_path / 'first.png').unlink()
+    assert render_plots(jobs, str(tmp_path), workers=2) == ['first.png', 'second.png']
+    assert (tmp_path / 'first.png').exists()
+
+    manifest = json.loads((tmp_path / MANIFEST_FILE).read_text())
+    assert manifest['plots'] == {job.name: plot_digest(job) for job in jobs}
+
+def test_serial_rendering_keeps_backend(tmp_path):
+    import matplotlib
+    import matplotlib.pyplot as plt
+    backend = matplotlib.get_backend()
+    try:
+        plt.switch_backend('svg')
+        open_figure = plt.figure()
+        assert render_plots([heatmap_job([[1, 2], [3, 4]])], str(tmp_path)) == ['matrix.png']
+        assert matplotlib.get_backend().lower() == 'svg'
+        assert plt.get_fignums() == [open_figure.number]
+    finally:
+        plt.close('all')
+        plt.switch_backend(backend)
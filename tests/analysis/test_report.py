@@ -0,0 +1,95 @@
+import json
+import subprocess
+import sys
+
+from src.analysis.agreement import calculate_agreement_scores
+from src.analysis.columnar import read_table
+from src.analysis.report import generate_report, report_summary_dict
+from src.analysis.shards import read_index, read_section
+from tests.analysis.helpers import make_random_tasks
+
+def test_import_defers_plotting_and_pandas():
+    code = (
+        "import sys, src.analysis.report; "
+        "print([name for name in ('pandas', 'matplotlib', 'seaborn') if name in sys.modules])"
+    )
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == '[]'
+
+def test_report_without_plots(tmp_path):
+    tasks = make_random_tasks(n_tasks=20)
+    report = generate_report(tasks, str(tmp_path), bootstrap_resamples=20, plots=False, columnar=True)
+
+    assert not list(tmp_path.glob('*.png'))
+    assert (tmp_path / 'agreement_matrix.csv').exists()
+    assert (tmp_path / 'label_agreement.csv').exists()
+    assert json.loads((tmp_path / 'detailed_report.json').read_text())['tasks_analyzed'] == 20
+
+    assert not (tmp_path / 'plot_manifest.json').exists()
+    assert {path.name.split('.')[0] for path in (tmp_path / 'tables').iterdir()} == {
+        'cell_scores', 'pair_scores', 'label_assignments', 'missing_annotations'
+    }
+
+    summary = json.loads(json.dumps(report_summary_dict(report)))
+    assert summary['tasks_analyzed'] == 20
+    assert summary['annotator_pairs'] == 3
+    assert set(summary['overall_agreement']) == {category.value for category, _ in report.lowest_agreement_overall}
+    for entry in summary['lowest_agreement_categories']:
+        assert entry['ci_low'] <= entry['ci_high']
+
+def test_label_matrices_use_table_format(tmp_path):
+    generate_report(make_random_tasks(n_tasks=20), str(tmp_path), bootstrap_resamples=20, plots=False)
+
+    written = sorted(tmp_path.glob('confusion_*')) + sorted(tmp_path.glob('cooccurrence_*'))
+    assert written and not [path for path in written if path.suffix == '.csv']
+    for path in written:
+        table = read_table(str(tmp_path / path.name.split('.')[0]))
+        assert table.columns[0] == 'label'
+        assert list(table['label'].astype(str)) == [str(column) for column in table.columns[1:]]
+
+def test_report_redraws_only_changed_plots(tmp_path):
+    generate_report(make_random_tasks(n_tasks=20), str(tmp_path), bootstrap_resamples=20)
+    drawn = {path.name: path.stat().st_mtime_ns for path in tmp_path.glob('*.png')}
+    assert 'agreement_heatmap.png' in drawn and 'overall_agreement.png' in drawn
+
+    generate_report(make_random_tasks(n_tasks=20), str(tmp_path), bootstrap_resamples=20)
+    assert {path.name: path.stat().st_mtime_ns for path in tmp_path.glob('*.png')} == drawn
+
+def test_detailed_report_sections_are_sharded(tmp_path):
+    tasks = make_random_tasks(n_tasks=20)
+    generate_report(tasks, str(tmp_path), bootstrap_resamples=20, plots=False, shard_rows=50)
+    header = json.loads((tmp_path / 'detailed_report.json').read_text())
+    assert 'disagreement_examples' not in header
+
+    shard_dir = str(tmp_path / 'detailed_report')
+    index = read_index(shard_dir)
+    for name, rows in header['section_rows'].items():
+        assert index['sections'][name]['rows'] == rows
+        assert all(shard['rows'] <= 50 for shard in index['sections'][name]['shards'])
+
+    scores_by_category, _, examples = calculate_agreement_scores(tasks)
+    cells = list(read_section(shard_dir, 'cell_scores', index))
+    assert len(cells) == sum(len(scores) for turns in scores_by_category.values() for scores in turns.values())
+    assert len(index['sections']['cell_scores']['shards']) > 1
+    assert {(cell['category'], cell['turn']) for cell in cells} == {
+        (category.value, turn + 1) for category, turns in scores_by_category.items() for turn in turns
+    }
+
+    disagreements = list(read_section(shard_dir, 'disagreement_examples', index))
+    assert [row['f1_score'] for row in disagreements] == [ex.f1_score for ex in examples]
+    assert all('conversation_text' in row for row in disagreements)
+    # Sorted, so identical runs write identical shards whatever the hash seed
+    assert all(
+        row[annotator]['values'] == sorted(row[annotator]['values'])
+        for row in disagreements for annotator in ('annotator1', 'annotator2')
+    )
+
+def test_report_scores_cell_pairs_once(tmp_path, monkeypatch):
+    import src.analysis.agreement as agreement
+    import src.analysis.alpha as alpha
+    calls = []
+    pack_cells = agreement.pack_cells
+    for module in (agreement, alpha):
+        monkeypatch.setattr(module, 'pack_cells', lambda *args: calls.append(1) or pack_cells(*args))
+    generate_report(make_random_tasks(n_tasks=20), str(tmp_path), bootstrap_resamples=20, plots=False, columnar=True)
+    assert len(calls) == 1
@@ -0,0 +1,56 @@
+import pytest
+
+from src.core.label_config import generate_dynamic_label_config
+from src.analysis.types import AnnotationCategory
+from src.analysis.schema import (
+    PROMPT, RESPONSE, WHOLE, ControlSpec, build_control_table, control_names_from_config, lookup_control
+)
+from src.analysis.load import parse_annotation, extract_turn_number, extract_category
+
+@pytest.mark.parametrize("max_turns", [3, 10, 15])
+def test_every_taxonomy_control_is_mapped(max_turns):
+    """Every Choices control the config emits, except the turn selector, has a spec."""
+    table = build_control_table(max_turns)
+    names = control_names_from_config(generate_dynamic_label_config(max_turns))
+    unmapped = [name for name in names if table[name] is None]
+    assert unmapped == ["turn_selector"]
+    assert table[f"topic_turn_whole_{max_turns}"] == ControlSpec(AnnotationCategory.TOPIC, max_turns, WHOLE)
+
+def test_lookup_control_names():
+    """Current and round one control names resolve to (category, turn, role)."""
+    assert lookup_control("media_format_prompt_7") == ControlSpec(AnnotationCategory.MEDIA_FORMAT, 7, PROMPT)
+    assert lookup_control("answer_form_response_2") == ControlSpec(AnnotationCategory.ANSWER_FORM, 2, RESPONSE)
+    assert lookup_control("restricted_flags_response_1").category == AnnotationCategory.RESTRICTED_FLAGS
+    assert lookup_control("topic_response_3") == ControlSpec(AnnotationCategory.TOPIC, 3, RESPONSE)
+    assert lookup_control("media_format_42") == ControlSpec(AnnotationCategory.MEDIA_FORMAT, 42, PROMPT)
+    assert lookup_control("turn_selector") is None
+    assert lookup_control("other_feedback_prompt_1") is None
+
+    assert extract_turn_number("media_format_1") == 0
+    assert extract_turn_number("answer_form_response_2") == 3
+    assert extract_category("topic_turn_whole_4") == "topic"
+
+def test_parse_annotation_places_round_two_results():
+    """Prompt, response and whole-turn controls land on the right conversation messages."""
+    def result(name, *choices):
+        return {"from_name": name, "type": "choices", "value": {"choices": list(choices)}}
+
+    annotation, completed = parse_annotation({
+        "task": 7,
+        "_annotator": "megan",
+        "created_at": "2025-03-01T00:00:00Z",
+        "result": [
+            result("turn_selector", "Turn 2"),
+            result("media_format_prompt_2", "Natural language"),
+            result("answer_form_response_2", "Direct answer / open generation"),
+            result("topic_turn_whole_2", "Sports"),
+            result("function_purpose_2"),
+        ]
+    })
+
+    assert set(annotation.turns) == {2, 3}
+    assert annotation.turns[2].media_format == {"Natural language"}
+    assert annotation.turns[2].topic == annotation.turns[3].topic == {"Sports"}
+    assert annotation.turns[3].answer_form == {"Direct answer / open generation"}
+    assert completed[2] == {"media_format", "topic"}
+    assert completed[3] == {"answer_form", "topic"}
@@ -0,0 +1,69 @@
+import json
+import os
+
+import pytest
+
+from src.analysis.shards import INDEX_FILE, ShardWriter, read_index, read_section
+
+def test_sections_roll_over_into_shards(tmp_path):
+    rows = [{'id': idx, 'text': f"ünïcode {idx}"} for idx in range(25)]
+    with ShardWriter(str(tmp_path), rows_per_shard=10) as writer:
+        writer.write_section('examples', iter(rows))
+        writer.write_section('empty', [])
+
+    index = read_index(str(tmp_path))
+    assert index['sections']['examples']['rows'] == 25
+    assert [shard['rows'] for shard in index['sections']['examples']['shards']] == [10, 10, 5]
+    assert index['sections']['empty'] == {'rows': 0, 'shards': []}
+    assert list(read_section(str(tmp_path), 'examples')) == rows
+
+def test_rewrite_drops_stale_shards(tmp_path):
+    with ShardWriter(str(tmp_path), rows_per_shard=2) as writer:
+        writer.write_section('examples', range(5))
+    with ShardWriter(str(tmp_path), rows_per_shard=2) as writer:
+        writer.write_section('examples', range(3))
+
+    assert sorted(path.name for path in tmp_path.glob('examples-*.jsonl')) == ['examples-00000.jsonl', 'examples-00001.jsonl']
+    assert list(read_section(str(tmp_path), 'examples')) == [0, 1, 2]
+
+def test_index_is_only_written_on_success(tmp_path):
+    def failing_rows():
+        yield {'id': 0}
+        raise RuntimeError('boom')
+
+    with pytest.raises(RuntimeError):
+        with ShardWriter(str(tmp_path)) as writer:
+            writer.write_section('examples', failing_rows())
+    assert not (tmp_path / INDEX_FILE).exists()
+
+def test_failed_rerun_leaves_no_index(tmp_path):
+    with ShardWriter(str(tmp_path), rows_per_shard=2) as writer:
+        writer.write_section('examples', range(5))
+
+    def failing_rows():
+        yield from range(3)
+        raise RuntimeError('boom')
+
+    with pytest.raises(RuntimeError):
+        with ShardWriter(str(tmp_path), rows_per_shard=2) as writer:
+            writer.write_section('examples', failing_rows())
+    assert not (tmp_path / INDEX_FILE).exists()
+
+    with ShardWriter(str(tmp_path), rows_per_shard=2) as writer:
+        writer.write_section('examples', range(3))
+    assert list(read_section(str(tmp_path), 'examples')) == [0, 1, 2]
+
+def test_index_is_readable_like_the_shards(tmp_path):
+    umask = os.umask(0o022)
+    try:
+        with ShardWriter(str(tmp_path)) as writer:
+            writer.write_section('examples', range(3))
+    finally:
+        os.umask(umask)
+    assert (tmp_path / INDEX_FILE).stat().st_mode & 0o777 == 0o644
+    assert (tmp_path / 'examples-00000.jsonl').stat().st_mode & 0o777 == 0o644
+
+def test_unknown_index_version(tmp_path):
+    (tmp_path / INDEX_FILE).write_text(json.dumps({'version': 0, 'sections': {}}))
+    with pytest.raises(ValueError):
+        read_index(str(tmp_path))
@@ -0,0 +1,86 @@
+import json
+
+import pytest
+
+from src.analysis.fingerprint import task_fingerprint
+from src.analysis.stream import ExportReader, iter_export_tasks
+
+TASKS = [
+    {
+        "id": task_id,
+        "data": {
+            "conversation": [{"role": "User", "text": f"Question {task_id} with \"quotes\" and ünïcode"}],
+            "conversation_id": f"conv_{task_id:04d}"
+        },
+        "annotations": [{"id": 1, "result": [], "created_at": "2025-03-01T00:00:00Z", "lead_time": 3.2}],
+        "drafts": [{"result": []}],
+        "predictions": [],
+        "comment_count": 0
+    }
+    for task_id in range(1, 6)
+]
+
+@pytest.fixture(params=["array", "wrapped", "wrapped_trailing_metadata", "jsonl"])
+def export_file(request, tmp_path):
+    path = tmp_path / "export.json"
+    if request.param == "array":
+        path.write_text(json.dumps(TASKS, indent=2))
+    elif request.param == "wrapped":
+        path.write_text(json.dumps({"metadata": {"annotator": "megan"}, "annotations": TASKS}, indent=2))
+    elif request.param == "wrapped_trailing_metadata":
+        path.write_text(json.dumps({"annotations": TASKS, "metadata": {"annotator": "megan"}}))
+    else:
+        path.write_text("\n".join(json.dumps(task) for task in TASKS) + "\n")
+    return request.param, str(path)
+
+@pytest.mark.parametrize("chunk_size", [3, 64, 1 << 16])
+def test_reader_round_trips_every_format(export_file, chunk_size):
+    """Unpruned streaming yields exactly what json.load would, for any chunk size."""
+    kind, path = export_file
+    with ExportReader(path, prune=False, chunk_size=chunk_size) as reader:
+        assert list(reader) == TASKS
+        assert reader.format == ("jsonl" if kind == "jsonl" else "wrapped" if "wrapped" in kind else "array")
+        if reader.format == "wrapped":
+            assert reader.header["metadata"]["annotator"] == "megan"
+
+def test_reader_prunes_unused_keys(export_file):
+    """Pruned tasks keep only what the analysis reads, plus the conversation fingerprint."""
+    _, path = export_file
+    tasks = list(iter_export_tasks(path))
+    assert [set(task) for task in tasks] == [{"id", "data", "annotations", "_conv_hash"}] * len(TASKS)
+    assert tasks[0]["data"] == {"conversation_id": "conv_0001"}
+    assert set(tasks[0]["annotations"][0]) == {"id", "result", "created_at"}
+    assert tasks[0]["_conv_hash"] == task_fingerprint(TASKS[0])
+
+    full = list(iter_export_tasks(path, keep_data=True))
+    assert full[0]["data"] == TASKS[0]["data"]
+
+@pytest.mark.parametrize("chunk_size", [3, 1 << 16])
+@pytest.mark.parametrize("unannotated", [0, 1])
+def test_jsonl_tasks_starting_with_annotations(tmp_path, chunk_size, unannotated):
+    """JSON Lines tasks serialized with 'annotations' first are not mistaken for a wrapped export."""
+    path = tmp_path / "export.jsonl"
+    tasks = [{"annotations": task["annotations"], "id": task["id"], "data": task["data"]} for task in TASKS]
+    tasks[unannotated]["annotations"] = []
+    path.write_text("\n".join(json.dumps(task) for task in tasks) + "\n")
+    with ExportReader(str(path), chunk_size=chunk_size) as reader:
+        assert reader.format == "jsonl"
+        assert [task["id"] for task in reader] == [task["id"] for task in TASKS]
+
+    empty_wrapped = tmp_path / "empty.json"
+    empty_wrapped.write_text(json.dumps({"annotations": [], "metadata": {"annotator": "megan"}}))
+    with ExportReader(str(empty_wrapped)) as reader:
+        assert reader.format == "wrapped"
+        assert list(reader) == []
+        assert reader.header["metadata"] == {"annotator": "megan"}
+
+def test_reader_empty_and_invalid(tmp_path):
+    """Empty files yield nothing; malformed files raise JSONDecodeError."""
+    empty = tmp_path / "empty.json"
+    empty.write_text("")
+    assert list(iter_export_tasks(str(empty))) == []
+
+    broken = tmp_path / "broken.json"
+    broken.write_text('[{"id": 1}, {"id": ')
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_export_tasks(str(broken)))
@@ -0,0 +1,38 @@
+import random
+
+from src.core.label_config import generate_dynamic_label_config
+from src.analysis.agreement import calculate_f1_score
+from src.analysis.types import AnnotationCategory
+from src.analysis.vocab import LabelVocabulary, popcount
+
+def test_vocabulary_seeded_from_label_config():
+    """Every Choice of the taxonomy has a bit; the turn selector contributes nothing."""
+    # A fresh vocabulary, since the shared one also grows with labels seen by other tests
+    vocab = LabelVocabulary.from_config(generate_dynamic_label_config(1))
+    assert vocab.size(AnnotationCategory.FUNCTION_PURPOSE) == 39
+    assert vocab.size(AnnotationCategory.TOPIC) == 38
+    # Prompt and response controls of one category share bits
+    assert vocab.labels[AnnotationCategory.MEDIA_FORMAT][0] == "Audio"
+    assert vocab.size(AnnotationCategory.MEDIA_FORMAT) == 11  # One choice is listed twice in the config
+    assert all("Turn 1" not in labels for labels in vocab.labels.values())
+
+def test_encode_decode_round_trip():
+    """Unseen labels get new bits; None (not applicable) is preserved."""
+    vocab = LabelVocabulary()
+    mask = vocab.encode(AnnotationCategory.TOPIC, {"Sports", "Travel"})
+    assert popcount(mask) == 2
+    assert vocab.encode(AnnotationCategory.TOPIC, {"Sports & Games"}) == 1 << 2
+    assert vocab.decode(AnnotationCategory.TOPIC, mask) == {"Sports", "Travel"}
+    assert vocab.encode(AnnotationCategory.ANSWER_FORM, None) is None
+    assert vocab.decode(AnnotationCategory.TOPIC, 0) == set()
+
+def test_bitmask_f1_matches_set_f1():
+    """F1 on bitmasks is identical to F1 on the label sets, including labels beyond 64 bits."""
+    rng = random.Random(0)
+    vocab = LabelVocabulary()
+    labels = [f"label {idx}" for idx in range(100)]
+    for _ in range(500):
+        set1 = set(rng.sample(labels, rng.randint(0, 5)))
+        set2 = set(rng.sample(labels, rng.randint(0, 5)))
+        masks = vocab.encode(AnnotationCategory.TOPIC, set1), vocab.encode(AnnotationCategory.TOPIC, set2)
+        assert calculate_f1_score(*masks) == calculate_f1_score(set1, set2)
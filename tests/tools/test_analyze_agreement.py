@@ -0,0 +1,20 @@
+import sys
+
+import pytest
+
+from src.tools import analyze_agreement
+
+@pytest.mark.parametrize('resamples', ['0', '-5', 'many'])
+def test_bootstrap_resamples_must_be_positive(resamples, tmp_path, monkeypatch, capsys):
+    """Bad values are rejected by argparse before any export is loaded."""
+    def fail(*args):
+        raise AssertionError("exports were loaded")
+    monkeypatch.setattr(analyze_agreement, 'analyze_agreement', fail)
+    monkeypatch.setattr(sys, 'argv', [
+        'analyze_agreement.py', '--output-dir', str(tmp_path / 'reports'), '--bootstrap-resamples', resamples
+    ])
+    with pytest.raises(SystemExit) as exit_info:
+        analyze_agreement.main()
+    assert exit_info.value.code == 2
+    assert '--bootstrap-resamples' in capsys.readouterr().err
+    assert not (tmp_path / 'reports').exists()